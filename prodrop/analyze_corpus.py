@@ -6,15 +6,30 @@ PURPOSE:
     Entry point for the project. Does combined analysis and prints reports to
     a timestamped folder whose root is OUTPUT_PATH, defined below.
 """
-from os import mkdir
+from os import cpu_count, mkdir
 from os.path import join, normpath
+from sys import stdout
 
 from constants import TREEBANK_DATA_PATH
+from incremental import run_incremental
+from rawscan import scan_corpus
 from subjectverbanalysis import CombinedAnalyzer
 from util import Timer, timestamp_now
 
 INPUT_PATH =  TREEBANK_DATA_PATH #'../treebank_data/00/ann_0001.parse'#
 OUTPUT_PATH = '../reports/' # Must be directory; Filename auto-generated
+WORKERS = cpu_count() or 1 # Processes used; see scheduler
+CACHE_DIR = None # Directory of parsed tree caches, e.g. '../treecache/';
+                 # None to always parse. Rarely written with LAZY, which
+                 # caches only files whose trees were all built.
+LAZY = True # Build only trees that pass the analyzers' prefilters
+FAST = False # Count with rawscan instead of building trees
+RECURSIVE = True # Search nested directories of INPUT_PATH
+PIPELINED = False # Overlap reading, parsing and analysis; see pipeline
+QUEUE_DEPTH = 8 # Batches held by each queue of the pipeline
+BATCH_SIZE = 64 # Trees per batch of the pipeline
+STORE_DIR = None # Directory to reanalyze only changed files; see incremental.
+                 # Not pipelined, so PIPELINED is then ignored.
 
 def timestamped_file_path(filename, timestamp):
     return normpath(join(
@@ -34,11 +49,34 @@ if __name__ == '__main__':
     pd_report_path = timestamped_file_path('pro-drop report.txt', nowstamp)
     npd_report_path = timestamped_file_path('non-pro-drop report.txt', nowstamp)
     
+    if STORE_DIR is not None and PIPELINED and not FAST:
+        print('Warning: PIPELINED is ignored, as STORE_DIR is set.\n')
+
     with timer:
-        ca = CombinedAnalyzer(INPUT_PATH)
-        ca.do_analysis()
+        ca = CombinedAnalyzer(INPUT_PATH, cache_dir=CACHE_DIR, lazy=LAZY,
+                              recursive=RECURSIVE)
+        incremental_report = None
+        if FAST:
+            ca.result = scan_corpus(INPUT_PATH, recursive=RECURSIVE)
+        elif STORE_DIR is not None:
+            incremental_report = run_incremental(ca, STORE_DIR, WORKERS)
+        else:
+            ca.do_analysis(workers=WORKERS, pipelined=PIPELINED,
+                           pipeline_options={'queue_depth' : QUEUE_DEPTH,
+                                             'batch_size' : BATCH_SIZE})
         ca.print_report_basic()
 
+        if incremental_report is not None:
+            print()
+            incremental_report.write_report(stdout)
+
+        if ca.schedule_report is not None:
+            print()
+            ca.schedule_report.write_report(stdout)
+        if ca.pipeline_stats is not None:
+            print()
+            ca.pipeline_stats.write_report(stdout)
+
         with open(pd_report_path, 'w', encoding='utf8') as pdout:
             with open(npd_report_path, 'w', encoding='utf8') as npdout:
                 ca.write_report_full(pdout, npdout)
@@ -0,0 +1,272 @@
+"""
+corpus.py
+Author: Adam Beagle
+
+PURPOSE:
+    Contains functions to find the .parse files of a corpus, and
+    CorpusManifest, a record of those files that can be saved and checked
+    later without re-reading them.
+
+USAGE:
+    Files are found recursively (unlike util.get_files_by_ext) and returned
+    in a deterministic order, sorted by their path relative to the corpus
+    root, so every run and every process agrees on the order of a corpus.
+
+    files = discover(TREEBANK_DATA_PATH, exclude=['00/*'])
+
+    A manifest additionally records the tree count and SHA-1 hash of each
+    file:
+
+    manifest = CorpusManifest.build(TREEBANK_DATA_PATH)
+    manifest.save('corpus.manifest.json')
+
+    The same can be done from the command line:
+
+    python corpus.py <corpus directory> <manifest path>
+
+GLOB PATTERNS:
+    Include and exclude patterns are matched with fnmatch, ignoring case. A
+    pattern containing '/' is matched against a file's path relative to the
+    corpus root (with '/' separators); any other pattern is matched against
+    its name alone. A directory matching an exclude pattern is not searched.
+"""
+from fnmatch import fnmatchcase
+from hashlib import sha1
+import json
+import os
+from os.path import isdir, normpath
+import sys
+
+from exceptions import InputPathError, ManifestError
+
+DEFAULT_INCLUDE = ('*.parse',)
+
+# Increment whenever the layout of a manifest changes.
+MANIFEST_VERSION = 1
+
+class CorpusFile:
+    """
+    A file of a corpus.
+
+    ATTRIBUTES:
+      * hash - SHA-1 hex digest of the file's contents, or None if unknown.
+      * mtime_ns
+      * path
+      * relpath - path relative to the corpus root, with '/' separators.
+      * size - Size in bytes.
+      * tree_count - Number of trees, or None if unknown.
+    """
+    __slots__ = ('path', 'relpath', 'size', 'mtime_ns', 'tree_count', 'hash')
+
+    def __init__(self, path, relpath, size, mtime_ns, tree_count=None,
+                 hash=None):
+        self.path = path
+        self.relpath = relpath
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.tree_count = tree_count
+        self.hash = hash
+
+    def __eq__(self, other):
+        if not isinstance(other, CorpusFile):
+            return NotImplemented
+
+        return all(getattr(self, attr) == getattr(other, attr)
+                   for attr in self.__slots__)
+
+    def __repr__(self):
+        return 'CorpusFile({0!r}, size={1})'.format(self.path, self.size)
+
+    def is_current(self):
+        """
+        Return True if the file still exists with the size and modification
+        time recorded.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+
+        return (stat.st_size == self.size
+                and stat.st_mtime_ns == self.mtime_ns)
+
+class CorpusManifest:
+    """
+    Record of the files of a corpus, in corpus order.
+
+    ATTRIBUTES:
+      * exclude
+      * files - List of CorpusFile.
+      * filepaths (read-only) - List of the path of each file.
+      * include
+      * root
+      * total_size (read-only)
+      * tree_count (read-only)
+
+    METHODS:
+      * build (classmethod)
+      * load (classmethod)
+      * save
+      * stale_files
+
+    len() of a manifest is its number of files, and iterating over it yields
+    its files.
+    """
+    def __init__(self, root, files, include=DEFAULT_INCLUDE, exclude=()):
+        self.root = root
+        self.files = files
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    @classmethod
+    def build(cls, root, include=DEFAULT_INCLUDE, exclude=(), recursive=True):
+        """
+        Return manifest of the files found by discover() with the given
+        arguments, with the tree count and hash of each file.
+        """
+        # Imported here as util depends on this module.
+        from util import itertreetexts
+
+        files = discover(root, include, exclude, recursive)
+        for f in files:
+            f.tree_count = sum(1 for text in itertreetexts(f.path))
+            f.hash = file_hash(f.path)
+
+        return cls(root, files, include, exclude)
+
+    @property
+    def filepaths(self):
+        return [f.path for f in self.files]
+
+    @classmethod
+    def load(cls, path):
+        """
+        Return manifest saved to the file given by 'path' by save().
+        ManifestError is raised if the file does not hold a manifest.
+        """
+        try:
+            with open(path, encoding='utf8') as f:
+                data = json.load(f)
+
+            if not data['version'] == MANIFEST_VERSION:
+                raise ManifestError(
+                    "Manifest '{0}' has version {1}, expected {2}.".format(
+                        path, data['version'], MANIFEST_VERSION)
+                )
+
+            files = [CorpusFile(**entry) for entry in data['files']]
+            return cls(data['root'], files, data['include'], data['exclude'])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ManifestError(
+                "Could not load manifest from '{0}': {1}".format(path, e)
+            )
+
+    def save(self, path):
+        """Write manifest as JSON to the file given by 'path.'"""
+        data = {
+            'version' : MANIFEST_VERSION,
+            'root' : self.root,
+            'include' : list(self.include),
+            'exclude' : list(self.exclude),
+            'files' : [{attr : getattr(f, attr) for attr in f.__slots__}
+                       for f in self.files],
+        }
+
+        with open(path, 'w', encoding='utf8') as f:
+            json.dump(data, f, indent=1, ensure_ascii=False)
+
+    def stale_files(self):
+        """
+        Return list of files that have changed or been removed since the
+        manifest was built, as judged by their sizes and modification times.
+        Files added since then are not detected; use discover() for that.
+        """
+        return [f for f in self.files if not f.is_current()]
+
+    @property
+    def total_size(self):
+        return sum(f.size for f in self.files)
+
+    @property
+    def tree_count(self):
+        return sum(f.tree_count or 0 for f in self.files)
+
+def discover(root, include=DEFAULT_INCLUDE, exclude=(), recursive=True):
+    """
+    Return list of CorpusFile for each file under the directory 'root' that
+    matches at least one pattern of 'include' and no pattern of 'exclude'
+    (see GLOB PATTERNS in the module docstring), sorted by relative path.
+
+    Only 'root' itself is searched if recursive is False. Symbolic links to
+    directories are not followed.
+
+    InputPathError is raised if 'root' is not a directory.
+    """
+    if not isdir(root):
+        raise InputPathError(
+            "Corpus root is not a directory.\nroot: {0}".format(root)
+        )
+
+    files = []
+    _scan_dir(root, '', include, exclude, recursive, files)
+    files.sort(key=lambda f: f.relpath.split('/'))
+
+    return files
+
+def file_hash(path):
+    """Return SHA-1 hex digest of the contents of the file 'path.'"""
+    h = sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+
+    return h.hexdigest()
+
+def _matches(name, relpath, patterns):
+    """
+    Return True if the entry with 'name' and 'relpath' matches any glob in
+    'patterns.'
+    """
+    for pattern in patterns:
+        target = relpath if '/' in pattern else name
+        if fnmatchcase(target.lower(), pattern.lower()):
+            return True
+
+    return False
+
+def _scan_dir(directory, prefix, include, exclude, recursive, files):
+    """
+    Append a CorpusFile to 'files' for each matching file in 'directory,'
+    whose relative path is 'prefix,' and in its subdirectories if recursive.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            relpath = prefix + entry.name
+
+            if _matches(entry.name, relpath, exclude):
+                continue
+
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    _scan_dir(entry.path, relpath + '/', include, exclude,
+                              recursive, files)
+            elif _matches(entry.name, relpath, include) and entry.is_file():
+                stat = entry.stat()
+                files.append(CorpusFile(normpath(entry.path), relpath,
+                                        stat.st_size, stat.st_mtime_ns))
+
+###############################################################################
+if __name__ == '__main__':
+    if not len(sys.argv) == 3:
+        sys.exit('Usage: python corpus.py <corpus directory> <manifest path>')
+
+    manifest = CorpusManifest.build(sys.argv[1])
+    manifest.save(sys.argv[2])
+    print('{0} files, {1} trees, {2} bytes.'.format(
+        len(manifest), manifest.tree_count, manifest.total_size))
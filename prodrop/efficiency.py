@@ -9,13 +9,30 @@ PURPOSE:
     be quite lengthy if they involve lots of runs to get a good average,
     and these tests do not necessarily involve assertions.
 """
-from parsetree import ParseTree
-from util import itertreelines, Timer
+from tempfile import TemporaryDirectory
+import tracemalloc
+
+from parsetree import ParseTree, ParseTreeEndNode, ParseTreeThruNode
+from flattree import FlatParseTree
+from subjectverbanalysis import (CombinedAnalyzer, PRODROP_QUERY,
+    PRODROP_WORD_PATTERN
+)
+from treepattern import TreePattern
+from util import itertreelines, itertrees, Timer
+
+SAMPLE_PATH = '../treebank_data/testdata/sample.parse'
+SAMPLE_TREE_LARGE_PATH = '../treebank_data/testdata/sample_tree_large.parse'
+
+def first_tree_lines(filepath):
+    """Return the lines of the first tree in the .parse file 'filepath'."""
+    # Generators not indexable, so break after 1
+    for t in itertreelines(filepath):
+        return t[:]
 
 def test_end_node_caching():
     """
     Report execution time to build and search a tree with end-node caching
-    off, then on.
+    off, then on, then with the full index (ParseTree.INDEX_FULL).
 
     Total number of runs and searches, as well as which file the test
     tree is taken from can be varied.
@@ -27,8 +44,8 @@ def test_end_node_caching():
                 for s in range(searches):
                     tree.search(tag='PUNC', word='.')
 
-        caching_word = 'WITH' if caching else 'NO'
-        print('\n{0} CACHING'.format(caching_word)) 
+        caching_word = ('NO', 'WITH', 'FULL INDEX AND')[caching]
+        print('\n{0} CACHING'.format(caching_word))
         print('Time for {0} runs, {1} searches per run:\n {2:.3f}s'.format(
             runs, searches, timer.total_time)
         )
@@ -40,18 +57,295 @@ def test_end_node_caching():
     timer = Timer()
     runs = 100
     searches = 50
-    filepath = '../treebank_data/sample_tree_large.parse'
-    lines = None
-
-    # Get one tree (generators not indexable, so break after 1)
-    for t in itertreelines(filepath):
-        lines = t[:]
-        break
+    lines = first_tree_lines(SAMPLE_TREE_LARGE_PATH)
 
     print('==================================\nBegin end node caching test...')
-    do_test(0)
-    do_test(1)
+    do_test(ParseTree.INDEX_NONE)
+    do_test(ParseTree.INDEX_END_NODES)
+    do_test(ParseTree.INDEX_FULL)
+
+def test_node_memory():
+    """
+    Report bytes allocated per node for trees held in memory, comparing the
+    __slots__ node classes against a replica of the previous __dict__-based
+    nodes, whose children were stored by growing a tuple.
+
+    The file the trees are taken from and the number of copies held can be
+    varied.
+    """
+    class DictThruNode:
+        def __init__(self, parent, tag):
+            self.tag = tag
+            self._parent = parent
+            self._children = ()
+            if parent is not None:
+                parent._children += (self, )
+
+        def freeze(self):
+            pass
+
+    class DictEndNode:
+        def __init__(self, parent, tag, word):
+            self.tag = tag
+            self._parent = parent
+            self.word = word
+            parent._children += (self, )
+
+    def copy_nodes(node, thru_class, end_class, parent=None):
+        if node.is_end:
+            return end_class(parent, node.tag, node.word)
+
+        copy = thru_class(parent, node.tag)
+        for child in node.children:
+            copy_nodes(child, thru_class, end_class, copy)
+        copy.freeze()
+
+        return copy
+
+    def measure(thru_class, end_class):
+        tracemalloc.start()
+        held = [copy_nodes(tree.top, thru_class, end_class)
+                for i in range(copies) for tree in trees]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        return size / (copies*node_count)
+
+    copies = 20
+    trees = [ParseTree(lines) for lines in itertreelines(SAMPLE_PATH)]
+    node_count = sum(len(tuple(tree.iternodes())) for tree in trees)
+
+    # Copies share tag and word strings with the source trees, so only the
+    # per-node overhead is compared.
+    before = measure(DictThruNode, DictEndNode)
+    after = measure(ParseTreeThruNode, ParseTreeEndNode)
+
+    print('==================================\nBegin node memory test...')
+    print('{0} nodes, {1} copies held'.format(node_count, copies))
+    print(' __dict__ nodes:  {0:.1f} bytes / node'.format(before))
+    print(' __slots__ nodes: {0:.1f} bytes / node'.format(after))
+
+def test_compiled_query():
+    """
+    Report per-tree cost of running the same search on every tree of a file
+    through ParseTree.search, which resolves flags and compiles patterns on
+    each call, and through a Query compiled once with compile_query.
+
+    Total number of runs and which file the trees are taken from can be
+    varied.
+    """
+    def do_test(description, search):
+        with timer:
+            for r in range(runs):
+                for tree in trees:
+                    search(tree)
+
+        print('\n{0}'.format(description))
+        print(' {0:.2f}us / tree'.format(
+            1000000*timer.total_time / (runs*len(trees)))
+        )
+
+    timer = Timer()
+    runs = 200
+    trees = [ParseTree(lines) for lines in itertreelines(SAMPLE_PATH)]
+    kwargs = {
+        'tag' : '-NONE-',
+        'word' : PRODROP_WORD_PATTERN,
+        'word_flag' : ParseTree.REMATCH,
+        'parent_tag' : 'NP-SBJ',
+        'parent_flag' : ParseTree.STARTSWITH,
+    }
+    query = ParseTree.compile_query(**kwargs)
+
+    print('==================================\nBegin compiled query test...')
+    do_test('ParseTree.search', lambda tree: tree.search(**kwargs))
+    do_test('Query.search', query.search)
+
+def test_tree_cache():
+    """
+    Report time to read every tree of a .parse file by parsing it, and by
+    loading it from a treecache cache.
+
+    The file the trees are taken from and the number of runs can be varied.
+    """
+    def do_test(name, **kwargs):
+        with timer:
+            for r in range(runs):
+                for tree in itertrees(SAMPLE_PATH, **kwargs):
+                    pass
+
+        print('\n{0}'.format(name))
+        print(' {0:.3f}ms / run'.format(1000*timer.total_time / runs))
+
+    timer = Timer()
+    runs = 20
+
+    print('==================================\nBegin tree cache test...')
+    with TemporaryDirectory() as cache_dir:
+        # Write the cache once before timing loads from it
+        for tree in itertrees(SAMPLE_PATH, cache_dir=cache_dir):
+            pass
+
+        do_test('PARSED')
+        do_test('LOADED FROM CACHE', cache_dir=cache_dir)
+
+def test_fused_extraction():
+    """
+    Report time for a CombinedAnalyzer to analyze every tree of a .parse
+    file with a separate search for each kind of subject, and with both
+    found in one pass by extract_subjects (its analyze_tree).
+
+    The file the trees are taken from and the number of runs can be varied.
+    """
+    def do_test(name, trees, fused):
+        analyzers = [CombinedAnalyzer(SAMPLE_PATH) for r in range(runs)]
+
+        with timer:
+            for analyzer in analyzers:
+                pdanalyzer = analyzer.prodrop_analyzer
+                npdanalyzer = analyzer.nonprodrop_analyzer
+
+                for tree in trees:
+                    if fused:
+                        analyzer.analyze_tree(tree)
+                    else:
+                        analyzer._update_verb_counts(
+                            pdanalyzer.analyze_tree(tree),
+                            npdanalyzer.analyze_tree(tree)
+                        )
+
+        print('\n{0}'.format(name))
+        print(' {0:.3f}ms / run'.format(1000*timer.total_time / runs))
+
+    timer = Timer()
+    runs = 200
+
+    print('==================================\nBegin fused extraction test...')
+    for tree_class in (ParseTree, FlatParseTree):
+        trees = list(itertrees(SAMPLE_PATH, tree_class=tree_class))
+        do_test('{0} SEPARATE'.format(tree_class.__name__), trees, False)
+        do_test('{0} FUSED'.format(tree_class.__name__), trees, True)
+
+def test_sentence():
+    """
+    Report time to get the sentence of each tree of a file, comparing the
+    former word-by-word concatenation against ParseTree.sentence, and
+    against a sentence cached by ParseTree.get_sentence.
+
+    Total number of runs and which file the trees are taken from can be
+    varied.
+    """
+    def concatenated_sentence(tree):
+        sentence = ''
+        for i, node in enumerate(tree.iterendnodes()):
+            if node.tag == 'PUNC':
+                sentence += node.word
+            elif i == 0:
+                sentence += node.word
+            elif not node.tag == '-NONE-':
+                sentence += ' {0}'.format(node.word)
+        return sentence
+
+    def do_test(name, trees, get_sentence):
+        with timer:
+            for r in range(runs):
+                for tree in trees:
+                    get_sentence(tree)
+
+        print('\n{0}'.format(name))
+        print(' {0:.4f}ms / tree'.format(
+            1000*timer.total_time / (runs*len(trees))))
+
+    timer = Timer()
+    runs = 200
+
+    print('==================================\nBegin sentence test...')
+    for tree_class in (ParseTree, FlatParseTree):
+        trees = list(itertrees(SAMPLE_TREE_LARGE_PATH, tree_class=tree_class))
+        name = tree_class.__name__
+        do_test('{0} CONCATENATED'.format(name), trees, concatenated_sentence)
+        do_test('{0} JOINED'.format(name), trees, lambda t: t.sentence)
+        do_test('{0} CACHED'.format(name), trees,
+                lambda t: t.get_sentence(cache=True))
+
+def test_relative_search():
+    """
+    Report per-tree cost of finding the nodes with no PRN ancestor, by
+    walking up from every node and by an ancestor_tag constraint, which
+    compares the node ids with the subtree_end of each PRN node.
+
+    Total number of runs and which file the trees are taken from can be
+    varied.
+    """
+    def walk_up(tree):
+        results = []
+        for node in tree.iternodes():
+            ancestor = node.parent
+            while ancestor is not None and not ancestor.tag == 'PRN':
+                ancestor = ancestor.parent
+            if ancestor is None:
+                results.append(node)
+        return results
+
+    def do_test(name, trees, search):
+        with timer:
+            for r in range(runs):
+                for tree in trees:
+                    search(tree)
+
+        print('\n{0}'.format(name))
+        print(' {0:.2f}us / tree'.format(
+            1000000*timer.total_time / (runs*len(trees))))
+
+    timer = Timer()
+    runs = 200
+    query = ParseTree.compile_query(ancestor_tag='PRN',
+                                    ancestor_flag=ParseTree.IS_NOT)
+
+    print('==================================\nBegin relative search test...')
+    for tree_class in (ParseTree, FlatParseTree):
+        trees = list(itertrees(SAMPLE_PATH, tree_class=tree_class))
+        name = tree_class.__name__
+        do_test('{0} WALK UP'.format(name), trees, walk_up)
+        do_test('{0} ANCESTOR QUERY'.format(name), trees, query.search)
+
+def test_tree_pattern():
+    """
+    Report per-tree cost of finding pro-drops with PRODROP_QUERY, used by
+    iterprodrops, and with the equivalent TreePattern.
+
+    Total number of runs and which file the trees are taken from can be
+    varied.
+    """
+    def do_test(name, trees, search):
+        with timer:
+            for r in range(runs):
+                for tree in trees:
+                    search(tree)
+
+        print('\n{0}'.format(name))
+        print(' {0:.2f}us / tree'.format(
+            1000000*timer.total_time / (runs*len(trees))))
+
+    timer = Timer()
+    runs = 200
+    pattern = TreePattern(
+        '-NONE- > /^NP-SBJ/ < /{0}/'.format(PRODROP_WORD_PATTERN))
+
+    print('==================================\nBegin tree pattern test...')
+    for tree_class in (ParseTree, FlatParseTree):
+        trees = list(itertrees(SAMPLE_PATH, tree_class=tree_class))
+        name = tree_class.__name__
+        do_test('{0} QUERY'.format(name), trees, PRODROP_QUERY.search)
+        do_test('{0} PATTERN'.format(name), trees, pattern.search)
 
 ###############################################################################
 if __name__ == '__main__':
     test_end_node_caching()
+    test_node_memory()
+    test_compiled_query()
+    test_tree_cache()
+    test_fused_extraction()
+    test_sentence()
+    test_relative_search()
+    test_tree_pattern()
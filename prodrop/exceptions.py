@@ -21,19 +21,40 @@ class SearchFlagError(ParseTreeSearchError):
 class CustomCallableError(ParseTreeSearchError):
     pass
 
+class TreePatternError(ParseTreeSearchError):
+    pass
+
+class TraversalOrderError(ParseTreeError):
+    pass
+
 class TreeConstructionError(ParseTreeError):
     pass
 
 ###############################################################################
 # Other
+class FailureRecordError(Exception):
+    pass
+
 class InputPathError(Exception):
     pass
 
+class ManifestError(Exception):
+    pass
+
 class MissingParseFilesError(Exception):
     pass
 
 class NoTreesFoundError(Exception):
     pass
 
+class ResultFileError(Exception):
+    pass
+
+class TreeCacheError(Exception):
+    pass
+
+class TreeIndexError(Exception):
+    pass
+
 
 
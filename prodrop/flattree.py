@@ -0,0 +1,601 @@
+"""
+flattree.py
+Author: Adam Beagle
+
+PURPOSE:
+    Contains an array-backed alternative to parsetree.ParseTree. A
+    FlatParseTree stores its nodes in preorder as parallel arrays rather than
+    as a graph of node objects, which greatly reduces memory use and turns
+    traversals and searches into index scans.
+
+    Nodes are returned as lightweight views (FlatThruNode, FlatEndNode) that
+    implement the parsetree.ParseTreeNode interface, so code written against
+    ParseTree, such as the analyzers in subjectverbanalysis, works unchanged.
+"""
+from array import array
+
+from parsetree import ParseTree, ParseTreeNode, tree_token_pattern
+
+class FlatNode:
+    """
+    Base class of the node views of a FlatParseTree. A view holds only its
+    tree and its preorder index; all attributes are read from the tree's
+    arrays. Two views are equal if they refer to the same node.
+
+    ATTRIBUTES:
+      * following_siblings (read-only)
+      * gorn_address (read-only)
+      * has_children (read-only)
+      * index (read-only) - Preorder index of the node within its tree.
+      * index_in_parent (read-only)
+      * is_end (read-only)
+      * next_sibling (read-only)
+      * node_id (read-only) - Same as index.
+      * parent (read-only)
+      * preceding_siblings (read-only)
+      * previous_sibling (read-only)
+      * subtree_end (read-only)
+      * tag (read-only)
+
+    METHODS:
+      * is_ancestor_of
+      * is_descendant_of
+
+    See parsetree.ParseTreeNode for the sibling, addressing and ancestry
+    attributes and methods.
+    """
+    __slots__ = ('_tree', '_index')
+
+    def __init__(self, tree, index):
+        self._tree = tree
+        self._index = index
+
+    def __eq__(self, other):
+        return (isinstance(other, FlatNode) and other._tree is self._tree
+                and other._index == self._index)
+
+    def __hash__(self):
+        return hash((id(self._tree), self._index))
+
+    def __repr__(self):
+        return '<{0} {1} {2!r}>'.format(type(self).__name__, self._index,
+                                        self.tag)
+
+    @property
+    def following_siblings(self):
+        tree = self._tree
+        parent_index = tree._parents[self._index]
+        if parent_index < 0:
+            return ()
+
+        ends = tree._ends
+        end = ends[parent_index]
+        siblings = []
+        i = ends[self._index]
+        while i < end:
+            siblings.append(tree._node(i))
+            i = ends[i]
+
+        return tuple(siblings)
+
+    @property
+    def gorn_address(self):
+        tree = self._tree
+        if tree._positions is None:
+            tree._index_siblings()
+        parents = tree._parents
+        positions = tree._positions
+
+        address = []
+        i = self._index
+        while parents[i] >= 0:
+            address.append(positions[i])
+            i = parents[i]
+        address.reverse()
+
+        return tuple(address)
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def index_in_parent(self):
+        tree = self._tree
+        if tree._parents[self._index] < 0:
+            return None
+        if tree._positions is None:
+            tree._index_siblings()
+
+        return tree._positions[self._index]
+
+    def is_ancestor_of(self, other):
+        return self._index < other._index < self._tree._ends[self._index]
+
+    def is_descendant_of(self, other):
+        return other._index < self._index < self._tree._ends[other._index]
+
+    @property
+    def node_id(self):
+        return self._index
+
+    @property
+    def next_sibling(self):
+        tree = self._tree
+        parent_index = tree._parents[self._index]
+        if parent_index < 0:
+            return None
+
+        i = tree._ends[self._index]
+        return tree._node(i) if i < tree._ends[parent_index] else None
+
+    @property
+    def preceding_siblings(self):
+        tree = self._tree
+        parent_index = tree._parents[self._index]
+        if parent_index < 0:
+            return ()
+
+        return tuple(tree._node(i) for i in tree._iterchildren(parent_index)
+                     if i < self._index)
+
+    @property
+    def previous_sibling(self):
+        tree = self._tree
+        if tree._previous is None:
+            tree._index_siblings()
+
+        i = tree._previous[self._index]
+        return tree._node(i) if i >= 0 else None
+
+    @property
+    def parent(self):
+        parent_index = self._tree._parents[self._index]
+        if parent_index < 0:
+            return None
+
+        return self._tree._node(parent_index)
+
+    @property
+    def subtree_end(self):
+        return self._tree._ends[self._index]
+
+    @property
+    def tag(self):
+        tree = self._tree
+        return tree._tags[tree._tag_ids[self._index]]
+
+class FlatThruNode(FlatNode):
+    """
+    ATTRIBUTES:
+      * children (read-only)
+      * has_children (read-only)
+      * is_end (read-only)
+    """
+    __slots__ = ()
+
+    @property
+    def children(self):
+        tree = self._tree
+        return tuple(tree._node(i) for i in tree._iterchildren(self._index))
+
+    @property
+    def has_children(self):
+        return self._tree._ends[self._index] > self._index + 1
+
+    @property
+    def is_end(self):
+        return False
+
+class FlatEndNode(FlatNode):
+    """
+    ATTRIBUTES:
+      * has_children (read-only)
+      * is_end (read-only)
+      * word (read-only)
+    """
+    __slots__ = ()
+
+    @property
+    def has_children(self):
+        return False
+
+    @property
+    def is_end(self):
+        return True
+
+    @property
+    def word(self):
+        tree = self._tree
+        return tree._words[tree._word_ids[self._index]]
+
+ParseTreeNode.register(FlatThruNode)
+ParseTreeNode.register(FlatEndNode)
+
+class FlatParseTree(ParseTree):
+    """
+    Array-backed ParseTree. Has the same attributes, methods and search flags
+    as ParseTree, but nodes are FlatThruNode/FlatEndNode views.
+
+    Node i (in preorder, TOP is node 0) is described by:
+      * _tag_ids[i]  - Index of its tag in _tags
+      * _word_ids[i] - Index of its word in _words, or -1 for thru-nodes
+      * _parents[i]  - Index of its parent, or -1 for TOP
+      * _ends[i]     - Index one past the last node of its subtree, so its
+                       descendants are exactly the nodes i+1 ... _ends[i]-1
+      * _depths[i]   - Number of ancestors
+      * _positions[i] - Position among its parent's children (0 for TOP)
+      * _previous[i] - Index of its previous sibling, or -1 if none
+
+    _positions and _previous are None until filled by _index_siblings.
+    """
+    def __init__(self, lines, index_policy=1, single_pass=True,
+                 cache_end_nodes=None):
+        """
+        Expects list of strings 'lines' that represent a tree as given in a
+        .parse file, or the tree's notation as a single string.
+
+        End node indices are always stored, searches always compare each
+        distinct tag once, and the tree is always built in a single pass;
+        index_policy, single_pass and the deprecated cache_end_nodes are
+        accepted only so FlatParseTree can be used anywhere ParseTree is.
+        """
+        index_policy = self._deprecated_index_policy(index_policy,
+                                                     cache_end_nodes)
+        self._init_attributes(self.join_lines(lines), index_policy)
+
+        self._build_from_notation(self.treebank_notation)
+        self._finish_build()
+
+    def classify_end_nodes(self, classify, parent_match=None):
+        # As in searches, parent_match is evaluated once per distinct tag,
+        # and classify once per distinct (tag, word) pair.
+        parent_ok = self._match_tags(parent_match)
+        tag_ids = self._tag_ids
+        word_ids = self._word_ids
+        parents = self._parents
+        tags = self._tags
+        words = self._words
+        keys = {}
+        groups = {}
+
+        for i in self._end_indices:
+            if parent_ok[tag_ids[parents[i]]]:
+                pair = (tag_ids[i], words[word_ids[i]])
+                try:
+                    key = keys[pair]
+                except KeyError:
+                    key = keys[pair] = classify(tags[pair[0]], pair[1])
+
+                if key is not None:
+                    groups.setdefault(key, []).append(FlatEndNode(self, i))
+
+        return groups
+
+    def iterendnodes(self):
+        """
+        Yield each end node of tree in order of depth-first traversal.
+        """
+        return (FlatEndNode(self, i) for i in self._end_indices)
+
+    def iternodes(self, node=None, order=0, max_depth=None):
+        """
+        Same as ParseTree.iternodes. Preorder traversal is a scan of the
+        node arrays; other orders use the ParseTree implementation.
+        """
+        if not order == self.PREORDER:
+            return super().iternodes(node, order, max_depth)
+
+        start = 0 if node is None else node.index
+
+        if max_depth is None:
+            return (self._node(i) for i in range(start, self._ends[start]))
+        return (self._node(i) for i in self._iter_preorder_indices(start,
+                                                                   max_depth))
+
+    def lowest_common_ancestor(self, node, *others):
+        ids = [other._index for other in others]
+        i = node._index
+        low = min(ids, default=i)
+        high = max(ids, default=i)
+        parents = self._parents
+        ends = self._ends
+
+        while not i <= low or not high < ends[i]:
+            i = parents[i]
+
+        return self._node(i)
+
+    def node_at(self, key):
+        if isinstance(key, int):
+            if not 0 <= key < len(self._parents):
+                raise IndexError('Tree has no node {0}.'.format(key))
+
+            return self._node(key)
+
+        index = 0
+        for position in key:
+            child = -1
+            if position >= 0:
+                for child in self._iterchildren(index):
+                    if not position:
+                        break
+                    position -= 1
+                else:
+                    child = -1
+
+            if child < 0:
+                raise IndexError(
+                    'Tree has no node at address {0}.'.format(tuple(key))
+                )
+            index = child
+
+        return self._node(index)
+
+    def _build_from_notation(self, notation):
+        """
+        Fill the node arrays from the single string 'notation.' Follows the
+        same rules as ParseTree._build_from_notation.
+        """
+        add_node = self._init_arrays()
+        tag_ids = self._tag_ids
+        ends = self._ends
+        end_indices = self._end_indices
+        words = self._words
+
+        node = add_node('TOP', -1, -1)
+        stack = []
+        for match in tree_token_pattern.finditer(notation):
+            kind = match.lastgroup
+
+            if kind == 'end':
+                words.append(match.group('word').strip('-{}'))
+                i = add_node(match.group('endtag'), len(words) - 1, node)
+                ends[i] = i + 1
+                end_indices.append(i)
+            elif kind == 'thru':
+                stack.append(node)
+                tag = match.group('thrutag')
+                if not tag == 'TOP':
+                    node = add_node(tag, -1, node)
+            elif kind == 'close':
+                if not stack:
+                    self._raise_construction_error(notation, match.start(),
+                        "Unmatched closing parenthesis."
+                    )
+                ends[node] = len(tag_ids)
+                node = stack.pop()
+            elif kind == 'error':
+                self._raise_construction_error(notation, match.start(),
+                    "No tag opening or close found."
+                )
+
+        # Close any nodes left open, as well as TOP
+        for i in stack + [node, 0]:
+            ends[i] = len(tag_ids)
+
+    def _build_from_preorder(self, tags, child_counts, words):
+        """See ParseTree.from_preorder()."""
+        self._init_arrays()
+        tag_lookup = self._tag_lookup
+        for tag in tags:
+            if tag not in tag_lookup:
+                tag_lookup[tag] = len(tag_lookup)
+        self._tags = list(tag_lookup)
+        self._words = list(words)
+
+        n = len(tags)
+        self._tag_ids = array('i', [tag_lookup[tag] for tag in tags])
+        word_ids = self._word_ids = array('i', [-1])*n
+        parents = self._parents = array('i', [-1])*n
+        ends = self._ends = array('i', [n])*n
+        depths = self._depths = array('i', [0])*n
+        end_indices = self._end_indices
+
+        # Each entry is [index, number of its children not yet added]
+        stack = [[0, child_counts[0]]]
+        for i in range(1, n):
+            while not stack[-1][1] and len(stack) > 1:
+                ends[stack.pop()[0]] = i
+
+            parent = stack[-1]
+            parent[1] -= 1
+            parents[i] = parent[0]
+            depths[i] = len(stack)
+
+            count = child_counts[i]
+            if count < 0:
+                word_ids[i] = len(end_indices)
+                ends[i] = i + 1
+                end_indices.append(i)
+            elif count:
+                stack.append([i, count])
+            else:
+                ends[i] = i + 1
+
+    def _end_tags_and_words(self):
+        # Words are stored in end node order, one per end node.
+        tags = self._tags
+        tag_ids = self._tag_ids
+        return [tags[tag_ids[i]] for i in self._end_indices], self._words
+
+    def _finish_build(self):
+        self._positions = None
+        self._previous = None
+        self.top = self._node(0)
+
+    def _index_siblings(self):
+        """
+        Fill _positions and _previous from _parents. Called on the first
+        use of either, as most trees are analyzed without them and the pass
+        would add about 15% to the time taken to build a tree.
+        """
+        parents = self._parents
+        n = len(parents)
+        positions = self._positions = array('i', [0])*n
+        previous = self._previous = array('i', [-1])*n
+
+        # last[p] is the index of the last child of p seen so far
+        last = [-1]*n
+        for i in range(1, n):
+            parent = parents[i]
+            sibling = last[parent]
+
+            if sibling >= 0:
+                previous[i] = sibling
+                positions[i] = positions[sibling] + 1
+            last[parent] = i
+
+    def _init_arrays(self):
+        """
+        Create empty node arrays and return function add_node(tag, word_id,
+        parent) that appends a node to them and returns its index.
+        """
+        tag_ids = self._tag_ids = array('i')
+        word_ids = self._word_ids = array('i')
+        parents = self._parents = array('i')
+        ends = self._ends = array('i')
+        depths = self._depths = array('i')
+        self._end_indices = array('i')
+        self._words = []
+        tags = self._tags = []
+        tag_lookup = self._tag_lookup = {}
+
+        def add_node(tag, word_id, parent):
+            try:
+                tag_id = tag_lookup[tag]
+            except KeyError:
+                tag_id = tag_lookup[tag] = len(tags)
+                tags.append(tag)
+
+            tag_ids.append(tag_id)
+            word_ids.append(word_id)
+            parents.append(parent)
+            ends.append(0)
+            depths.append(depths[parent] + 1 if parent >= 0 else 0)
+
+            return len(tag_ids) - 1
+
+        return add_node
+
+    def _iter_preorder_indices(self, start, max_depth):
+        """
+        Yield indices of the subtree rooted at 'start' in preorder, skipping
+        the subtrees of nodes max_depth levels below 'start.'
+        """
+        ends = self._ends
+        depths = self._depths
+        limit = depths[start] + max_depth
+        end = ends[start]
+        i = start
+
+        while i < end:
+            yield i
+            i = ends[i] if depths[i] >= limit else i + 1
+
+    def _iterchildren(self, index):
+        """Yield the index of each child of node 'index.'"""
+        ends = self._ends
+        end = ends[index]
+        child = index + 1
+
+        while child < end:
+            yield child
+            child = ends[child]
+
+    def _match_tags(self, match):
+        """
+        Return list giving, for each tag id, whether 'match' accepts that
+        tag. Every tag is accepted if match is None.
+        """
+        if match is None:
+            return [True]*len(self._tags)
+
+        return [bool(match(tag)) for tag in self._tags]
+
+    def _node_tags(self, ids):
+        tags = self._tags
+        tag_ids = self._tag_ids
+        return [tags[tag_ids[i]] for i in ids]
+
+    def _node_words(self, ids):
+        words = self._words
+        word_ids = self._word_ids
+        return [words[word_ids[i]] if word_ids[i] >= 0 else None
+                for i in ids]
+
+    def _parent_ids(self, ids):
+        parents = self._parents
+        return [parents[i] for i in ids]
+
+    def _sibling_positions(self, ids):
+        if self._positions is None:
+            self._index_siblings()
+        positions = self._positions
+
+        return [positions[i] for i in ids]
+
+    def _tag_intervals(self, match):
+        tag_ok = self._match_tags(match)
+        tag_ids = self._tag_ids
+        ends = self._ends
+
+        return [(i, ends[i]) for i in range(len(tag_ids))
+                if tag_ok[tag_ids[i]]]
+
+    def _word_node_ids(self, match):
+        words = self._words
+        word_ids = self._word_ids
+
+        return [i for i in self._end_indices if match(words[word_ids[i]])]
+
+    def _node(self, index):
+        """Return a view of node 'index.'"""
+        if self._word_ids[index] < 0:
+            return FlatThruNode(self, index)
+
+        return FlatEndNode(self, index)
+
+    def _search_all_nodes(self, query):
+        # Matches are evaluated once per distinct tag rather than once per
+        # node, then each node is checked by its tag id.
+        tag_ok = self._match_tags(query.tag_match)
+        parent_ok = self._match_tags(query.parent_match)
+        check_parent = query.parent_match is not None
+
+        tag_ids = self._tag_ids
+        parents = self._parents
+        results = []
+
+        for i in range(len(tag_ids)):
+            if tag_ok[tag_ids[i]]:
+                if not check_parent:
+                    results.append(self._node(i))
+                elif parents[i] >= 0 and parent_ok[tag_ids[parents[i]]]:
+                    results.append(self._node(i))
+
+        return results
+
+    def _search_end_nodes(self, query):
+        """
+        Search only end nodes. Should be called only when a search query
+        provides a 'word' attribute.
+        """
+        tag_ok = self._match_tags(query.tag_match)
+        parent_ok = self._match_tags(query.parent_match)
+        word_match = query.word_match
+
+        tag_ids = self._tag_ids
+        word_ids = self._word_ids
+        parents = self._parents
+        words = self._words
+        results = []
+
+        for i in self._end_indices:
+            if (tag_ok[tag_ids[i]]
+                and parent_ok[tag_ids[parents[i]]]
+                and (word_match is None or word_match(words[word_ids[i]]))
+            ):
+                results.append(FlatEndNode(self, i))
+
+        return results
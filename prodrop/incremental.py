@@ -0,0 +1,183 @@
+"""
+incremental.py
+Author: Adam Beagle
+
+PURPOSE:
+    Keeps the partial result of each .parse file of an analysis in a store
+    directory, keyed by the file's content hash, so that later runs analyze
+    only the files that are new or have changed since and merge the stored
+    results of the rest. The time taken after a small change to a corpus
+    depends on the size of the change, not of the corpus.
+
+DESCRIPTION:
+    The store holds, for each kind of analyzer and set of analysis options
+    (see BaseAnalyzer.get_analysis_options), whose SHA-1 digest is <options>:
+      * <AnalyzerClass>.v<STORE_VERSION>.<options>.manifest.json - a
+        corpus.CorpusManifest of the files analyzed by the last run,
+        recording the size, modification time and SHA-1 hash of each.
+      * <hash>.<AnalyzerClass>.v<STORE_VERSION>.<options>.result - the
+        results.AnalysisResult of every file with that content, saved with
+        AnalysisResult.save.
+
+    A file whose size and modification time match the manifest keeps its
+    recorded hash, so unchanged files are not even read; any other file is
+    hashed. Files with a stored result for their hash are not analyzed.
+    Results of files no longer in the corpus are deleted, and the results
+    of all current files are merged in corpus order, so the merged result
+    is identical to that of a full run.
+
+    Results depend only on the content of a file, the analyzer class and
+    its analysis options, e.g. allowed_verb_tags, so changing the options
+    analyzes every file again. Clear the store (or raise STORE_VERSION) if
+    the analysis itself changes.
+
+USAGE:
+    analyzer = CombinedAnalyzer('path/to/parsefiles/')
+    report = run_incremental(analyzer, '../results_store/')
+    analyzer.print_report_basic()
+    report.write_report(sys.stdout)
+"""
+from hashlib import sha1
+import json
+import os
+from os.path import basename, isdir, join, relpath
+
+from corpus import CorpusFile, CorpusManifest, file_hash
+from exceptions import ManifestError, ResultFileError
+from results import FailureRecord
+from scheduler import analyze_files
+
+# Increment whenever results stored by earlier versions become invalid.
+STORE_VERSION = 2
+
+class IncrementalReport:
+    """
+    What an incremental run did.
+
+    ATTRIBUTES:
+      * analyzed - List of paths of files analyzed (new or changed).
+      * hashed - Number of files whose contents were hashed.
+      * removed - List of paths of files dropped since the last run.
+      * reused - Number of files whose stored result was used.
+
+    METHODS:
+      * write_report
+    """
+    def __init__(self):
+        self.analyzed = []
+        self.hashed = 0
+        self.removed = []
+        self.reused = 0
+
+    def write_report(self, out):
+        """Write a summary of the run to 'out.'"""
+        out.write('{0} file(s) analyzed, {1} reused, {2} removed '
+                  '({3} hashed)\n'.format(len(self.analyzed), self.reused,
+                                          len(self.removed), self.hashed))
+
+def run_incremental(analyzer, store_dir, workers=1):
+    """
+    Set the result of 'analyzer' to the merged result of each of its files,
+    analyzing (in up to 'workers' processes) only those with no result in
+    the directory 'store_dir,' which is created if needed. Return
+    IncrementalReport.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    key = '{0}.v{1}.{2}'.format(type(analyzer).__name__, STORE_VERSION,
+                                _options_digest(analyzer))
+    manifest_path = join(store_dir, key + '.manifest.json')
+    report = IncrementalReport()
+
+    try:
+        previous = CorpusManifest.load(manifest_path).files
+    except (OSError, ManifestError):
+        previous = []
+    known = {f.path : f for f in previous}
+
+    files = [_corpus_file(path, analyzer.input_path, known.get(path))
+             for path in analyzer.get_filepaths()]
+
+    result_class = type(analyzer.result)
+    partials = {}
+    missing = []
+    for f in files:
+        if f.hash is None:
+            f.hash = file_hash(f.path)
+            report.hashed += 1
+
+        try:
+            partials[f.path] = _relabel(
+                result_class.load(_result_path(store_dir, f.hash, key)),
+                f.path)
+            report.reused += 1
+        except (OSError, ResultFileError):
+            missing.append(f)
+
+    for f, result in zip(missing, analyze_files(
+            analyzer, [f.path for f in missing], workers)):
+        result.save(_result_path(store_dir, f.hash, key))
+        partials[f.path] = result
+        report.analyzed.append(f.path)
+
+    # Results of files that are gone, unless their content is still present
+    # under another path.
+    current_hashes = {f.hash for f in files}
+    current_paths = {f.path for f in files}
+    for f in previous:
+        if not f.path in current_paths:
+            report.removed.append(f.path)
+        if not f.hash in current_hashes:
+            try:
+                os.remove(_result_path(store_dir, f.hash, key))
+            except OSError:
+                pass
+
+    analyzer.result = result_class()
+    for f in files:
+        analyzer.result.merge(partials[f.path])
+
+    CorpusManifest(analyzer.input_path, files).save(manifest_path)
+
+    return report
+
+def _corpus_file(path, root, previous):
+    """
+    Return CorpusFile of the file 'path' under 'root,' with the hash of the
+    CorpusFile 'previous' (which may be None) if the file is unchanged since
+    it was recorded, or no hash otherwise.
+    """
+    stat = os.stat(path)
+
+    if isdir(root):
+        rel = relpath(path, root).replace(os.sep, '/')
+    else:
+        rel = basename(path)
+
+    f = CorpusFile(path, rel, stat.st_size, stat.st_mtime_ns)
+    if (previous is not None and previous.size == f.size
+            and previous.mtime_ns == f.mtime_ns):
+        f.hash = previous.hash
+
+    return f
+
+def _options_digest(analyzer):
+    """Return SHA-1 hex digest of the analysis options of 'analyzer.'"""
+    options = json.dumps(analyzer.get_analysis_options(), sort_keys=True)
+    return sha1(options.encode('utf8')).hexdigest()
+
+def _relabel(result, filepath):
+    """
+    Return 'result' with the FailureRecords of its failure_trees given
+    'filepath,' as a stored result may have been saved for another file
+    with the same contents.
+    """
+    for failures in result.failure_tree_sets():
+        relabeled = {FailureRecord(filepath, r.ordinal, r.offset, r.node_path)
+                     for r in failures}
+        failures.clear()
+        failures.update(relabeled)
+
+    return result
+
+def _result_path(store_dir, content_hash, key):
+    return join(store_dir, '{0}.{1}.result'.format(content_hash, key))
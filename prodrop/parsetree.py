@@ -7,33 +7,84 @@ PURPOSE:
     easy navigation and searching.
 """
 from abc import ABCMeta, abstractmethod
+from bisect import bisect_right
+from collections import deque
 import re
+from sys import intern
+import warnings
 
 from exceptions import (CustomCallableError, SearchFlagError,
-    TreeConstructionError
+    TraversalOrderError, TreeConstructionError
 )
 
 # Regex patterns for building from .parse files.
 # Placed here so they are available to tests.
 thrunode_pattern = r'^\((?P<tag>\S+) \('
 endnode_pattern = r'^\((?P<tag>\S+) (?P<word>[^\s()]+)\)'
+
+# Single scanner used by the single-pass builder. Each match is exactly one
+# token; the name of the outermost matched group gives its kind. Anything
+# that is not a token or whitespace/BOM falls through to the 'error' group.
+tree_token_pattern = re.compile(r"""
+      (?P<close>\))
+    | (?P<thru>\((?P<thrutag>\S+)\ (?=\())
+    | (?P<end>\((?P<endtag>\S+)\ (?P<word>[^\s()]+)\))
+    | (?P<skip>[\s\ufeff]+)
+    | (?P<error>.)
+""", re.VERBOSE | re.DOTALL)
     
 class ParseTreeNode(metaclass=ABCMeta):
     """
     ATTRIBUTES:
+      * following_siblings (read-only) - Tuple of the siblings after the
+                                         node, in order.
+      * gorn_address (read-only) - Tuple of the position of the node among
+                                   its parent's children and of each of its
+                                   ancestors but TOP, TOP's child first; ()
+                                   for TOP.
       * has_children (abstract, read-only)
+      * index_in_parent (read-only) - Position of the node in its parent's
+                                      children, or None for TOP.
       * is_end (abstract, read-only)
+      * next_sibling (read-only) - Sibling after the node, or None.
+      * node_id (read-only) - Position of the node in the preorder
+                              traversal of its tree (TOP is 0), or None if
+                              the node was not built by a ParseTree.
       * parent (read-only)
+      * preceding_siblings (read-only) - Tuple of the siblings before the
+                                         node, in order.
+      * previous_sibling (read-only) - Sibling before the node, or None.
+      * subtree_end (read-only) - One past the node_id of the last node of
+                                  the node's subtree, so its descendants
+                                  are exactly the nodes with ids node_id+1
+                                  ... subtree_end-1.
       * tag
+
+    METHODS:
+      * is_ancestor_of
+      * is_descendant_of
+
+    Nodes use __slots__ rather than an instance __dict__, and tags are
+    interned, as a corpus held in memory may contain millions of nodes.
+
+    The position of each node in its parent is stored when it is added, so
+    sibling navigation never scans the parent's children. A tree's nodes are
+    given their node_id as they are built, and thru-nodes their
+    subtree_end as they are closed; see ParseTree.node_at(). Ancestry is
+    then a comparison of ids, whatever the depth of the tree.
     """
-    def __init__(self, parent, tag):
+    __slots__ = ('tag', '_id', '_parent', '_position')
+
+    def __init__(self, parent, tag, node_id=None):
         """
         Any new node is automatically added to parent's children
-        attribute.
+        attribute. node_id is given by the tree building the node.
         """
-        self.tag = tag
+        self.tag = intern(tag)
+        self._id = node_id
 
-        # Ensure valid parent, add self to parent's children list
+        # Ensure valid parent, add self to parent's children list, which
+        # sets its position
         if parent is not None:
             try:
                 parent.add_child(self)
@@ -41,9 +92,29 @@ class ParseTreeNode(metaclass=ABCMeta):
                 raise TypeError("'parent' expects instance of " +
                     "ParseTreeThruNode. Got: {0}".format(parent)
                 )
+        else:
+            self._position = None
 
         self._parent = parent
             
+    @property
+    def following_siblings(self):
+        if self._parent is None:
+            return ()
+
+        return self._parent.children[self._position + 1:]
+
+    @property
+    def gorn_address(self):
+        address = []
+        node = self
+        while node._parent is not None:
+            address.append(node._position)
+            node = node._parent
+        address.reverse()
+
+        return tuple(address)
+
     @property
     @abstractmethod
     def has_children(self):
@@ -52,12 +123,66 @@ class ParseTreeNode(metaclass=ABCMeta):
         Effectively checks whether a node is a thru-node.
         """
         pass
+
+    @property
+    def index_in_parent(self):
+        return self._position
+
+    def is_ancestor_of(self, other):
+        """
+        Return True if this node is a proper ancestor of the node 'other'
+        of the same tree, False otherwise.
+        """
+        return self._id < other.node_id < self.subtree_end
+
+    def is_descendant_of(self, other):
+        """
+        Return True if this node is a proper descendant of the node 'other'
+        of the same tree, False otherwise.
+        """
+        return other.node_id < self._id < other.subtree_end
         
     @property
     @abstractmethod
     def is_end(self):
         """Return True if node is end node, False otherwise."""
         pass
+
+    @property
+    def next_sibling(self):
+        if self._parent is None:
+            return None
+
+        siblings = self._parent.children
+        position = self._position + 1
+        return siblings[position] if position < len(siblings) else None
+
+    @property
+    def node_id(self):
+        return self._id
+
+    @property
+    def preceding_siblings(self):
+        if self._parent is None:
+            return ()
+
+        return self._parent.children[:self._position]
+
+    @property
+    def previous_sibling(self):
+        if not self._position:
+            return None
+
+        return self._parent.children[self._position - 1]
+
+    @property
+    @abstractmethod
+    def subtree_end(self):
+        """
+        Return one past the node_id of the last node of the subtree rooted
+        at this node, or None if the node was not built by a ParseTree.
+        """
+        pass
     
     # Parent must be read-only because reassigning it would break the
     # structure of the tree, as the original parent's children would still
@@ -72,23 +197,45 @@ class ParseTreeThruNode(ParseTreeNode):
       * children (read-only)
       * has_children (read-only)
       * is_end (read-only)
+      * subtree_end (read-only)
       
     METHODS:
       * add_child
+      * freeze
+
+    Children are accumulated in a list while the tree is built, and frozen
+    into a tuple by freeze(). Reading 'children' freezes the node if that
+    has not already happened, so 'children' is always a tuple.
     """
-    def __init__(self, parent, tag):
-        super().__init__(parent, tag)
-        self._children = ()
+    __slots__ = ('_children', '_end')
+
+    def __init__(self, parent, tag, node_id=None):
+        super().__init__(parent, tag, node_id)
+        self._children = []
+        self._end = None
         
     def add_child(self, child):
         if not isinstance(child, ParseTreeNode):
             raise TypeError('Child must be instance of parsetree.' +
                             'ParseTreeNode. Got: {0}'.format(child))
-        
-        self._children += (child, )
+
+        # Thaw a frozen node; it is re-frozen on the next read of children.
+        if self._children.__class__ is tuple:
+            self._children = list(self._children)
+
+        child._position = len(self._children)
+        self._children.append(child)
+
+    def freeze(self):
+        """Store children as a tuple. No-op if already frozen."""
+        if self._children.__class__ is list:
+            self._children = tuple(self._children)
         
     @property
     def children(self):
+        if self._children.__class__ is list:
+            self._children = tuple(self._children)
+
         return self._children
         
     @property
@@ -98,16 +245,23 @@ class ParseTreeThruNode(ParseTreeNode):
     @property
     def is_end(self):
         return False
+
+    @property
+    def subtree_end(self):
+        return self._end
     
 class ParseTreeEndNode(ParseTreeNode):
     """
     ATTRIBUTES:
       * has_children (read-only)
       * is_end (read-only)
+      * subtree_end (read-only)
       * word
     """
-    def __init__(self, parent, tag, word):
-        super().__init__(parent, tag)
+    __slots__ = ('word',)
+
+    def __init__(self, parent, tag, word, node_id=None):
+        super().__init__(parent, tag, node_id)
         self.word = word
         
     @property
@@ -118,6 +272,10 @@ class ParseTreeEndNode(ParseTreeNode):
     def is_end(self):
         return True
 
+    @property
+    def subtree_end(self):
+        return None if self._id is None else self._id + 1
+
 class ParseTree:
     """
     Defines a syntactic parse tree built from Penn Treebank bracketed notation
@@ -129,14 +287,26 @@ class ParseTree:
     
     ATTRIBUTES:
       * sentence
+      * source - (filepath, ordinal, offset) of the tree in the .parse file
+                 it was read from, as set by util.itertrees, or None. See
+                 results.FailureRecord.
       * top - The top-level tree node. This will always have the tag 'TOP'
       * treebank_notation - The Penn Treebank bracketed notation from which
                             the tree was built.
       
     METHODS:
+      * classify_end_nodes
+      * compile_query
+      * from_preorder (classmethod)
+      * get_sentence
+      * get_siblings
       * iterendnodes
       * iternodes
+      * join_lines (staticmethod)
+      * lowest_common_ancestor
+      * node_at
       * search
+      * to_preorder
 
     SEARCH FLAGS
     =========================================================================
@@ -177,6 +347,42 @@ class ParseTree:
 
     STARTSWITH  - Search phrase, exactly as written, appears at the start of
                   the attribute.
+
+    For ancestor_tag and descendant_tag, a flag describes the condition on
+    the tag of a single ancestor or descendant, at least one of which must
+    satisfy it; except IS_NOT and NOT_REMATCH, which succeed when NO
+    ancestor (or descendant) is equal to, or matched by, the search phrase.
+    An ancestor_tag of 'VP' with the flag NOT_REMATCH, for instance, finds
+    the nodes that are not within any VP.
+
+    TRAVERSAL ORDERS
+    =========================================================================
+    The following may be passed as 'order' to ParseTree.iternodes().
+
+    PREORDER      - Each node before its children, children left to right.
+                    This is the default.
+
+    POSTORDER     - Each node after its children, children left to right.
+
+    BREADTH_FIRST - Each level of the tree in turn, left to right.
+
+    INDEXING POLICIES
+    =========================================================================
+    The following may be passed as 'index_policy' to the constructor.
+
+    INDEX_NONE      - Nothing is cached; every search scans the tree.
+
+    INDEX_END_NODES - End nodes are cached when the tree is built, which
+                      GREATLY increases the speed of searches involving 'word'
+                      attributes. This is the default.
+
+    INDEX_FULL      - As INDEX_END_NODES. In addition, a ParseTreeIndex
+                      (tag -> nodes, word -> end nodes, parent tag -> nodes)
+                      is built on the first search that can use it. EXACT and
+                      STARTSWITH constraints on tag, word and parent_tag are
+                      then resolved by dictionary lookups and set intersection
+                      rather than a scan. Worthwhile when several searches are
+                      run on each tree.
     """
     # WARNING: EXACT must remain 0 to remain default.
     EXACT = 0
@@ -186,45 +392,99 @@ class ParseTree:
     CUSTOM = 4
     IS_NOT = 5
     NOT_REMATCH = 6
+
+    # Traversal orders
+    # WARNING: PREORDER must remain 0 to remain default.
+    PREORDER = 0
+    POSTORDER = 1
+    BREADTH_FIRST = 2
+
+    # Indexing policies
+    # WARNING: Must remain 0 and 1 so boolean values passed by code written
+    # for the former 'cache_end_nodes' switch keep their meaning.
+    INDEX_NONE = 0
+    INDEX_END_NODES = 1
+    INDEX_FULL = 2
     
-    def __init__(self, lines, cache_end_nodes=True):
+    def __init__(self, lines, index_policy=1, single_pass=True,
+                 cache_end_nodes=None):
         """
         Expects list of strings 'lines' that represent a tree as given in a
-        .parse file.
+        .parse file, or the tree's notation as a single string.
+
+        index_policy is one of the indexing policy constants documented in
+        the docstring of this class. cache_end_nodes, its former boolean
+        form, is deprecated; if given, it sets index_policy to
+        INDEX_END_NODES or INDEX_NONE. Caching of end nodes (INDEX_END_NODES)
+        is on by default. The only reason to turn off caching is if you are
+        doing a single search per tree, or none of your searches involve the
+        'word' attribute (and even then the time difference to leave caching
+        on will be miniscule unless a corpus contains >10000 trees, in which
+        case it may add a few seconds of execution time).
 
-        Caching of end nodes is on by default. The speed of searches involving
-        'word' attributes is GREATLY increased with caching turned on. The only
-        reason to turn off caching is if you are doing a single search per
-        tree, or none of your searches involve the 'word' attribute (and even
-        then the time difference to leave caching on will be miniscule unless
-        a corpus contains >10000 trees, in which case it may add a few seconds
-        of execution time).
+        If single_pass is True (the default), the tree is built by scanning
+        treebank_notation once with tree_token_pattern. Otherwise the original
+        line-by-line builder is used. Both produce identical trees.
         """
-        self.top = None
-        self._end_nodes = []
-        
-        join_char = '' if lines[0][-1] == '\n' else '\n'
-        self.treebank_notation = join_char.join(lines)
+        index_policy = self._deprecated_index_policy(index_policy,
+                                                     cache_end_nodes)
+        self._init_attributes(self.join_lines(lines), index_policy)
 
-        self._build_from_lines(lines)
+        if single_pass:
+            self._build_from_notation(self.treebank_notation)
+        else:
+            if isinstance(lines, str):
+                lines = lines.split('\n')
+            self._build_from_lines(lines)
 
-        if cache_end_nodes:
-            self._end_nodes = tuple(self.iterendnodes())
+        self._finish_build()
+
+    def classify_end_nodes(self, classify, parent_match=None):
+        """
+        Return dict of key -> list of end nodes, in depth-first order,
+        grouping each end node by classify(tag, word), which returns a
+        hashable key or None to leave the node out. If parent_match is
+        given, only end nodes for which parent_match(parent's tag) is truthy
+        are classified.
+
+        Several searches of the end nodes can be done in one pass this way,
+        each node being tested once.
+        """
+        groups = {}
+
+        for node in self.iterendnodes():
+            if parent_match is None or parent_match(node.parent.tag):
+                key = classify(node.tag, node.word)
+                if key is not None:
+                    groups.setdefault(key, []).append(node)
+
+        return groups
+
+    @classmethod
+    def from_preorder(cls, notation, tags, child_counts, words,
+                      index_policy=1):
+        """
+        Return a tree built directly from the description of its nodes
+        returned by to_preorder(), without parsing. 'notation' is stored
+        as treebank_notation only.
+
+        Used to load trees that have already been parsed, e.g. from a
+        treecache file.
+        """
+        tree = cls.__new__(cls)
+        tree._init_attributes(notation, index_policy)
+        tree._build_from_preorder(tags, child_counts, words)
+        tree._finish_build()
+
+        return tree
 
     def get_siblings(self, node):
         """
         Yield each sibling of a node, i.e. other nodes that have the same
         parent.
         """
-        parent = node.parent
-
-        if parent is None:
-            return
-
-        if len(parent.children) > 1:
-            for child in parent.children:
-                if not child == node:
-                    yield child
+        yield from node.preceding_siblings
+        yield from node.following_siblings
         
     def iterendnodes(self):
         """
@@ -235,24 +495,144 @@ class ParseTree:
         else:
             return (node for node in self.iternodes() if node.is_end)
 
-    def iternodes(self, **kwargs):
+    def iternodes(self, node=None, order=0, max_depth=None):
         """
-        Yield each node during depth-first traversal of tree.
+        Yield each node of the subtree rooted at 'node' (self.top by default)
+        in the traversal order given by 'order,' one of the traversal order
+        constants documented in the docstring of this class. By default the
+        traversal is depth-first, yielding each node before its children.
+
+        If max_depth is not None, nodes more than max_depth levels below
+        'node' are not visited; max_depth=0 yields only 'node' itself.
+
+        The traversal uses an explicit stack (or queue), so its cost does
+        not depend on the depth of the tree.
         """
-        # node defaults to self.top when method called with no arguments
-        node = kwargs.get('node', self.top)
-        yield node
+        if node is None:
+            node = self.top
+
+        if order == self.PREORDER:
+            if max_depth is None:
+                return self._iter_preorder(node)
+            return self._iter_preorder_limited(node, max_depth)
+        elif order == self.POSTORDER:
+            return self._iter_postorder(node, max_depth)
+        elif order == self.BREADTH_FIRST:
+            return self._iter_breadth_first(node, max_depth)
 
-        if node.has_children:
-            for child in node.children:
-                for n in self.iternodes(node=child):
-                    yield n
+        raise TraversalOrderError(
+            'Invalid traversal order: {0}\n'.format(order) +
+            'Use the named constants in the ParseTree class (e.g. ' +
+            'ParseTree.PREORDER, ParseTree.POSTORDER) as orders.'
+        )
                     
+    @staticmethod
+    def join_lines(lines):
+        """
+        Return the treebank notation of a tree given as a list of lines, as
+        by a .parse file, or as a single string, which is returned as is.
+        """
+        if isinstance(lines, str):
+            return lines
+
+        join_char = '' if lines[0][-1] == '\n' else '\n'
+        return join_char.join(lines)
+
+    def lowest_common_ancestor(self, node, *others):
+        """
+        Return the lowest node that is, or is an ancestor of, 'node' and
+        each of 'others,' all nodes of this tree. A node is its own lowest
+        common ancestor with any of its descendants.
+
+        Each step up from 'node' is a comparison of node ids with the
+        subtree_end of the current node, so the cost is proportional to the
+        distance from 'node' to the result.
+        """
+        ids = [other.node_id for other in others]
+        low = min(ids, default=node.node_id)
+        high = max(ids, default=node.node_id)
+
+        while not node.node_id <= low or not high < node.subtree_end:
+            node = node.parent
+
+        return node
+
+    def to_preorder(self):
+        """
+        Return tuple (tags, child_counts, words) that fully describes the
+        nodes of the tree, for use with from_preorder(). The first two are
+        lists with an entry for each node, in depth-first order (TOP first);
+        child_counts is -1 for end nodes. words is the list of words of the
+        end nodes, in order.
+        """
+        tags = []
+        child_counts = []
+        words = []
+
+        for node in self.iternodes():
+            tags.append(node.tag)
+
+            if node.is_end:
+                child_counts.append(-1)
+                words.append(node.word)
+            else:
+                child_counts.append(len(node.children))
+
+        return tags, child_counts, words
+
+    def get_sentence(self, policy=None, cache=False):
+        """
+        Return the words of the tree joined by the SentencePolicy 'policy'
+        (DEFAULT_SENTENCE_POLICY if None). If 'cache' is True, the sentence
+        is kept, and returned by later calls with the same policy.
+        """
+        if policy is None:
+            policy = DEFAULT_SENTENCE_POLICY
+
+        try:
+            return self._sentences[policy]
+        except KeyError:
+            pass
+
+        sentence = policy.join(*self._end_tags_and_words())
+        if cache:
+            self._sentences[policy] = sentence
+
+        return sentence
+
     def iterwords(self):
         """
         Yield each word of the sentence in proper order.
         """
-        return (node.word for node in self.iterendnodes() if not node.tag == '-NONE-')
+        tags, words = self._end_tags_and_words()
+        return iter([word for tag, word in zip(tags, words)
+                     if tag != '-NONE-'])
+
+    def node_at(self, key):
+        """
+        Return the node given by 'key,' either its node_id or its
+        gorn_address (any sequence of child positions). Nodes are found by
+        id in constant time, once the first such lookup has listed them,
+        and by address in time proportional to their depth.
+
+        IndexError is raised if the tree has no such node.
+        """
+        if isinstance(key, int):
+            nodes = self._preorder_nodes()
+            if not 0 <= key < len(nodes):
+                raise IndexError('Tree has no node {0}.'.format(key))
+
+            return nodes[key]
+
+        node = self.top
+        for position in key:
+            if node.is_end or not 0 <= position < len(node.children):
+                raise IndexError(
+                    'Tree has no node at address {0}.'.format(tuple(key))
+                )
+            node = node.children[position]
+
+        return node
 
     # TODO Distinguish between None and empty string on tag/word/etc.?
     # It seems unintuitive from the user perspective that the default word is
@@ -270,34 +650,43 @@ class ParseTree:
         Flags are documented in the docstring of this class. If no flag is
         passed for an attribute, the default style of search is exact match.
 
+        Nodes may also be constrained by the tags of their ancestors and
+        descendants, with the named arguments ancestor_tag and ancestor_flag,
+        and descendant_tag and descendant_flag. These are checked against
+        the subtree_end of each node, in one pass over the tree however many
+        nodes match; see the SEARCH FLAGS section of the docstring of this
+        class for their meaning with negative flags.
+
         All searches are case-sensitive for the time being.
-        """
-        tagfunc = self._get_comparison_function(tag_flag, 'tag', **kwargs)
-        wordfunc = self._get_comparison_function(word_flag, 'word', **kwargs)
 
-        parent_tag = kwargs.get('parent_tag', '')
-        parent_flag = kwargs.get('parent_flag', 0)
-        parentfunc = self._get_comparison_function(parent_flag,
-            'parent', **kwargs
-        )
+        Patterns of REMATCH and NOT_REMATCH are compiled before the tree is
+        searched, so an invalid pattern raises re.error even if no node
+        would have reached the regular expression.
 
-        # If word exists, results can only come from end nodes.
-        # Similarly, if word_flag is CUSTOM or IS_NOT, it can be assumed the
-        # user intends to filter based on word (although the exact
-        # function/purpose of a custom callable can of course not be known).
-        if word or word_flag in (self.CUSTOM, self.IS_NOT):
-            return self._search_end_nodes(tag, tagfunc, word, wordfunc,
-                parent_tag, parentfunc
-            )
-        else:
-            return self._search_all_nodes(tag, tagfunc, parent_tag, parentfunc)
+        When the same search is run on many trees, use compile_query once
+        and call search on the returned Query instead.
+        """
+        return Query(tag, word, tag_flag, word_flag, **kwargs).search(self)
+
+    @staticmethod
+    def compile_query(tag='', word='', tag_flag=0, word_flag=0, **kwargs):
+        """
+        Return a Query that performs the search described by the arguments,
+        which are exactly those of search(), on any tree passed to its own
+        search method. Flags are resolved and regular expressions compiled
+        once, here, rather than on every call, so an invalid REMATCH or
+        NOT_REMATCH pattern raises re.error here, before any tree is
+        searched.
+        """
+        return Query(tag, word, tag_flag, word_flag, **kwargs)
 
     def _build_from_lines(self, lines):
         """
         Lines expects list of strings that may or may not end in a newline.
         """
         # Create top node
-        self.top = ParseTreeThruNode(None, 'TOP')
+        self.top = ParseTreeThruNode(None, 'TOP', 0)
+        node_count = 1
         
         # Build tree line by line
         node = self.top
@@ -307,6 +696,8 @@ class ParseTree:
             while stripped:
                 # If closing a tag, move up to parent and continue
                 if stripped[0] == ')':
+                    if not node.is_end:
+                        node._end = node_count
                     node = node.parent
                     stripped = stripped[1:]
                     continue
@@ -318,7 +709,8 @@ class ParseTree:
                 if match is not None:
                     tag = match.group('tag')
                     if not tag == 'TOP':
-                        node = ParseTreeThruNode(node, tag)
+                        node = ParseTreeThruNode(node, tag, node_count)
+                        node_count += 1
                     stripped = stripped[len(match.group()) - 1:]
                 else:
                     match = re.match(endnode_pattern, stripped)
@@ -330,41 +722,694 @@ class ParseTree:
                         )
                     
                     node = ParseTreeEndNode(node, 
-                        match.group('tag'), match.group('word').strip('-{}')
+                        match.group('tag'), match.group('word').strip('-{}'),
+                        node_count
                     )
+                    node_count += 1
                     stripped = stripped[len(match.group()) - 1:]
 
-    def _get_comparison_function(self, flag, attr_name, **kwargs):
+        # Close any nodes left open, as well as TOP
+        while node is not None:
+            if not node.is_end:
+                node._end = node_count
+            node = node.parent
+        self.top._end = node_count
+
+    def _build_from_preorder(self, tags, child_counts, words):
+        """
+        See from_preorder(). As the number of children of every node is
+        known, nodes are created without their constructors and appended
+        directly to their parents, and end nodes are collected as they are
+        created.
+        """
+        new_thru = ParseTreeThruNode.__new__
+        new_end = ParseTreeEndNode.__new__
+        words = iter(words)
+        end_nodes = []
+
+        parent = self.top = new_thru(ParseTreeThruNode)
+        parent.tag = intern(tags[0])
+        parent._id = 0
+        parent._end = len(tags)
+        parent._parent = None
+        parent._position = None
+        parent._children = []
+
+        # 'remaining' is the number of children of 'parent' not yet built;
+        # the stack holds the same pair for each open ancestor.
+        remaining = child_counts[0]
+        stack = []
+        for i in range(1, len(tags)):
+            while not remaining and stack:
+                parent._children = tuple(parent._children)
+                parent._end = i
+                parent, remaining = stack.pop()
+
+            count = child_counts[i]
+            if count < 0:
+                node = new_end(ParseTreeEndNode)
+                node.word = next(words)
+                end_nodes.append(node)
+            else:
+                node = new_thru(ParseTreeThruNode)
+                node._children = [] if count else ()
+                node._end = i + 1
+
+            node.tag = intern(tags[i])
+            node._id = i
+            node._parent = parent
+            node._position = len(parent._children)
+            parent._children.append(node)
+            remaining -= 1
+
+            if count > 0:
+                stack.append((parent, remaining))
+                parent, remaining = node, count
+
+        # Close any nodes left open; their subtrees end with the tree.
+        parent._children = tuple(parent._children)
+        parent._end = len(tags)
+        for node, remaining in stack:
+            node._children = tuple(node._children)
+            node._end = len(tags)
+
+        if self._index_policy:
+            self._end_nodes = tuple(end_nodes)
+
+    def _build_from_notation(self, notation):
+        """
+        Build tree from the single string 'notation' in one pass.
+
+        Tokens are read in order from tree_token_pattern, and an explicit
+        stack holds the open thru-nodes. TOP tags reuse self.top, the BOM
+        character is skipped, and words are stripped of '-{}' exactly as in
+        _build_from_lines.
+        """
+        self.top = ParseTreeThruNode(None, 'TOP', 0)
+
+        node = self.top
+        node_count = 1
+        end_nodes = []
+        stack = []
+        for match in tree_token_pattern.finditer(notation):
+            kind = match.lastgroup
+
+            if kind == 'end':
+                end_nodes.append(ParseTreeEndNode(node,
+                    match.group('endtag'), match.group('word').strip('-{}'),
+                    node_count
+                ))
+                node_count += 1
+            elif kind == 'thru':
+                stack.append(node)
+                tag = match.group('thrutag')
+                if not tag == 'TOP':
+                    node = ParseTreeThruNode(node, tag, node_count)
+                    node_count += 1
+            elif kind == 'close':
+                if not stack:
+                    self._raise_construction_error(notation, match.start(),
+                        "Unmatched closing parenthesis."
+                    )
+                node.freeze()
+                node._end = node_count
+                node = stack.pop()
+            elif kind == 'error':
+                self._raise_construction_error(notation, match.start(),
+                    "No tag opening or close found."
+                )
+
+        # Close any nodes left open, as well as TOP
+        for open_node in stack + [node, self.top]:
+            open_node._end = node_count
+
+        if self._index_policy:
+            self._end_nodes = tuple(end_nodes)
+
+    def _tag_intervals(self, match):
+        """
+        Return list of (node_id, subtree_end) of each node, in depth-first
+        order, whose tag is accepted by 'match.'
+        """
+        return [(node._id, node.subtree_end)
+                for node in self._preorder_nodes() if match(node.tag)]
+
+    def _node_tags(self, ids):
+        """Return list of the tag of each node of 'ids.'"""
+        nodes = self._preorder_nodes()
+        return [nodes[i].tag for i in ids]
+
+    def _node_words(self, ids):
+        """
+        Return list of the word of each node of 'ids,' or None for thru
+        nodes.
+        """
+        nodes = self._preorder_nodes()
+        return [nodes[i].word if nodes[i].is_end else None for i in ids]
+
+    def _parent_ids(self, ids):
+        """
+        Return list of the node_id of the parent of each node of 'ids,' or
+        -1 for TOP.
+        """
+        nodes = self._preorder_nodes()
+        return [nodes[i]._parent._id if i else -1 for i in ids]
+
+    def _sibling_positions(self, ids):
+        """
+        Return list of the index_in_parent of each node of 'ids,' or 0 for
+        TOP.
+        """
+        nodes = self._preorder_nodes()
+        return [nodes[i]._position if i else 0 for i in ids]
+
+    def _word_node_ids(self, match):
+        """
+        Return list of the node_id of each end node, in depth-first order,
+        whose word is accepted by 'match.'
+        """
+        return [node._id for node in self.iterendnodes() if match(node.word)]
+
+    def _preorder_nodes(self):
+        """
+        Return sequence of all nodes, indexed by node_id, listed on first
+        use.
+        """
+        if self._nodes is None:
+            self._nodes = tuple(self.iternodes())
+
+        return self._nodes
+
+    def _raise_construction_error(self, notation, pos, reason):
+        """
+        Raise TreeConstructionError for the segment of 'notation' starting at
+        index 'pos', reporting the segment and its whole line.
+        """
+        line_start = notation.rfind('\n', 0, pos) + 1
+        line_end = notation.find('\n', pos)
+        if line_end == -1:
+            line_end = len(notation)
+
+        raise TreeConstructionError("Unexpected tag situation. " +
+            "{0}\n".format(reason) +
+            "Segment: {0}\nLine: {1}\n".format(
+                notation[pos:line_end], notation[line_start:line_end]
+            )
+        )
+
+    def _init_attributes(self, notation, index_policy):
+        """Set attributes of a tree that has not yet been built."""
+        self.source = None
+        self.top = None
+        self.treebank_notation = notation
+        self._end_nodes = []
+        self._index = None
+        self._index_policy = index_policy
+        self._nodes = None
+        self._sentences = {}
+
+    @staticmethod
+    def _deprecated_index_policy(index_policy, cache_end_nodes):
+        """
+        Return the index policy given by the deprecated 'cache_end_nodes'
+        argument, with a DeprecationWarning, or 'index_policy' if it is
+        None.
+        """
+        if cache_end_nodes is None:
+            return index_policy
+
+        warnings.warn(
+            "cache_end_nodes is deprecated; use index_policy instead.",
+            DeprecationWarning, stacklevel=3
+        )
+        return int(bool(cache_end_nodes))
+
+    def _end_tags_and_words(self):
+        """Return lists of the tag and of the word of each end node."""
+        nodes = self._end_nodes or list(self.iterendnodes())
+        return [node.tag for node in nodes], [node.word for node in nodes]
+
+    def _iter_breadth_first(self, node, max_depth):
+        queue = deque(((node, 0), ))
+
+        while queue:
+            node, depth = queue.popleft()
+            yield node
+
+            if node.has_children and (max_depth is None or depth < max_depth):
+                depth += 1
+                queue.extend((child, depth) for child in node.children)
+
+    def _iter_postorder(self, node, max_depth):
+        # Each entry is (node, depth, expanded). A node is yielded when it is
+        # popped for the second time, i.e. after all of its children.
+        stack = [(node, 0, False)]
+
+        while stack:
+            node, depth, expanded = stack.pop()
+
+            if (expanded or not node.has_children
+                or (max_depth is not None and depth >= max_depth)
+            ):
+                yield node
+            else:
+                stack.append((node, depth, True))
+                depth += 1
+                stack.extend((child, depth, False)
+                             for child in reversed(node.children))
+
+    def _iter_preorder(self, node):
+        stack = [node]
+
+        while stack:
+            node = stack.pop()
+            yield node
+
+            if node.has_children:
+                stack.extend(reversed(node.children))
+
+    def _iter_preorder_limited(self, node, max_depth):
+        stack = [(node, 0)]
+
+        while stack:
+            node, depth = stack.pop()
+            yield node
+
+            if node.has_children and depth < max_depth:
+                depth += 1
+                stack.extend((child, depth)
+                             for child in reversed(node.children))
+
+    def _finish_build(self):
+        """Called after the tree is built to apply the indexing policy."""
+        if self._index_policy and not self._end_nodes:
+            self._end_nodes = tuple(self.iterendnodes())
+
+    def _get_candidates(self, query):
+        """
+        Return list of nodes, in depth-first order, that includes every node
+        matching 'query', using the ParseTreeIndex of this tree. Return None
+        if the tree is not fully indexed or the query cannot use the index.
         """
-        Return the comparison function for the attribute given by
-        'attr_name.' 
+        if (not self._index_policy == self.INDEX_FULL
+            or not query.index_keys
+        ):
+            return None
 
-        Each comparison function has the signature (phrase, attribute)
+        if self._index is None:
+            self._index = ParseTreeIndex(self)
+
+        return self._index.candidates(query.index_keys,
+                                      query.end_nodes_only)
+
+    def _search_all_nodes(self, query):
+        tag_match = query.tag_match
+        parent_match = query.parent_match
+        results = []
+
+        nodes = self._get_candidates(query)
+        if nodes is None:
+            nodes = self.iternodes()
+        
+        for node in nodes:
+            if tag_match is None or tag_match(node.tag):
+                if parent_match is None:
+                    results.append(node)
+                elif (node.parent is not None
+                      and parent_match(node.parent.tag)):
+                    results.append(node)
+
+        return results
+
+    def _search_end_nodes(self, query):
+        """
+        Search only end nodes. Should be called only when a search query
+        provides a 'word' attribute.
+        """
+        tag_match = query.tag_match
+        word_match = query.word_match
+        parent_match = query.parent_match
+        results = []
+
+        nodes = self._get_candidates(query)
+        if nodes is None:
+            nodes = self.iterendnodes()
+        
+        for node in nodes:
+            if ((tag_match is None or tag_match(node.tag))
+                and (word_match is None or word_match(node.word))
+                and (parent_match is None or parent_match(node.parent.tag))
+            ):
+                results.append(node)
+
+        return results
+
+    @property
+    def sentence(self):
         """
-        if flag == self.CUSTOM:
-            return self._get_custom_comparison_function(attr_name, **kwargs)
+        The words of the tree separated by spaces, except before
+        punctuation. See get_sentence() for other joining policies.
+        """
+        return self.get_sentence()
+
+class LazyParseTree:
+    """
+    Handle to a tree that is built only when first needed. Yielded by
+    util.itertrees when lazy is True, so a tree can be rejected by a test of
+    its treebank_notation alone (see SubjectVerbAnalyzer.prefilter) without
+    paying for its construction.
 
-        funcmap = {
-            self.EXACT : lambda phrase, s: phrase == s if phrase else True,
-            self.CONTAINS : lambda phrase, s: phrase in s,
-            self.STARTSWITH : lambda phrase, s: s.startswith(phrase),
-            self.REMATCH : lambda pattern, s: re.match(pattern, s),
-            self.NOT_REMATCH : lambda pattern, s : re.match(pattern, s) is None,
-            self.IS_NOT : lambda phrase, s: not phrase == s,
-        }
+    ATTRIBUTES:
+      * is_built (read-only) - True if the tree has been built.
+      * source - As for ParseTree, kept by the handle.
+      * tree (read-only) - The tree, an instance of tree_class, built on
+                           first access.
+      * treebank_notation
+
+    Any other attribute (top, search, iternodes, sentence, etc.) is read
+    from the tree, building it first if necessary, so a handle may be used
+    anywhere a tree is, including as the argument to Query.search.
+    """
+    __slots__ = ('source', 'treebank_notation', '_index_policy', '_lines',
+                 '_tree', '_tree_class')
 
+    def __init__(self, lines, index_policy=1, tree_class=ParseTree,
+                 cache_end_nodes=None):
+        """
+        Expects 'lines' as ParseTree does. The tree is built as by
+        tree_class(lines, index_policy). cache_end_nodes is deprecated, as
+        for ParseTree.
+        """
+        self.source = None
+        self.treebank_notation = ParseTree.join_lines(lines)
+        self._index_policy = ParseTree._deprecated_index_policy(
+            index_policy, cache_end_nodes)
+        self._lines = lines
+        self._tree = None
+        self._tree_class = tree_class
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the handle itself.
+        # Special names are not forwarded so protocols such as copy and
+        # pickle do not build the tree.
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        return getattr(self.tree, name)
+
+    @property
+    def is_built(self):
+        return self._tree is not None
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = self._tree_class(self._lines, self._index_policy)
+            self._lines = None
+
+        return self._tree
+
+class ParseTreeIndex:
+    """
+    Inverted index of a ParseTree, mapping tags, words and parent tags to the
+    positions of nodes in depth-first order. Built by ParseTree when its
+    index_policy is INDEX_FULL; not normally created directly.
+
+    STARTSWITH lookups are resolved by merging the position lists of every
+    distinct key with the given prefix. The merged lists (prefix buckets) are
+    kept, so repeated STARTSWITH searches are single lookups.
+
+    METHODS:
+      * candidates
+    """
+    def __init__(self, tree):
+        self.nodes = tree._preorder_nodes()
+        self._tables = {'tag' : {}, 'word' : {}, 'parent' : {}}
+        self._prefix_buckets = {}
+        self._end_positions = set()
+
+        tags = self._tables['tag']
+        words = self._tables['word']
+        parents = self._tables['parent']
+
+        for i, node in enumerate(self.nodes):
+            tags.setdefault(node.tag, []).append(i)
+
+            if node.is_end:
+                words.setdefault(node.word, []).append(i)
+                self._end_positions.add(i)
+
+            if node.parent is not None:
+                parents.setdefault(node.parent.tag, []).append(i)
+
+    def candidates(self, index_keys, end_nodes_only=False):
+        """
+        Return list of nodes, in depth-first order, that satisfy every
+        constraint in 'index_keys,' as given by Query.index_keys. If
+        end_nodes_only is set, only end nodes are returned.
+        """
+        position_lists = sorted(
+            (self._lookup(attr_name, flag, phrase)
+             for attr_name, flag, phrase in index_keys),
+            key=len
+        )
+
+        if len(position_lists) == 1 and not end_nodes_only:
+            positions = position_lists[0]
+        else:
+            # Intersect, starting from the smallest list
+            found = set(position_lists[0])
+            for other in position_lists[1:]:
+                found.intersection_update(other)
+            if end_nodes_only:
+                found.intersection_update(self._end_positions)
+            positions = sorted(found)
+
+        nodes = self.nodes
+        return [nodes[i] for i in positions]
+
+    def _lookup(self, attr_name, flag, phrase):
+        """Return sorted list of positions matching a single constraint."""
+        table = self._tables[attr_name]
+
+        if flag == ParseTree.EXACT:
+            return table.get(phrase, [])
+
+        key = (attr_name, phrase)
         try:
-            comparison_func = funcmap[flag]
+            return self._prefix_buckets[key]
         except KeyError:
-            raise SearchFlagError(
-                'Invalid flag passed for flag: {0}\n'.format(flag) +
-                'Use the named constants in the ParseTree class (e.g. ' +
-                'ParseTree.CONTAINS, ParseTree.EXACT) as flags.'
+            bucket = sorted(
+                i for k in table if k.startswith(phrase) for i in table[k]
             )
+            self._prefix_buckets[key] = bucket
+            return bucket
+
+class Query:
+    """
+    A ParseTree search whose flags have been resolved and whose regular
+    expressions have been compiled, so that it may be run against any number
+    of trees. Create with ParseTree.compile_query(), which accepts the same
+    arguments as ParseTree.search().
+
+    Each match attribute is a callable accepting the node attribute string
+    (the tag, word, or parent's tag) and returning a truthy value for a
+    match, or None if the search places no constraint on that attribute.
+    Ancestor and descendant constraints are applied to the nodes matching
+    the rest of the query, using the subtree_end of each node.
+
+    ATTRIBUTES:
+      * end_nodes_only (read-only)
+      * index_keys (read-only)
+      * parent_match (read-only)
+      * tag_match (read-only)
+      * word_match (read-only)
+
+    METHODS:
+      * search
+    """
+    def __init__(self, tag='', word='', tag_flag=0, word_flag=0, **kwargs):
+        """See ParseTree.search()."""
+        parent_tag = kwargs.get('parent_tag', '')
+        parent_flag = kwargs.get('parent_flag', 0)
+
+        self._tag_match = self._compile_match(tag, tag_flag, 'tag', kwargs)
+        self._word_match = self._compile_match(word, word_flag, 'word', kwargs)
+        self._parent_match = self._compile_match(parent_tag, parent_flag,
+                                                 'parent', kwargs)
+        self._ancestor_match, self._ancestor_negated = (
+            self._compile_relative_match('ancestor', kwargs))
+        self._descendant_match, self._descendant_negated = (
+            self._compile_relative_match('descendant', kwargs))
+
+        # If word exists, results can only come from end nodes.
+        # Similarly, if word_flag is CUSTOM or IS_NOT, it can be assumed the
+        # user intends to filter based on word (although the exact
+        # function/purpose of a custom callable can of course not be known).
+        self._end_nodes_only = bool(
+            word or word_flag in (ParseTree.CUSTOM, ParseTree.IS_NOT)
+        )
 
-        return comparison_func
+        # When searching all nodes, an empty parent_tag places no constraint
+        # on the parent, whatever the flag.
+        if not self._end_nodes_only and not parent_tag:
+            self._parent_match = None
 
-    def _get_custom_comparison_function(self, attr_name, **kwargs):
+        # Constraints that a ParseTreeIndex can resolve by lookup
+        self._index_keys = tuple(
+            (attr_name, flag, phrase)
+            for attr_name, phrase, flag, match in (
+                ('tag', tag, tag_flag, self._tag_match),
+                ('word', word, word_flag, self._word_match),
+                ('parent', parent_tag, parent_flag, self._parent_match),
+            )
+            if (match is not None and phrase
+                and flag in (ParseTree.EXACT, ParseTree.STARTSWITH))
+        )
+
+    def search(self, tree):
+        """Return list of nodes of 'tree' matching this query."""
+        if self._end_nodes_only:
+            results = tree._search_end_nodes(self)
+        else:
+            results = tree._search_all_nodes(self)
+
+        if self._ancestor_match is not None and results:
+            results = self._filter_by_ancestor(
+                results, tree._tag_intervals(self._ancestor_match),
+                self._ancestor_negated
+            )
+        if self._descendant_match is not None and results:
+            results = self._filter_by_descendant(
+                results, tree._tag_intervals(self._descendant_match),
+                self._descendant_negated
+            )
+
+        return results
+
+    @property
+    def end_nodes_only(self):
+        """Return True if only end nodes can match this query."""
+        return self._end_nodes_only
+
+    @property
+    def index_keys(self):
+        """
+        Return tuple of (attr_name, flag, phrase) for each constraint of this
+        query that can be resolved with a ParseTreeIndex.
+        """
+        return self._index_keys
+
+    @property
+    def parent_match(self):
+        return self._parent_match
+
+    @property
+    def tag_match(self):
+        return self._tag_match
+
+    @property
+    def word_match(self):
+        return self._word_match
+
+    @staticmethod
+    def _compile_match(phrase, flag, attr_name, kwargs):
+        """
+        Return the match callable for the attribute given by 'attr_name',
+        or None if the attribute is unconstrained.
+        """
+        if flag == ParseTree.CUSTOM:
+            customfunc = Query._get_custom_comparison_function(attr_name,
+                                                               kwargs)
+            return lambda s: customfunc(phrase, s)
+        elif flag == ParseTree.EXACT:
+            return phrase.__eq__ if phrase else None
+        elif flag == ParseTree.CONTAINS:
+            return lambda s: phrase in s
+        elif flag == ParseTree.STARTSWITH:
+            return lambda s: s.startswith(phrase)
+        elif flag == ParseTree.REMATCH:
+            return re.compile(phrase).match
+        elif flag == ParseTree.NOT_REMATCH:
+            match = re.compile(phrase).match
+            return lambda s: match(s) is None
+        elif flag == ParseTree.IS_NOT:
+            return phrase.__ne__
+
+        raise SearchFlagError(
+            'Invalid flag passed for flag: {0}\n'.format(flag) +
+            'Use the named constants in the ParseTree class (e.g. ' +
+            'ParseTree.CONTAINS, ParseTree.EXACT) as flags.'
+        )
+
+    @staticmethod
+    def _compile_relative_match(attr_name, kwargs):
+        """
+        Return (match, negated) for the ancestor or descendant constraint
+        given by 'attr_name,' where match accepts the tag of a single
+        relative, or is None if the constraint is not given, and negated is
+        True if no relative may be accepted by match.
+        """
+        phrase = kwargs.get(attr_name + '_tag', '')
+        flag = kwargs.get(attr_name + '_flag', 0)
+        if not phrase and not flag == ParseTree.CUSTOM:
+            return None, False
+
+        if flag == ParseTree.IS_NOT:
+            return Query._compile_match(phrase, ParseTree.EXACT, attr_name,
+                                        kwargs), True
+        elif flag == ParseTree.NOT_REMATCH:
+            return Query._compile_match(phrase, ParseTree.REMATCH, attr_name,
+                                        kwargs), True
+
+        return Query._compile_match(phrase, flag, attr_name, kwargs), False
+
+    @staticmethod
+    def _filter_by_ancestor(nodes, intervals, negated):
+        """
+        Return list of the nodes of 'nodes' (in depth-first order) within
+        any of 'intervals,' the (node_id, subtree_end) of the matching
+        ancestors, or within none of them if 'negated.'
+
+        Intervals either nest or are disjoint, so a node is within one iff
+        it is before the furthest end of those that start before it.
+        """
+        results = []
+        covered = 0
+        k = 0
+
+        for node in nodes:
+            node_id = node.node_id
+            while k < len(intervals) and intervals[k][0] < node_id:
+                covered = max(covered, intervals[k][1])
+                k += 1
+
+            if (node_id < covered) != negated:
+                results.append(node)
+
+        return results
+
+    @staticmethod
+    def _filter_by_descendant(nodes, intervals, negated):
+        """
+        Return list of the nodes of 'nodes' whose subtree contains the start
+        of any of 'intervals,' the (node_id, subtree_end) of the matching
+        descendants, or of none of them if 'negated.'
+        """
+        starts = [start for start, end in intervals]
+        results = []
+
+        for node in nodes:
+            k = bisect_right(starts, node.node_id)
+            found = k < len(starts) and starts[k] < node.subtree_end
+
+            if found != negated:
+                results.append(node)
+
+        return results
+
+    @staticmethod
+    def _get_custom_comparison_function(attr_name, kwargs):
         key = attr_name + '_func'
 
         try:
@@ -385,49 +1430,135 @@ class ParseTree:
 
         return customfunc
 
-    def _search_all_nodes(self, tag, tagfunc, parent_tag, parentfunc):
-        results = []
-        
-        for node in self.iternodes():
-            if tagfunc(tag, node.tag):
-                if parent_tag and node.parent is not None:
-                    if parentfunc(parent_tag, node.parent.tag):
-                        results.append(node)
-                elif not parent_tag:
-                    results.append(node)
+class SentencePolicy:
+    """
+    Rules by which ParseTree.get_sentence joins the words of a tree's end
+    nodes into a sentence. Words are separated by single spaces, except as
+    given by the tag patterns below. A pattern ending in '*' matches any tag
+    beginning with the rest of it; any other pattern matches a tag exactly.
 
-        return results
+    Policies are immutable and hashable, so a tree may cache one sentence
+    per policy.
+
+    ATTRIBUTES:
+      * attach_left - Tuple of patterns of tags whose words follow the
+                      previous word with no space, e.g. punctuation or
+                      enclitic pronouns.
+      * attach_right - Tuple of patterns of tags whose words are followed by
+                       the next word with no space, e.g. proclitics.
+      * keep_first - If True, the first word is kept even if its tag is
+                     skipped.
+      * skip - Tuple of patterns of tags whose words are left out.
+
+    METHODS:
+      * join
+    """
+    _SKIP = 1
+    _LEFT = 2
+    _RIGHT = 4
+
+    def __init__(self, attach_left=('PUNC', ), attach_right=(),
+                 skip=('-NONE-', ), keep_first=True):
+        self._attach_left = tuple(attach_left)
+        self._attach_right = tuple(attach_right)
+        self._skip = tuple(skip)
+        self._keep_first = keep_first
+        self._key = (self._attach_left, self._attach_right, self._skip,
+                     keep_first)
+
+        # Flags of each tag seen, so patterns are matched once per tag.
+        self._flags = {}
+
+    def __eq__(self, other):
+        return isinstance(other, SentencePolicy) and self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        return ('SentencePolicy(attach_left={0!r}, attach_right={1!r}, '
+                'skip={2!r}, keep_first={3!r})'.format(*self._key))
+
+    @property
+    def attach_left(self):
+        return self._attach_left
+
+    @property
+    def attach_right(self):
+        return self._attach_right
+
+    @property
+    def keep_first(self):
+        return self._keep_first
 
-    def _search_end_nodes(self, tag, tagfunc, word, wordfunc,
-                          parent_tag, parentfunc):
+    @property
+    def skip(self):
+        return self._skip
+
+    def join(self, tags, words):
         """
-        Search only end nodes. Should be called only when a search query
-        provides a 'word' attribute.
+        Return the sentence made of the sequence 'words,' whose end nodes
+        have the corresponding tags of the sequence 'tags.'
         """
-        results = []
-        
-        for node in self.iterendnodes():
-            if (tagfunc(tag, node.tag)
-                and wordfunc(word, node.word)
-                and parentfunc(parent_tag, node.parent.tag)
-            ):
-                results.append(node)
+        if not words:
+            return ''
 
-        return results
+        flags = self._flags
+        for tag in set(tags).difference(flags):
+            flags[tag] = self._tag_flags(tag)
 
-    # TODO
-    # Currently each word is separated by a space, excluding punctuation.
-    # Must figure out Arabic rules.
-    @property
-    def sentence(self):
-        sentence = ''
-        
-        for i, node in enumerate(self.iterendnodes()):
-            if node.tag == 'PUNC':
-                sentence += node.word
-            elif i == 0:
-                sentence += node.word
-            elif not node.tag == '-NONE-':
-                sentence += ' {0}'.format(node.word)
-                
-        return sentence
+        SKIP, LEFT, RIGHT = self._SKIP, self._LEFT, self._RIGHT
+        pieces = []
+        append = pieces.append
+        glue = True
+        start = 0
+
+        if self._keep_first:
+            append(words[0])
+            glue = flags[tags[0]] & RIGHT
+            start = 1
+
+        for i in range(start, len(words)):
+            tag_flags = flags[tags[i]]
+            if tag_flags & SKIP:
+                continue
+
+            if not (glue or tag_flags & LEFT):
+                append(' ')
+            append(words[i])
+            glue = tag_flags & RIGHT
+
+        return ''.join(pieces)
+
+    def _tag_flags(self, tag):
+        flags = 0
+        for patterns, flag in ((self._skip, self._SKIP),
+                               (self._attach_left, self._LEFT),
+                               (self._attach_right, self._RIGHT)):
+            for pattern in patterns:
+                if pattern.endswith('*'):
+                    if tag.startswith(pattern[:-1]):
+                        flags |= flag
+                        break
+                elif tag == pattern:
+                    flags |= flag
+                    break
+
+        return flags
+
+# Joins words as ParseTree.sentence always has: separated by spaces, except
+# before punctuation, and leaving out empty elements (but for the first).
+DEFAULT_SENTENCE_POLICY = SentencePolicy()
+
+# Attaches the clitics of the Arabic Treebank that are always written joined
+# to their host: pronoun suffixes to the preceding word, and the future
+# particle to the following one. Trees do not keep the '-' marking of
+# clitics in the treebank notation, so clitics whose tags are shared with
+# free words (such as PREP and CONJ) are left separate.
+ARABIC_SENTENCE_POLICY = SentencePolicy(
+    attach_left=('PUNC', 'POSS_PRON*', 'IVSUFF_DO*', 'PVSUFF_DO*',
+                 'CVSUFF_DO*'),
+    attach_right=('FUT_PART', ),
+    skip=('-NONE-', ),
+    keep_first=False
+)
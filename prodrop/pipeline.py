@@ -0,0 +1,324 @@
+"""
+pipeline.py
+Author: Adam Beagle
+
+PURPOSE:
+    Runs any analyzer of subjectverbanalysis as a pipeline of three stages
+    connected by bounded queues, so that reading the corpus from disk,
+    building trees and analyzing them overlap, while no more than a fixed
+    number of trees are held in memory at once, however large the corpus.
+
+DESCRIPTION:
+    * read - A thread reads the treebank notation of each tree with
+             util.itertreetexts, in corpus order, and puts batches of them,
+             each with the source of its tree, on the text queue.
+    * parse - A thread takes batches from the text queue and builds their
+              trees, putting them on the tree queue. With parse_workers > 0
+              the trees are parsed by a pool of processes instead; each
+              returns the ParseTree.to_preorder() description of its trees,
+              from which they are rebuilt (much faster than parsing) with
+              from_preorder, and batches are kept in order.
+    * analyze - The calling thread takes batches from the tree queue and
+                passes each tree to the analyzer's analyze_tree.
+
+    A stage that finds its output queue full waits for the next stage to
+    take a batch (backpressure), and one that finds its input queue empty
+    waits for the previous stage. A PipelineStats records how often, and
+    how long, each queue made its producer or consumer wait: mostly full
+    queues mean the later stage is the bottleneck, mostly empty ones the
+    earlier stage.
+
+    The tree_class and index_policy of the analyzer are used; its cache_dir
+    and lazy options are not, as every tree passes through the parse stage.
+    An exception raised in any stage stops the pipeline and is re-raised by
+    run_pipeline.
+
+USAGE:
+    analyzer = CombinedAnalyzer('path/to/parsefiles/')
+    stats = run_pipeline(analyzer, queue_depth=8, parse_workers=2)
+    analyzer.print_report_basic()
+    stats.write_report(sys.stdout)
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import queue
+import threading
+import time
+
+from util import itertreetexts
+
+# Trees per batch passed between stages. Larger batches cost less to pass
+# between threads and processes, smaller ones overlap the stages sooner.
+BATCH_SIZE = 64
+
+# Batches each queue holds before its producer must wait.
+QUEUE_DEPTH = 8
+
+# Marks the end of a stage's output.
+_DONE = object()
+
+# Seconds between checks of whether the pipeline was stopped while waiting.
+_POLL_INTERVAL = 0.1
+
+class _PipelineStopped(Exception):
+    """Raised in a stage thread when the pipeline is stopped early."""
+
+class QueueStats:
+    """
+    Counts of the traffic through one queue of a pipeline.
+
+    ATTRIBUTES:
+      * batches - Number of batches put on the queue.
+      * depth - Maximum number of batches the queue holds.
+      * empty_wait_time - Seconds the consumer spent waiting.
+      * empty_waits - Times the consumer found the queue empty.
+      * full_wait_time - Seconds the producer spent waiting.
+      * full_waits - Times the producer found the queue full.
+      * max_size - Most batches held by the queue at once.
+      * name
+    """
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.batches = 0
+        self.max_size = 0
+        self.full_waits = 0
+        self.full_wait_time = 0.0
+        self.empty_waits = 0
+        self.empty_wait_time = 0.0
+
+class PipelineStats:
+    """
+    ATTRIBUTES:
+      * parse_workers
+      * queues - List of QueueStats, text queue first.
+      * tree_count
+      * wall_time
+
+    METHODS:
+      * write_report
+    """
+    def __init__(self, queues, parse_workers):
+        self.queues = queues
+        self.parse_workers = parse_workers
+        self.tree_count = 0
+        self.wall_time = 0.0
+
+    def write_report(self, out):
+        """Write the counts of each queue to 'out.'"""
+        if self.parse_workers:
+            parsers = '{0} parse process(es)'.format(self.parse_workers)
+        else:
+            parsers = 'parse thread'
+
+        out.write('{0} trees in {1:.3f}s ({2})\n'.format(
+            self.tree_count, self.wall_time, parsers))
+
+        for stats in self.queues:
+            out.write(
+                ' {0} queue: {1} batches, max {2}/{3} held; producer waited '
+                '{4} times ({5:.3f}s), consumer waited {6} times '
+                '({7:.3f}s)\n'.format(
+                    stats.name, stats.batches, stats.max_size, stats.depth,
+                    stats.full_waits, stats.full_wait_time,
+                    stats.empty_waits, stats.empty_wait_time))
+
+class _MeteredQueue:
+    """
+    Bounded queue.Queue that records its traffic in a QueueStats, and whose
+    waits end early if the pipeline's 'stop' event is set.
+    """
+    def __init__(self, name, depth, stop):
+        self.stats = QueueStats(name, depth)
+        self._queue = queue.Queue(depth)
+        self._stop = stop
+
+    def get(self):
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        stats = self.stats
+        stats.empty_waits += 1
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    return self._queue.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        raise _PipelineStopped()
+        finally:
+            stats.empty_wait_time += time.perf_counter() - start
+
+    def put(self, item):
+        stats = self.stats
+        if item is not _DONE:
+            stats.batches += 1
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            stats.full_waits += 1
+            start = time.perf_counter()
+            try:
+                while True:
+                    try:
+                        self._queue.put(item, timeout=_POLL_INTERVAL)
+                        break
+                    except queue.Full:
+                        if self._stop.is_set():
+                            raise _PipelineStopped()
+            finally:
+                stats.full_wait_time += time.perf_counter() - start
+
+        stats.max_size = max(stats.max_size, self._queue.qsize())
+
+def run_pipeline(analyzer, queue_depth=QUEUE_DEPTH, parse_workers=0,
+                 batch_size=BATCH_SIZE):
+    """
+    Analyze every tree of 'analyzer' (any analyzer with get_filepaths,
+    get_tree_options and analyze_tree methods) in a pipeline whose queues
+    each hold up to 'queue_depth' batches of 'batch_size' trees. Trees are
+    parsed in a thread, or in 'parse_workers' processes if it is > 0.
+    Return PipelineStats.
+
+    Trees are analyzed in corpus order, so the result is identical to that
+    of analyzing them serially, but analyze_tree is called directly: any
+    previous result of the analyzer is not reset.
+    """
+    options = analyzer.get_tree_options()
+    tree_class = options['tree_class']
+    index_policy = options['index_policy']
+
+    stop = threading.Event()
+    errors = []
+    texts = _MeteredQueue('text', queue_depth, stop)
+    trees = _MeteredQueue('tree', queue_depth, stop)
+    stats = PipelineStats([texts.stats, trees.stats], parse_workers)
+    executor = None
+    if parse_workers > 0:
+        executor = ProcessPoolExecutor(max_workers=parse_workers)
+
+    stages = [
+        threading.Thread(
+            target=_run_stage, name='pipeline-read', daemon=True,
+            args=(_read, (analyzer.get_filepaths(), batch_size), texts,
+                  stop, errors)
+        ),
+        threading.Thread(
+            target=_run_stage, name='pipeline-parse', daemon=True,
+            args=(_parse, (texts, tree_class, index_policy, executor,
+                           parse_workers), trees, stop, errors)
+        ),
+    ]
+
+    start = time.perf_counter()
+    try:
+        for stage in stages:
+            stage.start()
+
+        while True:
+            batch = trees.get()
+            if batch is _DONE:
+                break
+
+            for tree in batch:
+                analyzer.analyze_tree(tree)
+            stats.tree_count += len(batch)
+    except _PipelineStopped:
+        raise errors[0]
+    finally:
+        stop.set()
+        for stage in stages:
+            stage.join()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    stats.wall_time = time.perf_counter() - start
+    return stats
+
+def _parse(texts, tree_class, index_policy, executor, parse_workers, trees):
+    """
+    Parse stage: build the trees of each batch of 'texts' and put them on
+    'trees,' in the order of 'texts.'
+    """
+    if executor is None:
+        while True:
+            batch = texts.get()
+            if batch is _DONE:
+                return
+
+            built = []
+            for source, text in batch:
+                tree = tree_class(text, index_policy)
+                tree.source = source
+                built.append(tree)
+            trees.put(built)
+
+    # Up to two batches per process are in flight, so the processes are
+    # never idle while the results of one are rebuilt.
+    pending = deque()
+    done = False
+    while pending or not done:
+        while not done and len(pending) < 2*parse_workers:
+            batch = texts.get()
+            if batch is _DONE:
+                done = True
+            else:
+                pending.append((batch, executor.submit(
+                    _parse_batch, batch, tree_class, index_policy)))
+
+        if pending:
+            batch, future = pending.popleft()
+            built = []
+            for (source, text), preorder in zip(batch, future.result()):
+                tree = tree_class.from_preorder(text, *preorder, index_policy)
+                tree.source = source
+                built.append(tree)
+            trees.put(built)
+
+def _parse_batch(batch, tree_class, index_policy):
+    """
+    Return list of the to_preorder() description of the tree of each
+    (source, notation) pair of 'batch.'
+
+    Module-level so it can be run in a worker process.
+    """
+    return [tree_class(text, index_policy).to_preorder()
+            for source, text in batch]
+
+def _read(filepaths, batch_size, texts):
+    """
+    Read stage: put a (source, notation) pair for each tree of 'filepaths'
+    on 'texts' in batches of 'batch_size,' where source is as set on trees
+    by util.itertrees.
+    """
+    batch = []
+    for filepath in filepaths:
+        notations = itertreetexts(filepath, offsets=True)
+        for ordinal, (offset, text) in enumerate(notations):
+            batch.append(((filepath, ordinal, offset), text))
+
+            if len(batch) == batch_size:
+                texts.put(batch)
+                batch = []
+
+    if batch:
+        texts.put(batch)
+
+def _run_stage(stage, args, output, stop, errors):
+    """
+    Run the function 'stage' of a stage thread with 'args' followed by its
+    output queue 'output,' then put _DONE on the queue. If it raises, the
+    exception is appended to 'errors' and the pipeline stopped.
+    """
+    try:
+        stage(*args, output)
+        output.put(_DONE)
+    except _PipelineStopped:
+        pass
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
@@ -0,0 +1,223 @@
+"""
+rawscan.py
+Author: Adam Beagle
+
+PURPOSE:
+    Contains a streaming scanner that gathers the same counts as a
+    CombinedAnalyzer directly from the token stream of each tree, without
+    building any ParseTree or node objects. Useful for quick corpus-wide
+    counts; see FAST in analyze_corpus.
+
+DESCRIPTION:
+    Each tree is read token by token with parsetree.tree_token_pattern. A
+    stack holds a frame for each open thru-node, recording its tag, its
+    parent's frame, the tags of its children seen so far, and the position
+    and word of its first child with a verb tag. Memory used is therefore
+    bounded by the depth and width of a single tree.
+
+    Subjects are found as end nodes are read, exactly as by the queries of
+    subjectverbanalysis:
+      * pro-drop - (-NONE- *) or (-NONE- *-n) whose parent is NP-SBJ*
+      * non-pro-drop - any other end node whose parent is NP-SBJ*
+    When a subject is found, all previous siblings of it and its ancestors
+    have already been read, so its associated verb is looked up on the
+    stack following the rules of SubjectVerbAnalyzer._get_associated_verb.
+
+USAGE:
+    result = scan_corpus('path/to/parsefiles/')
+
+    The result is a results.CombinedResult, equal to that of a
+    CombinedAnalyzer. It may be assigned to CombinedAnalyzer.result to write
+    the usual reports.
+"""
+from os.path import isdir
+import re
+
+from exceptions import TreeConstructionError
+from parsetree import tree_token_pattern
+from results import CombinedResult, FailureRecord, VerbData
+from subjectverbanalysis import ALLOWED_VERB_TAGS, PRODROP_WORD_PATTERN
+from util import get_parse_files, itertreetexts, update_distinct_counts
+
+# Indices into a frame, a list describing an open thru-node.
+_TAG, _PARENT, _CHILD_TAGS, _VERB_POS, _VERB_WORD = range(5)
+
+_is_prodrop_word = re.compile(PRODROP_WORD_PATTERN).match
+
+def scan_corpus(path, allowed_verb_tags=ALLOWED_VERB_TAGS, recursive=False):
+    """
+    Return results.CombinedResult of every tree of the .parse file(s) given
+    by 'path,' which may be a file or a directory (whose .parse files are
+    scanned as by util.itertrees_dir with the given 'recursive').
+    """
+    if isdir(path):
+        filepaths = get_parse_files(path, recursive)
+    else:
+        filepaths = [path]
+
+    result = CombinedResult()
+    for filepath in filepaths:
+        scan_file(filepath, result, allowed_verb_tags)
+
+    return result
+
+def scan_file(filepath, result=None, allowed_verb_tags=ALLOWED_VERB_TAGS):
+    """
+    Scan every tree of the .parse file given by 'filepath' and add its
+    counts to the CombinedResult 'result' (a new one if not given), which is
+    returned.
+    """
+    if result is None:
+        result = CombinedResult()
+
+    notations = itertreetexts(filepath, offsets=True)
+    for ordinal, (offset, notation) in enumerate(notations):
+        scan_notation(notation, result, (filepath, ordinal, offset),
+                      allowed_verb_tags)
+
+    return result
+
+def scan_notation(notation, result, source,
+                  allowed_verb_tags=ALLOWED_VERB_TAGS):
+    """
+    Scan the single tree 'notation' and add its counts to the
+    CombinedResult 'result.' If a verb lookup fails, a FailureRecord of the
+    tree is added to failure_trees, located by 'source,' a (filepath,
+    ordinal, offset) tuple as set on trees by util.itertrees.
+
+    TreeConstructionError is raised for notation that ParseTree would
+    reject.
+    """
+    verb_tags = tuple(allowed_verb_tags)
+    is_prodrop_word = _is_prodrop_word
+
+    # Subjects are recorded as (verb word, visited tags, node path), with
+    # verb word None if no verb was found (and node path None if one was),
+    # and counted once the tree is read so that all pro-drops are counted
+    # before all non-pro-drops, as a CombinedAnalyzer does.
+    prodrops = []
+    nonprodrops = []
+
+    frame = ['TOP', None, [], -1, None]
+    stack = []
+    for match in tree_token_pattern.finditer(notation):
+        kind = match.lastgroup
+
+        if kind == 'end':
+            tag = match.group('endtag')
+            word = match.group('word').strip('-{}')
+            _add_child(frame, tag, word, verb_tags)
+
+            if frame[_TAG].startswith('NP-SBJ'):
+                if tag == '-NONE-' and is_prodrop_word(word):
+                    prodrops.append(_find_subject_verb(frame))
+                elif not is_prodrop_word(word):
+                    nonprodrops.append(_find_subject_verb(frame))
+        elif kind == 'thru':
+            stack.append(frame)
+            tag = match.group('thrutag')
+            if not tag == 'TOP':
+                _add_child(frame, tag, None, verb_tags)
+                frame = [tag, frame, [], -1, None]
+        elif kind == 'close':
+            if not stack:
+                raise TreeConstructionError(
+                    "Unmatched closing parenthesis at position {0}.".format(
+                        match.start())
+                )
+            frame = stack.pop()
+        elif kind == 'error':
+            raise TreeConstructionError(
+                "No tag opening or close found at position {0}.".format(
+                    match.start())
+            )
+
+    _count_subjects(result.prodrop, prodrops, source)
+    _count_subjects(result.nonprodrop, nonprodrops, source)
+
+    verb_counts = result.verb_counts
+    for verb, visited, path in prodrops:
+        if verb is not None:
+            verb_counts.setdefault(verb, VerbData()).prodrop_count += 1
+    for verb, visited, path in nonprodrops:
+        if verb is not None:
+            verb_counts.setdefault(verb, VerbData()).nonprodrop_count += 1
+
+def _add_child(frame, tag, word, verb_tags):
+    """Record a child with 'tag' (and 'word,' for end nodes) of 'frame.'"""
+    child_tags = frame[_CHILD_TAGS]
+
+    if frame[_VERB_POS] < 0 and tag.startswith(verb_tags):
+        frame[_VERB_POS] = len(child_tags)
+        frame[_VERB_WORD] = word
+
+    child_tags.append(tag)
+
+def _count_subjects(counts, subjects, source):
+    """
+    Update the SubjectVerbResult 'counts' with 'subjects,' those found in
+    a single tree, as SubjectVerbAnalyzer.analyze_tree does.
+    """
+    counts.tree_count += 1
+
+    if subjects:
+        counts.tree_w_subject_count += 1
+
+    has_failure = False
+    for verb, visited, path in subjects:
+        counts.subject_count += 1
+
+        if verb is not None:
+            counts.subject_w_verb_count += 1
+            update_distinct_counts(counts.verb_counts, verb)
+        else:
+            for tag in visited:
+                update_distinct_counts(counts.ignored_tag_counts, tag)
+
+            if not has_failure:
+                has_failure = True
+                counts.failure_trees.add(FailureRecord(*source, path))
+
+def _find_subject_verb(frame):
+    """
+    Return (verb word, visited tags, node path) for the subject whose
+    frame is 'frame,' as given by _find_verb, with the gorn_address of the
+    subject as node path if no verb is found, or None.
+    """
+    verb, visited = _find_verb(frame)
+    if verb is not None:
+        return verb, visited, None
+
+    # The subject, and each open ancestor of it, is the last child read of
+    # its parent.
+    path = []
+    while frame[_PARENT] is not None:
+        frame = frame[_PARENT]
+        path.append(len(frame[_CHILD_TAGS]) - 1)
+    path.reverse()
+
+    return verb, visited, tuple(path)
+
+def _find_verb(frame):
+    """
+    Return (verb word, visited tags) for the subject whose frame is 'frame.'
+
+    As in SubjectVerbAnalyzer._get_associated_verb, the previous siblings of
+    the subject and then of each ancestor are searched for the first child
+    with a verb tag, stopping at a VP* node or TOP. A node's previous
+    siblings are all children of its parent but the last seen, the node
+    itself. visited tags is meaningful only if no verb is found.
+    """
+    visited = []
+
+    while frame[_PARENT] is not None and not frame[_TAG].startswith('VP'):
+        parent = frame[_PARENT]
+        position = len(parent[_CHILD_TAGS]) - 1
+
+        if 0 <= parent[_VERB_POS] < position:
+            return parent[_VERB_WORD], visited
+
+        visited += parent[_CHILD_TAGS][:position]
+        frame = parent
+
+    return None, visited
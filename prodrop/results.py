@@ -0,0 +1,337 @@
+"""
+results.py
+Author: Adam Beagle
+
+PURPOSE:
+    Contains the result objects accumulated by the analyzers in
+    subjectverbanalysis. Results are independent of any analyzer, so results
+    from separate files, processes or earlier runs can be merged, saved to
+    disk and loaded again without re-parsing any trees.
+
+USAGE:
+    Results are merged with merge() (in place) or + (returning a new result):
+
+    total = SubjectVerbResult.load('part1.result')
+    total.merge(SubjectVerbResult.load('part2.result'))
+
+    Merging is deterministic: keys new to the merged dictionaries are added
+    in the order they appear in the result being merged, so merging partial
+    results in corpus order gives exactly the result of a single run.
+
+    Failed trees are held as FailureRecord objects, from which the tree and
+    its failing subject can be loaded again when needed:
+
+    for record in analyzer.failure_trees:
+        tree = record.load_tree()
+        print(record.get_subject(tree).tag, tree.sentence)
+"""
+from os.path import getsize
+import pickle
+
+from exceptions import FailureRecordError, ResultFileError
+from parsetree import ParseTree
+from util import itertreetexts, update_distinct_counts
+
+class AnalysisResult:
+    """
+    Base class of all result objects.
+
+    METHODS:
+      * copy
+      * failure_tree_sets
+      * load (classmethod)
+      * merge
+      * save
+
+    Subclasses must implement copy, failure_tree_sets and merge. Results
+    support + and +=, which are equivalent to copy followed by merge, and
+    merge, respectively.
+    """
+    __slots__ = ()
+
+    def __add__(self, other):
+        if not isinstance(other, type(self)):
+            return NotImplemented
+
+        result = self.copy()
+        result.merge(other)
+        return result
+
+    def __iadd__(self, other):
+        if not isinstance(other, type(self)):
+            return NotImplemented
+
+        self.merge(other)
+        return self
+
+    def copy(self):
+        raise NotImplementedError(
+            "Inheriting classes must override and implement this method."
+        )
+
+    def failure_tree_sets(self):
+        """
+        Return list of the failure_trees sets of the result, so their
+        records can be relabeled, e.g. by incremental.
+        """
+        raise NotImplementedError(
+            "Inheriting classes must override and implement this method."
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Return result saved to the file given by 'path' by save().
+        ResultFileError is raised if the file does not hold a result of
+        this class.
+        """
+        with open(path, 'rb') as f:
+            try:
+                result = pickle.load(f)
+            except (pickle.UnpicklingError, EOFError) as e:
+                raise ResultFileError(
+                    "Could not load result from '{0}': {1}".format(path, e)
+                )
+
+        if not isinstance(result, cls):
+            raise ResultFileError(
+                "File '{0}' does not contain a {1}. Got: {2}".format(
+                    path, cls.__name__, type(result).__name__)
+            )
+
+        return result
+
+    def merge(self, other):
+        raise NotImplementedError(
+            "Inheriting classes must override and implement this method."
+        )
+
+    def save(self, path):
+        """Write result to the file given by 'path.'"""
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
+
+class FailureRecord:
+    """
+    Identifies a tree for which a verb lookup failed, and the subject whose
+    lookup failed, without holding the tree.
+
+    ATTRIBUTES:
+      * filepath - Path of the .parse file of the tree, or None.
+      * node_path - gorn_address of the subject in the tree.
+      * offset - Byte offset of the start of the tree in its file, or None.
+      * ordinal - Position of the tree in its file, counting from 0.
+
+    METHODS:
+      * from_subject (classmethod)
+      * get_notation
+      * get_subject
+      * load_tree
+
+    Records of the same tree are equal, whatever their subject, so a set of
+    records holds one per tree. A record of a tree with no source (one not
+    read by util.itertrees) has no filepath or offset, and as ordinal the
+    position of the tree among those counted by its result; its tree cannot
+    be loaded again. As that ordinal does not identify the tree across
+    results, such a record is equal only to itself, so merged results keep
+    the records of every tree.
+    """
+    __slots__ = ('filepath', 'ordinal', 'offset', 'node_path')
+
+    def __init__(self, filepath, ordinal, offset, node_path):
+        self.filepath = filepath
+        self.ordinal = ordinal
+        self.offset = offset
+        self.node_path = node_path
+
+    def __eq__(self, other):
+        if not isinstance(other, FailureRecord):
+            return NotImplemented
+
+        if self.filepath is None or other.filepath is None:
+            return self is other
+
+        return (self.filepath == other.filepath
+                and self.ordinal == other.ordinal)
+
+    def __hash__(self):
+        if self.filepath is None:
+            return object.__hash__(self)
+
+        return hash((self.filepath, self.ordinal))
+
+    def __repr__(self):
+        return 'FailureRecord({0!r}, {1}, {2}, {3})'.format(
+            self.filepath, self.ordinal, self.offset, self.node_path)
+
+    @classmethod
+    def from_subject(cls, tree, node, ordinal):
+        """
+        Return record of the subject 'node' of 'tree,' located by the
+        source of the tree, or by 'ordinal' if it has none.
+        """
+        if tree.source is None:
+            return cls(None, ordinal, None, node.gorn_address)
+
+        filepath, ordinal, offset = tree.source
+        return cls(filepath, ordinal, offset, node.gorn_address)
+
+    def get_notation(self):
+        """
+        Return the treebank notation of the tree, read from its file, which
+        must not have changed since the record was made.
+
+        FailureRecordError is raised if the record has no file or its file
+        has no tree at offset.
+        """
+        if self.filepath is None or self.offset is None:
+            raise FailureRecordError(
+                'Tree {0} was not read from a file.'.format(self.ordinal)
+            )
+
+        byte_range = (self.offset, getsize(self.filepath))
+        for text in itertreetexts(self.filepath, byte_range=byte_range):
+            return text
+
+        raise FailureRecordError(
+            "'{0}' has no tree at offset {1}.".format(self.filepath,
+                                                     self.offset)
+        )
+
+    def get_subject(self, tree):
+        """Return the subject node of 'tree,' the tree of the record."""
+        return tree.node_at(self.node_path)
+
+    def load_tree(self, tree_class=ParseTree,
+                  index_policy=ParseTree.INDEX_END_NODES):
+        """
+        Return the tree of the record, built as by tree_class(lines,
+        index_policy) from get_notation(), with its source set.
+        """
+        tree = tree_class(self.get_notation(), index_policy)
+        tree.source = (self.filepath, self.ordinal, self.offset)
+
+        return tree
+
+class SubjectVerbResult(AnalysisResult):
+    """
+    Counters and dictionaries accumulated by a SubjectVerbAnalyzer.
+
+    ATTRIBUTES:
+      * failure_trees - Set of a FailureRecord of each tree for which a
+                        verb lookup failed
+      * ignored_tag_counts - dict of tag -> count
+      * subject_count
+      * subject_w_verb_count
+      * tree_count
+      * tree_w_subject_count
+      * verb_counts - dict of verb -> count
+    """
+    __slots__ = ('tree_count', 'tree_w_subject_count', 'subject_count',
+                 'subject_w_verb_count', 'verb_counts', 'ignored_tag_counts',
+                 'failure_trees')
+
+    def __init__(self):
+        self.tree_count = 0
+        self.tree_w_subject_count = 0
+        self.subject_count = 0
+        self.subject_w_verb_count = 0
+        self.verb_counts = {}
+        self.ignored_tag_counts = {}
+        self.failure_trees = set()
+
+    def __eq__(self, other):
+        if not isinstance(other, SubjectVerbResult):
+            return NotImplemented
+
+        return all(getattr(self, attr) == getattr(other, attr)
+                   for attr in self.__slots__)
+
+    def copy(self):
+        result = SubjectVerbResult()
+        result.merge(self)
+        return result
+
+    def failure_tree_sets(self):
+        return [self.failure_trees]
+
+    def merge(self, other):
+        """Add the counts of the SubjectVerbResult 'other' to this one."""
+        self.tree_count += other.tree_count
+        self.tree_w_subject_count += other.tree_w_subject_count
+        self.subject_count += other.subject_count
+        self.subject_w_verb_count += other.subject_w_verb_count
+
+        for verb, n in other.verb_counts.items():
+            update_distinct_counts(self.verb_counts, verb, n)
+        for tag, n in other.ignored_tag_counts.items():
+            update_distinct_counts(self.ignored_tag_counts, tag, n)
+
+        self.failure_trees.update(other.failure_trees)
+
+class VerbData:
+    """Utility object used for the values of CombinedResult.verb_counts."""
+    __slots__ = ('prodrop_count', 'nonprodrop_count')
+
+    def __init__(self, prodrop_count=0, nonprodrop_count=0):
+        self.prodrop_count = prodrop_count
+        self.nonprodrop_count = nonprodrop_count
+
+    def __eq__(self, other):
+        if not isinstance(other, VerbData):
+            return NotImplemented
+
+        return (self.prodrop_count == other.prodrop_count
+                and self.nonprodrop_count == other.nonprodrop_count)
+
+    def __repr__(self):
+        return 'VerbData({0}, {1})'.format(self.prodrop_count,
+                                           self.nonprodrop_count)
+
+class CombinedResult(AnalysisResult):
+    """
+    Results accumulated by a CombinedAnalyzer.
+
+    ATTRIBUTES:
+      * nonprodrop - SubjectVerbResult of the non-pro-drop analysis
+      * prodrop - SubjectVerbResult of the pro-drop analysis
+      * verb_counts - dict of verb -> VerbData
+    """
+    __slots__ = ('prodrop', 'nonprodrop', 'verb_counts')
+
+    def __init__(self, prodrop=None, nonprodrop=None):
+        """
+        New, empty SubjectVerbResult objects are used for prodrop and
+        nonprodrop if not given.
+        """
+        self.prodrop = prodrop if prodrop is not None else SubjectVerbResult()
+        self.nonprodrop = (nonprodrop if nonprodrop is not None
+                           else SubjectVerbResult())
+        self.verb_counts = {}
+
+    def __eq__(self, other):
+        if not isinstance(other, CombinedResult):
+            return NotImplemented
+
+        return (self.prodrop == other.prodrop
+                and self.nonprodrop == other.nonprodrop
+                and self.verb_counts == other.verb_counts)
+
+    def copy(self):
+        result = CombinedResult()
+        result.merge(self)
+        return result
+
+    def failure_tree_sets(self):
+        return [self.prodrop.failure_trees, self.nonprodrop.failure_trees]
+
+    def merge(self, other):
+        """Add the counts of the CombinedResult 'other' to this one."""
+        self.prodrop.merge(other.prodrop)
+        self.nonprodrop.merge(other.nonprodrop)
+
+        for verb, data in other.verb_counts.items():
+            if verb not in self.verb_counts:
+                self.verb_counts[verb] = VerbData()
+            self.verb_counts[verb].prodrop_count += data.prodrop_count
+            self.verb_counts[verb].nonprodrop_count += data.nonprodrop_count
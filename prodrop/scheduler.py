@@ -0,0 +1,240 @@
+"""
+scheduler.py
+Author: Adam Beagle
+
+PURPOSE:
+    Runs any analyzer of subjectverbanalysis on a pool of processes with
+    the work divided into units of similar size, rather than one task per
+    file, so a single large file does not leave the other processes idle.
+
+DESCRIPTION:
+    plan_units() splits the files of a corpus into WorkUnits of about
+    total size / (workers * units_per_worker) bytes. Files smaller than that
+    are single units; larger files are split at tree boundaries, found with
+    a treeindex.TreeIndex. Units are ordered largest first, so that when
+    each free process takes the next unit (longest processing time first
+    scheduling) the small units at the end fill in the gaps.
+
+    run_analysis() analyzes each unit in a fresh analyzer of the same class,
+    given the tree and analysis options of the original, then merges the
+    partial results in corpus order, so the result, and every report
+    written from it, is identical to that of a serial run.
+
+    analyze_files() instead returns the separate result of each of a list
+    of files.
+
+USAGE:
+    analyzer = ProdropAnalyzer('path/to/parsefiles/')
+    report = run_analysis(analyzer, workers=4)
+    analyzer.print_report_basic()
+    report.write_report(sys.stdout)
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import os
+import time
+
+from treeindex import TreeIndex
+from util import itertrees
+
+# Units planned per worker. More units balance better but cost more merges.
+UNITS_PER_WORKER = 4
+
+class WorkUnit:
+    """
+    A contiguous run of trees of one file.
+
+    ATTRIBUTES:
+      * byte_range - (start, stop) byte offsets of the trees in the file,
+                     or None if the unit is the whole file.
+      * file_number - Position of the file in the corpus.
+      * filepath
+      * first_ordinal - Ordinal of the first tree of the unit in its file.
+      * size - Size of the unit in bytes.
+    """
+    __slots__ = ('filepath', 'file_number', 'first_ordinal', 'byte_range',
+                 'size')
+
+    def __init__(self, filepath, file_number, size, first_ordinal=0,
+                 byte_range=None):
+        self.filepath = filepath
+        self.file_number = file_number
+        self.size = size
+        self.first_ordinal = first_ordinal
+        self.byte_range = byte_range
+
+    def __repr__(self):
+        return 'WorkUnit({0!r}, trees from {1}, {2} bytes)'.format(
+            self.filepath, self.first_ordinal, self.size)
+
+    @property
+    def corpus_order(self):
+        """Key that sorts units in the order of their trees in the corpus."""
+        return (self.file_number, self.first_ordinal)
+
+class ScheduleReport:
+    """
+    How the units of a run were spread over the workers.
+
+    ATTRIBUTES:
+      * unit_count
+      * wall_time - Seconds from the first unit started to the last merged.
+      * workers - dict of worker process id -> [units run, busy seconds],
+                  in order of each worker's first unit.
+
+    METHODS:
+      * utilization
+      * write_report
+    """
+    def __init__(self, wall_time, workers, unit_count):
+        self.wall_time = wall_time
+        self.workers = workers
+        self.unit_count = unit_count
+
+    def utilization(self):
+        """
+        Return dict of worker process id -> fraction of the wall time that
+        the worker spent analyzing.
+        """
+        if not self.wall_time:
+            return {pid : 0.0 for pid in self.workers}
+
+        return {pid : busy / self.wall_time
+                for pid, (units, busy) in self.workers.items()}
+
+    def write_report(self, out):
+        """Write a line per worker, and the wall time, to 'out.'"""
+        utilization = self.utilization()
+
+        out.write('{0} units on {1} worker(s) in {2:.3f}s\n'.format(
+            self.unit_count, len(self.workers), self.wall_time))
+
+        for i, (pid, (units, busy)) in enumerate(self.workers.items()):
+            out.write(' Worker {0}: {1} units, {2:.3f}s busy, '
+                      '{3:.1f}% utilization\n'.format(
+                          i + 1, units, busy, 100*utilization[pid]))
+
+def analyze_files(analyzer, filepaths, workers=1):
+    """
+    Return list of the result of each file of 'filepaths,' analyzed alone
+    by a new analyzer of the class, tree options and analysis options of
+    'analyzer,' in up to 'workers' processes.
+
+    Used where per-file results are kept, e.g. by incremental.
+    """
+    units = [WorkUnit(filepath, file_number, os.path.getsize(filepath))
+             for file_number, filepath in enumerate(filepaths)]
+    args = _unit_args(analyzer, units)
+
+    if workers > 1 and len(units) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(_run_unit, *args))
+    else:
+        partials = list(map(_run_unit, *args))
+
+    return [result for unit, result, pid, busy in partials]
+
+def plan_units(filepaths, workers, units_per_worker=UNITS_PER_WORKER,
+               index=None):
+    """
+    Return list of WorkUnit covering every tree of 'filepaths,' largest
+    first. Units of equal size are in corpus order.
+
+    'index' may be a TreeIndex of the files, used to split large files;
+    otherwise the large files are indexed as needed.
+    """
+    sizes = [os.path.getsize(path) for path in filepaths]
+    target = max(sum(sizes) // max(workers*units_per_worker, 1), 1)
+    units = []
+
+    for file_number, (filepath, size) in enumerate(zip(filepaths, sizes)):
+        if size <= target:
+            units.append(WorkUnit(filepath, file_number, size))
+        else:
+            units += _split_file(filepath, file_number, target, index)
+
+    units.sort(key=lambda unit: unit.size, reverse=True)
+    return units
+
+def run_analysis(analyzer, workers=None, units_per_worker=UNITS_PER_WORKER,
+                 index=None):
+    """
+    Analyze every tree of 'analyzer' (any analyzer with the constructor
+    signature and analysis options methods of BaseAnalyzer and an
+    analyze_tree method) on 'workers' processes, the number of CPUs by
+    default, and set its result. Return a ScheduleReport.
+
+    With a single worker, units are run in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    units = plan_units(analyzer.get_filepaths(), workers, units_per_worker,
+                       index)
+    args = _unit_args(analyzer, units)
+
+    start = time.perf_counter()
+    if workers == 1:
+        partials = list(map(_run_unit, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(_run_unit, *args))
+
+    worker_stats = {}
+    for unit, result, pid, busy in partials:
+        stats = worker_stats.setdefault(pid, [0, 0.0])
+        stats[0] += 1
+        stats[1] += busy
+
+    partials.sort(key=lambda partial: partial[0].corpus_order)
+    analyzer.result = type(analyzer.result)()
+    for unit, result, pid, busy in partials:
+        analyzer.result.merge(result)
+
+    return ScheduleReport(time.perf_counter() - start, worker_stats,
+                          len(units))
+
+def _run_unit(analyzer_class, tree_options, analysis_options, unit):
+    """
+    Analyze the trees of WorkUnit 'unit' with a new analyzer of class
+    'analyzer_class,' built with 'tree_options' and given
+    'analysis_options.' Return tuple (unit, result, process id, seconds
+    spent).
+
+    Module-level so it can be run in a worker process.
+    """
+    start = time.perf_counter()
+    analyzer = analyzer_class(unit.filepath, **tree_options)
+    analyzer.set_analysis_options(analysis_options)
+
+    for tree in itertrees(unit.filepath, byte_range=unit.byte_range,
+                          first_ordinal=unit.first_ordinal, **tree_options):
+        analyzer.analyze_tree(tree)
+
+    return (unit, analyzer.result, os.getpid(),
+            time.perf_counter() - start)
+
+def _split_file(filepath, file_number, target, index):
+    """
+    Return list of WorkUnit of about 'target' bytes each, covering the trees
+    of 'filepath' in order.
+    """
+    if index is None:
+        index = TreeIndex.build(filepath)
+    offsets, lengths = index.get_extents(filepath)
+
+    units = []
+    first = 0
+    for i in range(len(offsets)):
+        stop = offsets[i] + lengths[i]
+
+        if stop - offsets[first] >= target or i == len(offsets) - 1:
+            units.append(WorkUnit(filepath, file_number,
+                                  stop - offsets[first], first,
+                                  (offsets[first], stop)))
+            first = i + 1
+
+    return units
+
+def _unit_args(analyzer, units):
+    """Return the iterables of arguments of _run_unit for each of 'units.'"""
+    return (repeat(type(analyzer)), repeat(analyzer.get_tree_options()),
+            repeat(analyzer.get_analysis_options()), units)
@@ -67,26 +67,81 @@ USAGE EXAMPLE
 from abc import ABCMeta, abstractmethod
 import csv
 from os.path import isfile, isdir
+import re
 from sys import stdout
 
 from exceptions import InputPathError
-from util import itertrees, itertrees_dir, update_distinct_counts
+from parsetree import ParseTree
+from pipeline import run_pipeline
+from results import (CombinedResult, FailureRecord, SubjectVerbResult,
+    VerbData
+)
+from scheduler import run_analysis
+from util import (get_parse_files, itertrees, itertrees_dir,
+    update_distinct_counts
+)
 
 PRODROP_WORD_PATTERN = '^\*(?:-\d+)?$'
 
+# Default SubjectVerbAnalyzer.allowed_verb_tags
+ALLOWED_VERB_TAGS = ('IV', 'PV', 'VERB', 'PSEUDO_VERB')
+
+# Queries run on every tree of a corpus, compiled once.
+PRODROP_QUERY = ParseTree.compile_query(
+    tag='-NONE-',
+    word=PRODROP_WORD_PATTERN,
+    word_flag=ParseTree.REMATCH,
+    parent_tag='NP-SBJ',
+    parent_flag=ParseTree.STARTSWITH
+)
+
+NONPRODROP_QUERY = ParseTree.compile_query(
+    parent_tag='NP-SBJ',
+    parent_flag=ParseTree.STARTSWITH,
+    word=PRODROP_WORD_PATTERN,
+    word_flag=ParseTree.NOT_REMATCH,
+)
+
+# Keys of extract_subjects' classification of end nodes.
+_PRODROP = 0
+_NONPRODROP = 1
+
+_is_prodrop_word = re.compile(PRODROP_WORD_PATTERN).match
+
 ###############################################################################
+def extract_subjects(tree):
+    """
+    Return tuple (pro-drop subjects, non-pro-drop subjects) of 'tree,'
+    lists of the NP-SBJ* nodes yielded by ProdropAnalyzer.itersubjects and
+    NonProdropAnalyzer.itersubjects respectively, in the same order, found
+    in a single pass over the end nodes of the tree.
+    """
+    groups = tree.classify_end_nodes(_classify_subject, _is_subject_tag)
+
+    return ([node.parent for node in groups.get(_PRODROP, ())],
+            [node.parent for node in groups.get(_NONPRODROP, ())])
+
 def iterprodrops(tree):
     """
     Yield pro-drop nodes, i.e. (-NONE- *) nodes whose parent is a variant
     of NP-SBJ.
     """
-    return (node for node in tree.search(
-        tag='-NONE-',
-        word=PRODROP_WORD_PATTERN,
-        word_flag=tree.REMATCH,
-        parent_tag='NP-SBJ',
-        parent_flag=tree.STARTSWITH)
-    )
+    return (node for node in PRODROP_QUERY.search(tree))
+
+def _classify_subject(tag, word):
+    """
+    Classify an end node whose parent is NP-SBJ*: as PRODROP_QUERY or
+    NONPRODROP_QUERY would match it, or neither (None).
+    """
+    if _is_prodrop_word(word) is None:
+        return _NONPRODROP
+    if tag == '-NONE-':
+        return _PRODROP
+
+    return None
+
+def _is_subject_tag(tag):
+    return tag.startswith('NP-SBJ')
 
 ###############################################################################
 class BaseAnalyzer(metaclass=ABCMeta):
@@ -96,17 +151,37 @@ class BaseAnalyzer(metaclass=ABCMeta):
     Makes the itertrees method an alias to the proper function from util,
     which differs based on whether input_path is a directory or a file.
 
+    ATTRIBUTES:
+      * cache_dir - Directory of tree caches (see treecache), or None if
+                    trees are always parsed.
+      * index_policy - Indexing policy of the trees built, one of the
+                       ParseTree.INDEX_* constants.
+      * input_path (read-only)
+      * lazy - If True, trees are yielded by itertrees as
+               parsetree.LazyParseTree handles, built only when first used.
+      * recursive - If True and input_path is a directory, nested
+                    directories are searched for .parse files.
+      * tree_class - Class used to build trees, e.g. parsetree.ParseTree
+                     (the default) or flattree.FlatParseTree.
+
     METHODS:
       * do_analysis (abstract)
+      * get_analysis_options
+      * get_filepaths
+      * get_tree_options
       * itertrees
       * print_report_basic (abstract)
       * print_report_full (abstract)
+      * set_analysis_options
       * write_report_basic (abstract)
       * write_report_full (abstract)
     """
-    def __init__(self, input_path):
+    def __init__(self, input_path, tree_class=ParseTree,
+                 index_policy=ParseTree.INDEX_END_NODES, cache_dir=None,
+                 lazy=False, recursive=False):
         """
-        input_path can be directory or file.
+        input_path can be directory or file. If recursive is True, .parse
+        files in nested directories of input_path are also analyzed.
 
         InputPathError is raised if input_path is not a valid path to
         an existing directory or file.
@@ -122,13 +197,53 @@ class BaseAnalyzer(metaclass=ABCMeta):
             )
 
         self._input_path = input_path
+        self.tree_class = tree_class
+        self.index_policy = index_policy
+        self.cache_dir = cache_dir
+        self.lazy = lazy
+        self.recursive = recursive
 
     @abstractmethod
     def do_analysis(self):
         raise NotImplementedError(self.notimplementedmsg)
+
+    def get_analysis_options(self):
+        """
+        Return dict of the settings, other than tree options, that affect
+        the result of an analysis. Analyzers run in other processes (see
+        scheduler) are given them with set_analysis_options.
+        """
+        return {}
     
+    def get_filepaths(self):
+        """Return list of the .parse files analyzed, in order."""
+        if self._itertreesfunc is itertrees:
+            return [self._input_path]
+
+        return get_parse_files(self._input_path, self.recursive)
+
+    def get_tree_options(self):
+        """
+        Return dict of the keyword arguments that control how trees are
+        built, suitable for passing to the constructor of any analyzer.
+        """
+        return {
+            'cache_dir' : self.cache_dir,
+            'index_policy' : self.index_policy,
+            'lazy' : self.lazy,
+            'tree_class' : self.tree_class,
+        }
+
+    @property
+    def input_path(self):
+        return self._input_path
+
     def itertrees(self):
-        return self._itertreesfunc(self._input_path)
+        if self._itertreesfunc is itertrees:
+            return itertrees(self._input_path, **self.get_tree_options())
+
+        return itertrees_dir(self._input_path, self.recursive,
+                             **self.get_tree_options())
 
     @abstractmethod
     def print_report_basic(self, *args, **kwargs):
@@ -142,6 +257,11 @@ class BaseAnalyzer(metaclass=ABCMeta):
             "Inheriting classes must override and implement this method."
         )
 
+    def set_analysis_options(self, options):
+        """Apply a dict of settings as returned by get_analysis_options."""
+        for name, value in options.items():
+            setattr(self, name, value)
+
     @abstractmethod
     def write_report_basic(self, *args, **kwargs):
         raise NotImplementedError(
@@ -159,12 +279,21 @@ class SubjectVerbAnalyzer(BaseAnalyzer):
     """
     ATTRIBUTES:
     ===========
-    * allowed_verb_tags
+    * allowed_verb_tags - Tuple of tag prefixes that identify a verb.
     * input_path
     * subject_descriptor
 
     Populated by do_analysis:
     ------------------------------
+      * result - results.SubjectVerbResult holding all of the below. May be
+                 replaced, e.g. by a result merged from several runs, before
+                 writing reports.
+      * pipeline_stats - pipeline.PipelineStats of the last pipelined
+                         analysis, or None.
+      * schedule_report - scheduler.ScheduleReport of the last analysis run
+                          on several workers, or None.
+
+    Read-only aliases to the attributes of result:
       * failure_trees
       * ignored_tag_counts
       * subject_count
@@ -175,22 +304,27 @@ class SubjectVerbAnalyzer(BaseAnalyzer):
 
     METHODS:
     ========
+      * analyze_subjects
       * analyze_tree
       * do_analysis
+      * get_analysis_options
       * itersubjects
+      * prefilter
       * print_report_basic
       * print_report_full
       * write_report_basic
       * write_report_full
     """
-    def __init__(self, input_path, subject_descriptor):
-        """input_path may be to directory or existing .parse file."""
-        super().__init__(input_path)
+    def __init__(self, input_path, subject_descriptor, **kwargs):
+        """
+        input_path may be to directory or existing .parse file.
+        Any keyword arguments are passed to BaseAnalyzer.
+        """
+        super().__init__(input_path, **kwargs)
         
         self.subject_descriptor = subject_descriptor
-        self.allowed_verb_tags = (
-            'IV', 'PV', 'VERB', 'PSEUDO_VERB',
-        )
+        self.allowed_verb_tags = ALLOWED_VERB_TAGS
+        self._clause_memo = {}
 
         # Instantiate all counters/dictionaries populated by do_analysis
         self._reset()
@@ -202,49 +336,101 @@ class SubjectVerbAnalyzer(BaseAnalyzer):
         and dictionaries accordingly.
         A verb may appear multiple times in the returned list.
         """
-        self.tree_count += 1
+        if not self.prefilter(tree.treebank_notation):
+            return self.analyze_subjects(tree, ())
+
+        return self.analyze_subjects(tree, self.itersubjects(tree))
+
+    @property
+    def allowed_verb_tags(self):
+        return self._allowed_verb_tags
+
+    @allowed_verb_tags.setter
+    def allowed_verb_tags(self, tags):
+        self._allowed_verb_tags = tuple(tags)
+        self._verb_tag_cache = {}
+
+    def get_analysis_options(self):
+        """Return dict of allowed_verb_tags; see BaseAnalyzer."""
+        return {'allowed_verb_tags' : self._allowed_verb_tags}
+
+    def analyze_subjects(self, tree, subjects):
+        """
+        Count 'tree' and update counters and dictionaries for each of its
+        subject nodes 'subjects,' as found by itersubjects (or, for both
+        analyzers at once, by extract_subjects). Return list of associated
+        verbs found, as analyze_tree does.
+        """
+        counts = self.result
+        counts.tree_count += 1
+        self._clause_memo.clear()
+
         has_subject = False
+        has_failure = False
         valid_verbs = []
         
-        for node in self.itersubjects(tree):
+        for node in subjects:
             has_subject = True
-            self.subject_count += 1
+            counts.subject_count += 1
             sibtags = []
 
             result = self._get_associated_verb(node)
 
             # Success. Verb found
             if hasattr(result, 'tag'):
-                self.subject_w_verb_count += 1
-                update_distinct_counts(self.verb_counts, result.word)
+                counts.subject_w_verb_count += 1
+                update_distinct_counts(counts.verb_counts, result.word)
                 valid_verbs.append(result.word)
 
             # Failure.
             # Store sibling tags for reporting if no associated verb
-            # found matching allowed tags.
+            # found matching allowed tags, and record the tree by its first
+            # failing subject.
             else:
                 sibtags += result
                 for t in sibtags:
-                    update_distinct_counts(self.ignored_tag_counts, t)
-                self.failure_trees.add(tree)
+                    update_distinct_counts(counts.ignored_tag_counts, t)
 
-        self.tree_w_subject_count += 1 if has_subject else 0
+                if not has_failure:
+                    has_failure = True
+                    counts.failure_trees.add(FailureRecord.from_subject(
+                        tree, node, counts.tree_count - 1))
+
+        counts.tree_w_subject_count += 1 if has_subject else 0
+        self._clause_memo.clear()
 
         return valid_verbs
 
-    def do_analysis(self):
+    def do_analysis(self, workers=1, pipelined=False, pipeline_options=None):
         """
         For each tree in input_path (which may involve searching multiple
         files if input_path is a directory), search for subject matches
         using itersubjects and update counters and dictionaries accordingly.
+
+        If pipelined is True, files are read, trees built and trees analyzed
+        in overlapping stages by pipeline.run_pipeline, with trees parsed in
+        'workers' processes if workers > 1. Its PipelineStats is kept as
+        pipeline_stats. pipeline_options may be a dict of its other keyword
+        arguments, queue_depth and batch_size.
+
+        Otherwise, if workers > 1, the trees are analyzed in up to 'workers'
+        processes by scheduler.run_analysis, whose ScheduleReport is kept as
+        schedule_report. Results are identical to those of a serial run.
         """
         self._reset()
         
         print('Starting {0} search... '.format(
             self.subject_descriptor), end=''
         )
-        for tree in self.itertrees():
-            self.analyze_tree(tree)
+        if pipelined:
+            self.pipeline_stats = run_pipeline(
+                self, parse_workers=workers if workers > 1 else 0,
+                **(pipeline_options or {}))
+        elif workers > 1:
+            self.schedule_report = run_analysis(self, workers)
+        else:
+            for tree in self.itertrees():
+                self.analyze_tree(tree)
                 
         print('Complete.\n')
 
@@ -253,6 +439,45 @@ class SubjectVerbAnalyzer(BaseAnalyzer):
             "Inheriting classes must override and implement this method."
         )
 
+    def prefilter(self, notation):
+        """
+        Return False if the tree whose treebank notation is 'notation'
+        certainly has no subjects, so analyze_tree can skip it without
+        searching it (or, for a LazyParseTree, building it). Must never
+        return False for a tree that itersubjects would find a subject in.
+
+        The default accepts every tree.
+        """
+        return True
+
+    @property
+    def failure_trees(self):
+        return self.result.failure_trees
+
+    @property
+    def ignored_tag_counts(self):
+        return self.result.ignored_tag_counts
+
+    @property
+    def subject_count(self):
+        return self.result.subject_count
+
+    @property
+    def subject_w_verb_count(self):
+        return self.result.subject_w_verb_count
+
+    @property
+    def tree_count(self):
+        return self.result.tree_count
+
+    @property
+    def tree_w_subject_count(self):
+        return self.result.tree_w_subject_count
+
+    @property
+    def verb_counts(self):
+        return self.result.verb_counts
+
     def print_report_basic(self):
         self.write_report_basic(stdout)
 
@@ -315,27 +540,6 @@ class SubjectVerbAnalyzer(BaseAnalyzer):
             sortonval=True, reverse=True
         )
 
-    def _check_siblings_for_verb(self, node):
-        """
-        Check node's siblings for a verb node whose tag starts with a
-        value in allowed_verb_tags.
-
-        If valid verb found, return the sibling node which contains the verb.
-        If no match found, return a list of tags of visited siblings.
-        """
-        sibling_tags = []
-        
-        # Only check siblings above parent, as subject always follows
-        # verb as per the guidelines.
-        for sib in self._get_previous_siblings(node):
-            sibling_tags.append(sib.tag)
-
-            for tag in self.allowed_verb_tags:
-                if sib.tag.startswith(tag):
-                    return sib
-
-        return sibling_tags
-
     # TODO There are potential problems with this approach that need to
     # be resolved. Can an associated verb be nested inside a sibling of
     # one of the node's ancestors? Such verbs would not be found, and a
@@ -344,54 +548,85 @@ class SubjectVerbAnalyzer(BaseAnalyzer):
         """
         Return nearest verb node to passed 'node' by searching the previous
         siblings of 'node' and its ancestors until either a verb is found
-        or a VP node is reached.
+        or a VP node is reached. At each level, the first (leftmost) sibling
+        with a tag starting with a value in allowed_verb_tags is the verb.
         
         If no associated verb found, return list of tags of nodes visited
         during search.
         """
         visited_tags = []
 
+        # Only check siblings above parent, as subject always follows
+        # verb as per the guidelines.
         while node.parent is not None and not node.tag.startswith('VP'):
-            result = self._check_siblings_for_verb(node)
+            tags, verb_position, verb = self._get_clause(node.parent)
+            position = node.index_in_parent
 
             # Verb found in siblings. Return verb node
-            if hasattr(result, 'tag'):
-                return result
+            if verb_position < position:
+                return verb
 
-            visited_tags += result
+            visited_tags += tags[:position]
             node = node.parent
 
         return visited_tags
 
-    def _get_previous_siblings(self, node):
+    def _get_clause(self, parent):
         """
-        Yield the prior siblings of a tree as found in a depth-first traversal.
+        Return tuple (tags, verb position, verb) describing the children of
+        'parent': list of their tags, and the position and node of the first
+        child that is a verb (len(tags) and None if there is none).
+
+        Computed once per parent per tree, so subjects of the same clause
+        do not rescan its children; the memo is cleared by analyze_subjects.
         """
-        for child in node.parent.children:
-            if child == node:
-                return
+        try:
+            return self._clause_memo[parent]
+        except KeyError:
+            pass
+
+        children = parent.children
+        tags = [child.tag for child in children]
+        is_verb_tag = self._is_verb_tag
+        verb_position = len(tags)
+        verb = None
 
-            yield child
+        for i, tag in enumerate(tags):
+            if is_verb_tag(tag):
+                verb_position = i
+                verb = children[i]
+                break
+
+        clause = self._clause_memo[parent] = (tags, verb_position, verb)
+        return clause
+
+    def _is_verb_tag(self, tag):
+        """
+        Return True if 'tag' starts with a value in allowed_verb_tags.
+        Results are cached per tag until allowed_verb_tags is assigned.
+        """
+        try:
+            return self._verb_tag_cache[tag]
+        except KeyError:
+            is_verb = tag.startswith(self._allowed_verb_tags)
+            self._verb_tag_cache[tag] = is_verb
+            return is_verb
 
     def _reset(self):
         """
         Reset all class attributes to initial state.
         Called automatically before each analysis, and by constructor.
         """
-        self.tree_count = 0
-        self.tree_w_subject_count = 0
-        self.subject_count = 0
-        self.subject_w_verb_count = 0
-        self.verb_counts = {}
-        self.ignored_tag_counts = {}
-        self.failure_trees = set()
+        self.result = SubjectVerbResult()
+        self.pipeline_stats = None
+        self.schedule_report = None
 
 ###############################################################################
 class ProdropAnalyzer(SubjectVerbAnalyzer):
     """ """
-    def __init__(self, input_path):
+    def __init__(self, input_path, **kwargs):
         """input_path may be to directory or existing .parse file."""
-        super().__init__(input_path, 'pro-drop')
+        super().__init__(input_path, 'pro-drop', **kwargs)
 
     def itersubjects(self, tree):
         """
@@ -399,11 +634,19 @@ class ProdropAnalyzer(SubjectVerbAnalyzer):
         """
         return (node.parent for node in iterprodrops(tree))
 
+    def prefilter(self, notation):
+        """
+        Reject trees with no NP-SBJ node or no -NONE- node. The word of a
+        pro-drop is not tested, as words are stripped of '-{}' when a tree
+        is built.
+        """
+        return '(NP-SBJ' in notation and '(-NONE- ' in notation
+
 ###############################################################################
 class NonProdropAnalyzer(SubjectVerbAnalyzer):
     """ """
-    def __init__(self, input_path):
-        super().__init__(input_path, 'non-pro-drop')
+    def __init__(self, input_path, **kwargs):
+        super().__init__(input_path, 'non-pro-drop', **kwargs)
 
     # TODO Assuming a -NONE- tag always a direct child of NP-SBJ and not
     # further nested.
@@ -413,12 +656,11 @@ class NonProdropAnalyzer(SubjectVerbAnalyzer):
         whose tag is a variant of NP-SBJ, that does not have a child with a
         -NONE- tag.
         """
-        return (node.parent for node in tree.search(
-            parent_tag='NP-SBJ',
-            parent_flag=tree.STARTSWITH,
-            word=PRODROP_WORD_PATTERN,
-            word_flag=tree.NOT_REMATCH,
-        ))
+        return (node.parent for node in NONPRODROP_QUERY.search(tree))
+
+    def prefilter(self, notation):
+        """Reject trees with no NP-SBJ node."""
+        return '(NP-SBJ' in notation
 
 ###############################################################################
 class CombinedAnalyzer(BaseAnalyzer):
@@ -427,49 +669,131 @@ class CombinedAnalyzer(BaseAnalyzer):
 
     ATTRIBUTES:
       * input_path
-      * verb_counts
+      * result - results.CombinedResult, whose prodrop and nonprodrop
+                 results are those of prodrop_analyzer and
+                 nonprodrop_analyzer. Assigning a result (e.g. one merged
+                 from several runs) also assigns theirs.
+      * pipeline_stats - pipeline.PipelineStats of the last pipelined
+                         analysis, or None.
+      * schedule_report - scheduler.ScheduleReport of the last analysis run
+                          on several workers, or None.
+      * verb_counts (read-only) - Alias to result.verb_counts
 
     METHODS:
+      * analyze_tree
       * do_analysis
+      * get_analysis_options
+      * set_analysis_options
       * write_csv
     """
-    class VerbData:
-        """Utility object used for the values in verb_counts."""
-        def __init__(self):
-            self.prodrop_count = 0
-            self.nonprodrop_count = 0
+    # Alias kept for code that refers to CombinedAnalyzer.VerbData
+    VerbData = VerbData
             
-    def __init__(self, input_path):
-        """input_path can be file or directory."""
-        super().__init__(input_path)
+    def __init__(self, input_path, **kwargs):
+        """
+        input_path can be file or directory.
+        Any keyword arguments are passed to BaseAnalyzer.
+        """
+        super().__init__(input_path, **kwargs)
         
-        self.prodrop_analyzer = ProdropAnalyzer(input_path)
-        self.nonprodrop_analyzer = NonProdropAnalyzer(input_path)
+        self.prodrop_analyzer = ProdropAnalyzer(input_path, **kwargs)
+        self.nonprodrop_analyzer = NonProdropAnalyzer(input_path, **kwargs)
+        self._reset()
 
-    def do_analysis(self):
+    def analyze_tree(self, tree):
+        """
+        Analyze a single tree with both the pro-drop and non-pro-drop
+        analyzers, and update verb_counts accordingly.
+
+        Subjects of both kinds are found in a single pass over the end nodes
+        by extract_subjects, rather than by a search of each analyzer, with
+        identical results.
+        """
+        pdanalyzer = self.prodrop_analyzer
+        npdanalyzer = self.nonprodrop_analyzer
+        notation = tree.treebank_notation
+        pdcheck = pdanalyzer.prefilter(notation)
+        npdcheck = npdanalyzer.prefilter(notation)
+
+        if pdcheck or npdcheck:
+            prodrops, nonprodrops = extract_subjects(tree)
+        else:
+            prodrops = nonprodrops = ()
+
+        pdverbs = pdanalyzer.analyze_subjects(
+            tree, prodrops if pdcheck else ())
+        npdverbs = npdanalyzer.analyze_subjects(
+            tree, nonprodrops if npdcheck else ())
+        self._update_verb_counts(pdverbs, npdverbs)
+
+    def do_analysis(self, workers=1, pipelined=False, pipeline_options=None):
         """
         Perform the equivalent of running do_analysis on both a
         ProdropAnalyzer and NonProdropAnalyzer object, while being more
         efficient by only iterating through the .parse files once.
+
+        If pipelined is True, files are read, trees built and trees analyzed
+        in overlapping stages by pipeline.run_pipeline, with trees parsed in
+        'workers' processes if workers > 1. Its PipelineStats is kept as
+        pipeline_stats. pipeline_options may be a dict of its other keyword
+        arguments, queue_depth and batch_size.
+
+        Otherwise, if workers > 1, the trees are analyzed in up to 'workers'
+        processes by scheduler.run_analysis, whose ScheduleReport is kept as
+        schedule_report. Partial results are merged in corpus order, so
+        reports and write_csv output are identical to those of a serial run.
         """
-        self.verb_counts = {}
-        pa = self.prodrop_analyzer
-        npa = self.nonprodrop_analyzer
+        self._reset()
 
         print('Starting combined analysis... ', end='')
-        for tree in self.itertrees():
-            pdverbs = pa.analyze_tree(tree)
-            npdverbs = npa.analyze_tree(tree)
-            self._update_verb_counts(pdverbs, npdverbs)
+        if pipelined:
+            self.pipeline_stats = run_pipeline(
+                self, parse_workers=workers if workers > 1 else 0,
+                **(pipeline_options or {}))
+        elif workers > 1:
+            self.schedule_report = run_analysis(self, workers)
+        else:
+            for tree in self.itertrees():
+                self.analyze_tree(tree)
             
         print('Conplete.')
 
+    def get_analysis_options(self):
+        """
+        Return dict of the analysis options of prodrop_analyzer and
+        nonprodrop_analyzer, keyed by attribute name.
+        """
+        return {
+            'nonprodrop_analyzer' :
+                self.nonprodrop_analyzer.get_analysis_options(),
+            'prodrop_analyzer' : self.prodrop_analyzer.get_analysis_options(),
+        }
+
     def print_report_basic(self):
         self.write_report_basic(stdout)
 
     def print_report_full(self):
         self.write_report_full(stdout, stdout)
 
+    def set_analysis_options(self, options):
+        """Apply options as returned by get_analysis_options."""
+        for name, analyzer_options in options.items():
+            getattr(self, name).set_analysis_options(analyzer_options)
+
+    @property
+    def result(self):
+        return self._result
+
+    @result.setter
+    def result(self, result):
+        self._result = result
+        self.prodrop_analyzer.result = result.prodrop
+        self.nonprodrop_analyzer.result = result.nonprodrop
+
+    @property
+    def verb_counts(self):
+        return self._result.verb_counts
+
     def write_report_basic(self, out):
         rw = ReportWriter(out)
         
@@ -500,6 +824,12 @@ class CombinedAnalyzer(BaseAnalyzer):
         for verb, counts in self.verb_counts.items():
             writer.writerow([verb, counts.prodrop_count, counts.nonprodrop_count])
 
+    def _reset(self):
+        """Reset the results of both analyzers and verb_counts."""
+        self.result = CombinedResult()
+        self.pipeline_stats = None
+        self.schedule_report = None
+
     def _update_verb_counts(self, pdverbs, npdverbs):
         for verb in pdverbs:
             if verb in self.verb_counts:
@@ -0,0 +1,145 @@
+"""
+test_corpus.py
+Author: Adam Beagle
+"""
+import os
+from os.path import join
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+import unittest
+
+from corpus import CorpusManifest, discover
+from exceptions import InputPathError, ManifestError
+from subjectverbanalysis import CombinedAnalyzer
+from test_subjectverbanalysis import (combined_outputs, make_corpus_dir,
+    run_quietly, TESTDATA_DIR, TESTDATA_FILES
+)
+from util import itertrees, itertrees_dir
+
+class DiscoverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.root = self.tempdir.name
+
+        # root/b.parse, root/a/x.parse, root/a/00/y.PARSE, root/skip/z.parse
+        for relpath in ('b.parse', 'a/x.parse', 'a/00/y.PARSE',
+                        'skip/z.parse', 'a/notes.txt'):
+            path = join(self.root, *relpath.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            copyfile(join(TESTDATA_DIR, TESTDATA_FILES[0]), path)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def relpaths(self, *args, **kwargs):
+        return [f.relpath for f in discover(self.root, *args, **kwargs)]
+
+    def test_recursive(self):
+        self.assertEqual(self.relpaths(),
+            ['a/00/y.PARSE', 'a/x.parse', 'b.parse', 'skip/z.parse'])
+
+    def test_not_recursive(self):
+        self.assertEqual(self.relpaths(recursive=False), ['b.parse'])
+
+    def test_globs(self):
+        self.assertEqual(self.relpaths(exclude=['skip']),
+            ['a/00/y.PARSE', 'a/x.parse', 'b.parse'])
+        self.assertEqual(self.relpaths(exclude=['a/*']),
+            ['b.parse', 'skip/z.parse'])
+        self.assertEqual(self.relpaths(include=['*.txt', 'x.*']),
+            ['a/notes.txt', 'a/x.parse'])
+
+    def test_sizes(self):
+        size = os.path.getsize(join(TESTDATA_DIR, TESTDATA_FILES[0]))
+        for f in discover(self.root):
+            self.assertEqual(f.size, size)
+            self.assertTrue(f.is_current())
+
+    def test_not_directory(self):
+        with self.assertRaises(InputPathError):
+            discover(join(self.root, 'b.parse'))
+
+    def test_itertrees_dir(self):
+        expected = []
+        for f in discover(self.root):
+            expected += [t.treebank_notation for t in itertrees(f.path)]
+
+        self.assertEqual(
+            [t.treebank_notation for t in itertrees_dir(self.root,
+                                                        recursive=True)],
+            expected
+        )
+        self.assertEqual(
+            len(list(itertrees_dir(self.root))),
+            len(list(itertrees(join(self.root, 'b.parse'))))
+        )
+
+class CorpusManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.root = join(self.tempdir.name, 'corpus')
+        os.mkdir(self.root)
+        make_corpus_dir(self.root)
+        self.manifest_path = join(self.tempdir.name, 'corpus.json')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_build(self):
+        manifest = CorpusManifest.build(self.root)
+
+        self.assertEqual(len(manifest), len(TESTDATA_FILES))
+        for f in manifest:
+            self.assertEqual(f.tree_count, len(list(itertrees(f.path))))
+            self.assertEqual(len(f.hash), 40)
+        self.assertEqual(manifest.total_size,
+                         sum(os.path.getsize(p) for p in manifest.filepaths))
+
+    def test_save_load(self):
+        manifest = CorpusManifest.build(self.root)
+        manifest.save(self.manifest_path)
+        loaded = CorpusManifest.load(self.manifest_path)
+
+        self.assertEqual(loaded.files, manifest.files)
+        self.assertEqual(loaded.tree_count, manifest.tree_count)
+        self.assertEqual(loaded.stale_files(), [])
+
+        with open(self.manifest_path, 'w') as f:
+            f.write('{"version": 1}')
+        with self.assertRaises(ManifestError):
+            CorpusManifest.load(self.manifest_path)
+
+    def test_stale_files(self):
+        manifest = CorpusManifest.build(self.root)
+        changed, removed = manifest.files[:2]
+
+        with open(changed.path, 'a', encoding='utf8') as f:
+            f.write('(TOP (NP (NN a)))\n\n')
+        os.remove(removed.path)
+
+        self.assertEqual(manifest.stale_files(), [changed, removed])
+
+class RecursiveAnalysisTestCase(unittest.TestCase):
+    def test_nested_corpus(self):
+        with TemporaryDirectory() as tempdir:
+            nested = join(tempdir, 'nested', 'deeper')
+            os.makedirs(nested)
+            flat = make_corpus_dir(tempdir)
+            make_corpus_dir(nested)
+
+            top_only = CombinedAnalyzer(flat)
+            everything = CombinedAnalyzer(flat, recursive=True)
+            run_quietly(top_only.do_analysis)
+            run_quietly(everything.do_analysis)
+
+            self.assertEqual(everything.prodrop_analyzer.tree_count,
+                             2*top_only.prodrop_analyzer.tree_count)
+
+            parallel = CombinedAnalyzer(flat, recursive=True)
+            run_quietly(parallel.do_analysis, workers=2)
+            self.assertEqual(combined_outputs(everything),
+                             combined_outputs(parallel))
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+test_flattree.py
+Author: Adam Beagle
+"""
+import unittest
+
+from flattree import FlatEndNode, FlatParseTree, FlatThruNode
+from parsetree import ARABIC_SENTENCE_POLICY, ParseTree, ParseTreeNode
+from subjectverbanalysis import CombinedAnalyzer
+from test_parsetree import (assert_node_addresses, assert_node_intervals,
+    assert_sibling_attributes, node_signature, TESTDATA_PATHS
+)
+from util import itertreelines
+
+def node_summary(node):
+    return (node.tag, node.word if node.is_end else None)
+
+class FlatParseTreeParityTestCase(unittest.TestCase):
+    """A FlatParseTree must behave exactly like a ParseTree."""
+    def setUp(self):
+        self.pairs = []
+
+        for path in TESTDATA_PATHS:
+            for lines in itertreelines(path):
+                self.pairs.append((ParseTree(lines), FlatParseTree(lines)))
+
+    def test_structure(self):
+        for tree, flat in self.pairs:
+            self.assertEqual(node_signature(tree.top), node_signature(flat.top))
+            self.assertEqual(tree.treebank_notation, flat.treebank_notation)
+
+    def test_iteration(self):
+        for tree, flat in self.pairs:
+            self.assertEqual([node_summary(n) for n in tree.iternodes()],
+                             [node_summary(n) for n in flat.iternodes()])
+            self.assertEqual([node_summary(n) for n in tree.iterendnodes()],
+                             [node_summary(n) for n in flat.iterendnodes()])
+            self.assertEqual(tree.sentence, flat.sentence)
+            self.assertEqual(list(tree.iterwords()), list(flat.iterwords()))
+            self.assertEqual(tree.get_sentence(ARABIC_SENTENCE_POLICY),
+                             flat.get_sentence(ARABIC_SENTENCE_POLICY))
+
+    def test_iteration_orders(self):
+        for tree, flat in self.pairs:
+            for order in (tree.PREORDER, tree.POSTORDER, tree.BREADTH_FIRST):
+                for max_depth in (None, 0, 1, 3):
+                    self.assertEqual(
+                        [node_summary(n) for n in tree.iternodes(
+                            order=order, max_depth=max_depth)],
+                        [node_summary(n) for n in flat.iternodes(
+                            order=order, max_depth=max_depth)]
+                    )
+
+    def test_search(self):
+        queries = (
+            {'tag': '-NONE-'},
+            {'tag': 'NP', 'tag_flag': ParseTree.STARTSWITH},
+            {'parent_tag': 'NP-SBJ', 'parent_flag': ParseTree.STARTSWITH},
+            {'word': '.'},
+            {'tag': 'PUNC', 'word': '"', 'word_flag': ParseTree.IS_NOT},
+            {'word': r'^\*(?:-\d+)?$', 'word_flag': ParseTree.NOT_REMATCH,
+             'parent_tag': 'NP-SBJ', 'parent_flag': ParseTree.STARTSWITH},
+            {'tag': 'NP-SBJ', 'tag_flag': ParseTree.STARTSWITH,
+             'ancestor_tag': 'VP', 'ancestor_flag': ParseTree.NOT_REMATCH},
+            {'word': '*', 'ancestor_tag': 'NP-SBJ'},
+            {'tag': 'NP', 'descendant_tag': 'NOUN',
+             'descendant_flag': ParseTree.CONTAINS, 'ancestor_tag': 'S'},
+        )
+
+        for tree, flat in self.pairs:
+            for query in queries:
+                self.assertEqual(
+                    [node_summary(n) for n in tree.search(**query)],
+                    [node_summary(n) for n in flat.search(**query)]
+                )
+
+    def test_classify_end_nodes(self):
+        classify = lambda tag, word: tag[0] if not tag == 'PUNC' else None
+        parent_match = lambda tag: tag.startswith('NP')
+
+        for tree, flat in self.pairs:
+            for match in (None, parent_match):
+                groups = tree.classify_end_nodes(classify, match)
+                flat_groups = flat.classify_end_nodes(classify, match)
+
+                self.assertEqual(list(groups), list(flat_groups))
+                for key, nodes in groups.items():
+                    self.assertEqual(
+                        [node_summary(n) for n in nodes],
+                        [node_summary(n) for n in flat_groups[key]]
+                    )
+
+    def test_sibling_attributes(self):
+        for tree, flat in self.pairs:
+            assert_sibling_attributes(self, flat)
+
+    def test_node_addresses(self):
+        for tree, flat in self.pairs:
+            assert_node_addresses(self, flat)
+            self.assertEqual([n.gorn_address for n in tree.iternodes()],
+                             [n.gorn_address for n in flat.iternodes()])
+
+    def test_node_intervals(self):
+        for tree, flat in self.pairs:
+            if len(flat._parents) < 200:
+                assert_node_intervals(self, flat)
+            self.assertEqual([n.subtree_end for n in tree.iternodes()],
+                             [n.subtree_end for n in flat.iternodes()])
+
+    def test_siblings(self):
+        for tree, flat in self.pairs:
+            for node, view in zip(tree.iternodes(), flat.iternodes()):
+                self.assertEqual(
+                    [node_summary(n) for n in tree.get_siblings(node)],
+                    [node_summary(n) for n in flat.get_siblings(view)]
+                )
+
+class FlatNodeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tree = FlatParseTree("""(TOP (S (NP (NNP John))
+   (VP (VPZ loves)
+       (NP (NNP Mary)))
+   (PUNC .))""".split('\n'))
+
+    def test_views(self):
+        top = self.tree.top
+        self.assertIsInstance(top, FlatThruNode)
+        self.assertIsInstance(top, ParseTreeNode)
+        self.assertIsNone(top.parent)
+
+        john = top.children[0].children[0].children[0]
+        self.assertIsInstance(john, FlatEndNode)
+        self.assertIsInstance(john, ParseTreeNode)
+        self.assertEqual(john.word, 'John')
+        self.assertFalse(john.has_children)
+        self.assertEqual(john.parent.parent, top.children[0])
+        self.assertEqual(john, self.tree.search(word='John')[0])
+        self.assertNotEqual(john, self.tree.search(word='Mary')[0])
+        self.assertEqual(len({john, self.tree.search(word='John')[0]}), 1)
+
+class FlatParseTreeAnalysisTestCase(unittest.TestCase):
+    def test_combined_analysis(self):
+        for path in TESTDATA_PATHS:
+            self._test_combined_analysis(path)
+
+    def _test_combined_analysis(self, path):
+        analyzer = CombinedAnalyzer(path)
+        flat_analyzer = CombinedAnalyzer(path, tree_class=FlatParseTree)
+        analyzer.do_analysis()
+        flat_analyzer.do_analysis()
+
+        for attr in ('prodrop_analyzer', 'nonprodrop_analyzer'):
+            a = getattr(analyzer, attr)
+            b = getattr(flat_analyzer, attr)
+            self.assertEqual(a.subject_count, b.subject_count)
+            self.assertEqual(a.subject_w_verb_count, b.subject_w_verb_count)
+            self.assertEqual(a.verb_counts, b.verb_counts)
+            self.assertEqual(a.ignored_tag_counts, b.ignored_tag_counts)
+            self.assertEqual(len(a.failure_trees), len(b.failure_trees))
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+test_incremental.py
+Author: Adam Beagle
+"""
+import os
+from os.path import join
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+import unittest
+
+from incremental import run_incremental
+from subjectverbanalysis import CombinedAnalyzer, NonProdropAnalyzer
+from test_scheduler import report_outputs
+from test_subjectverbanalysis import (combined_outputs, make_corpus_dir,
+    run_quietly
+)
+
+def subject_verb_analyzers(analyzer):
+    """Return list of the SubjectVerbAnalyzers 'analyzer' is or holds."""
+    if isinstance(analyzer, CombinedAnalyzer):
+        return [analyzer.prodrop_analyzer, analyzer.nonprodrop_analyzer]
+
+    return [analyzer]
+
+class IncrementalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.corpus_dir = join(self.tempdir.name, 'corpus')
+        self.store_dir = join(self.tempdir.name, 'store')
+        os.mkdir(self.corpus_dir)
+        make_corpus_dir(self.corpus_dir)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def assert_matches_full(self, analyzer_class=CombinedAnalyzer,
+                            verb_tags=None, workers=1):
+        """
+        Run incrementally and check against a full analysis. If given,
+        'verb_tags' is the allowed_verb_tags of both.
+        """
+        full = analyzer_class(self.corpus_dir)
+        incremental = analyzer_class(self.corpus_dir)
+        if verb_tags is not None:
+            for analyzer in (full, incremental):
+                for subanalyzer in subject_verb_analyzers(analyzer):
+                    subanalyzer.allowed_verb_tags = verb_tags
+
+        run_quietly(full.do_analysis)
+        report = run_incremental(incremental, self.store_dir, workers)
+
+        if analyzer_class is CombinedAnalyzer:
+            self.assertEqual(combined_outputs(full),
+                             combined_outputs(incremental))
+        else:
+            self.assertEqual(report_outputs(full),
+                             report_outputs(incremental))
+        self.assertEqual(list(full.verb_counts),
+                         list(incremental.verb_counts))
+
+        return report
+
+    def test_unchanged(self):
+        first = self.assert_matches_full()
+        second = self.assert_matches_full()
+
+        self.assertEqual(len(first.analyzed), 4)
+        self.assertEqual(second.analyzed, [])
+        self.assertEqual(second.reused, 4)
+        self.assertEqual(second.hashed, 0)
+
+    def test_modified_added_removed(self):
+        self.assert_matches_full()
+
+        modified = join(self.corpus_dir, 'simple_trees.parse')
+        with open(modified, 'a', encoding='utf8') as f:
+            f.write('(TOP (S (NP-SBJ (-NONE- *)) (VP (VBD went))))\n\n')
+        os.remove(join(self.corpus_dir, 'sample_prodrop_tree.parse'))
+        copyfile(join(self.corpus_dir, 'sample.parse'),
+                 join(self.corpus_dir, 'sample_copy.parse'))
+
+        report = self.assert_matches_full()
+
+        # The copy has the content of a file already analyzed.
+        self.assertEqual(report.analyzed, [modified])
+        self.assertEqual(report.reused, 3)
+        self.assertEqual(report.removed,
+                         [join(self.corpus_dir, 'sample_prodrop_tree.parse')])
+
+    def test_analyzers_stored_separately(self):
+        self.assert_matches_full(NonProdropAnalyzer)
+        report = self.assert_matches_full()
+
+        self.assertEqual(len(report.analyzed), 4)
+        self.assertEqual(self.assert_matches_full(NonProdropAnalyzer).reused,
+                         4)
+
+    def test_analysis_options_changed(self):
+        self.assert_matches_full()
+        report = self.assert_matches_full(verb_tags=['VERB'], workers=2)
+
+        # Results of other options are not reused.
+        self.assertEqual(len(report.analyzed), 4)
+        self.assertEqual(report.reused, 0)
+
+        report = self.assert_matches_full(NonProdropAnalyzer,
+                                          verb_tags=['VERB'], workers=2)
+        self.assertEqual(len(report.analyzed), 4)
+        self.assertEqual(self.assert_matches_full(verb_tags=['VERB']).reused,
+                         4)
+        self.assertEqual(self.assert_matches_full().reused, 4)
+
+    def test_failure_tree_ids(self):
+        run_incremental(CombinedAnalyzer(self.corpus_dir), self.store_dir)
+        analyzer = CombinedAnalyzer(self.corpus_dir)
+        run_incremental(analyzer, self.store_dir)
+
+        filepaths = set(analyzer.get_filepaths())
+        for failures in analyzer.result.failure_tree_sets():
+            for record in failures:
+                self.assertIn(record.filepath, filepaths)
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
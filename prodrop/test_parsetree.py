@@ -5,10 +5,121 @@ Author: Adam Beagle
 import re
 import unittest
 
-from exceptions import SearchFlagError
-from parsetree import (endnode_pattern, ParseTree, ParseTreeEndNode,
-    ParseTreeThruNode, thrunode_pattern
+from exceptions import (SearchFlagError, TraversalOrderError,
+    TreeConstructionError
 )
+from parsetree import (ARABIC_SENTENCE_POLICY, endnode_pattern,
+    LazyParseTree, ParseTree, ParseTreeEndNode, ParseTreeThruNode,
+    SentencePolicy, thrunode_pattern
+)
+from util import itertreelines, itertrees
+
+TESTDATA_PATHS = (
+    '../treebank_data/testdata/sample.parse',
+    '../treebank_data/testdata/sample_prodrop_tree.txt',
+    '../treebank_data/testdata/sample_tree_large.parse',
+    '../treebank_data/testdata/simple_trees.txt',
+)
+
+def node_signature(node):
+    """
+    Return nested tuple of (tag, word, children) describing the subtree
+    rooted at node. Used to compare trees built by different builders.
+    """
+    if node.is_end:
+        return (node.tag, node.word, ())
+
+    return (node.tag, None,
+        tuple(node_signature(child) for child in node.children)
+    )
+
+def assert_sibling_attributes(testcase, tree):
+    """
+    Check the sibling attributes of every node of 'tree' against its
+    parent's children.
+    """
+    for node in tree.iternodes():
+        if node.parent is None:
+            testcase.assertIsNone(node.index_in_parent)
+            continue
+
+        siblings = node.parent.children
+        i = siblings.index(node)
+        testcase.assertEqual(node.index_in_parent, i)
+        testcase.assertEqual(node.preceding_siblings, siblings[:i])
+        testcase.assertEqual(node.following_siblings, siblings[i + 1:])
+        testcase.assertEqual(node.previous_sibling,
+                             siblings[i - 1] if i else None)
+        testcase.assertEqual(node.next_sibling,
+                             siblings[i + 1] if i + 1 < len(siblings)
+                             else None)
+
+def assert_node_addresses(testcase, tree):
+    """
+    Check the node_id and gorn_address of every node of 'tree,' and that
+    node_at finds it by either.
+    """
+    nodes = list(tree.iternodes())
+
+    for i, node in enumerate(nodes):
+        address = []
+        ancestor = node
+        while ancestor.parent is not None:
+            address.insert(0, ancestor.index_in_parent)
+            ancestor = ancestor.parent
+
+        testcase.assertEqual(node.node_id, i)
+        testcase.assertEqual(node.gorn_address, tuple(address))
+        testcase.assertEqual(tree.node_at(i), node)
+        testcase.assertEqual(tree.node_at(node.gorn_address), node)
+        testcase.assertEqual(tree.node_at(list(address)), node)
+
+    end = tree.node_at(nodes[-1].gorn_address)
+    for key in (-1, len(nodes), (-1, ), (len(tree.top.children), ),
+                end.gorn_address + (0, )):
+        with testcase.assertRaises(IndexError):
+            tree.node_at(key)
+
+def proper_ancestors(node):
+    """Return list of the ancestors of 'node,' its parent first."""
+    ancestors = []
+    while node.parent is not None:
+        node = node.parent
+        ancestors.append(node)
+
+    return ancestors
+
+def proper_descendants(node):
+    """Return list of the descendants of 'node,' in depth-first order."""
+    descendants = []
+    for child in (() if node.is_end else node.children):
+        descendants.append(child)
+        descendants.extend(proper_descendants(child))
+
+    return descendants
+
+def assert_node_intervals(testcase, tree):
+    """
+    Check the subtree_end of every node of 'tree,' and ancestry and lowest
+    common ancestors of every pair of its nodes, against its parents.
+    """
+    nodes = list(tree.iternodes())
+
+    for node in nodes:
+        testcase.assertEqual(node.subtree_end,
+                             node.node_id + len(list(tree.iternodes(node))))
+
+        chain = [node] + proper_ancestors(node)
+        for other in nodes:
+            ancestors = proper_ancestors(other)
+            testcase.assertEqual(node.is_ancestor_of(other), node in ancestors)
+            testcase.assertEqual(other.is_descendant_of(node),
+                                 node in ancestors)
+
+            expected = next(a for a in chain
+                            if a == other or a in ancestors)
+            testcase.assertEqual(tree.lowest_common_ancestor(node, other),
+                                 expected)
 
 class ThruNodePatternTestCase(unittest.TestCase):
     def _test_failure(self, line):
@@ -231,6 +342,33 @@ class SimpleEnglishTreeTestCase(unittest.TestCase):
         
         
         
+    def test_sibling_navigation(self):
+        s, vp, punc = self.tree.search(tag='S')[0].children
+
+        self.assertEqual([n.index_in_parent for n in (s, vp, punc)],
+                         [0, 1, 2])
+        self.assertIsNone(self.tree.top.index_in_parent)
+        self.assertIs(vp.previous_sibling, s)
+        self.assertIs(vp.next_sibling, punc)
+        self.assertIsNone(s.previous_sibling)
+        self.assertIsNone(punc.next_sibling)
+        self.assertEqual(punc.preceding_siblings, (s, vp))
+        self.assertEqual(s.following_siblings, (vp, punc))
+        self.assertEqual(self.tree.top.following_siblings, ())
+
+    def test_compact_nodes(self):
+        for node in self.tree.iternodes():
+            self.assertFalse(hasattr(node, '__dict__'))
+            if not node.is_end:
+                self.assertIsInstance(node.children, tuple)
+
+        # Adding a child to a frozen node keeps children a tuple
+        node = self.tree.search(tag='VP')[0]
+        ParseTreeEndNode(node, 'NNP', 'Jane')
+        self.assertIsInstance(node.children, tuple)
+        self.assertEqual(len(node.children), 3)
+        self.assertEqual(node.children[2].word, 'Jane')
+
     def test_iterendnodes(self):
         correct_tag_order = ('NNP', 'VPZ', 'NNP', 'PUNC')
         correct_word_order = ('John', 'loves', 'Mary', '.')
@@ -255,6 +393,52 @@ class SimpleEnglishTreeTestCase(unittest.TestCase):
         # This ensures each was actually visited.
         self.assertEqual(visited, len(correct_tag_order))
         
+    def test_iternodes_orders(self):
+        t = self.tree
+
+        tags = [n.tag for n in t.iternodes(order=t.POSTORDER)]
+        self.assertEqual(tags,
+            ['NNP', 'NP', 'VPZ', 'NNP', 'NP', 'VP', 'PUNC', 'S', 'TOP'])
+
+        tags = [n.tag for n in t.iternodes(order=t.BREADTH_FIRST)]
+        self.assertEqual(tags,
+            ['TOP', 'S', 'NP', 'VP', 'PUNC', 'NNP', 'VPZ', 'NP', 'NNP'])
+
+        vp = t.search(tag='VP')[0]
+        tags = [n.tag for n in t.iternodes(node=vp)]
+        self.assertEqual(tags, ['VP', 'VPZ', 'NP', 'NNP'])
+
+        with self.assertRaises(TraversalOrderError):
+            tuple(t.iternodes(order=3))
+
+    def test_iternodes_max_depth(self):
+        t = self.tree
+
+        for order in (t.PREORDER, t.POSTORDER, t.BREADTH_FIRST):
+            self.assertEqual([n.tag for n in t.iternodes(order=order,
+                                                         max_depth=0)],
+                             ['TOP'])
+
+        tags = [n.tag for n in t.iternodes(max_depth=2)]
+        self.assertEqual(tags, ['TOP', 'S', 'NP', 'VP', 'PUNC'])
+
+        tags = [n.tag for n in t.iternodes(order=t.POSTORDER, max_depth=2)]
+        self.assertEqual(tags, ['NP', 'VP', 'PUNC', 'S', 'TOP'])
+
+        tags = [n.tag for n in t.iternodes(order=t.BREADTH_FIRST,
+                                           max_depth=3)]
+        self.assertEqual(tags,
+            ['TOP', 'S', 'NP', 'VP', 'PUNC', 'NNP', 'VPZ', 'NP'])
+
+    def test_iternodes_deep_tree(self):
+        """Traversal must not be limited by the recursion limit."""
+        depth = 5000
+        lines = ['(TOP ' + '(NP '*depth + '(NNP x)' + ')'*(depth + 1)]
+        tree = ParseTree(lines)
+
+        self.assertEqual(len(tuple(tree.iternodes())), depth + 2)
+        self.assertEqual(tree.search(tag='NNP')[0].word, 'x')
+
     def test_iterwords(self):
         correct_words = ('John', 'loves', 'Mary', '.')
         
@@ -333,6 +517,40 @@ class SimpleEnglishTreeTestCase(unittest.TestCase):
         with self.assertRaises(SearchFlagError) as cm:
             matches = t.search(tag='S', tag_flag=15)
 
+    def test_compile_query(self):
+        t = self.tree
+        other = ParseTree(['(TOP (S (NP (NNP Mary)) (VP (VPZ sleeps))))'])
+
+        query = ParseTree.compile_query(tag='NNP', word='^M',
+                                        word_flag=t.REMATCH)
+        self.assertTrue(query.end_nodes_only)
+        matches = query.search(t)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0].word, 'Mary')
+        matches = query.search(other)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0].word, 'Mary')
+
+        query = ParseTree.compile_query(parent_tag='VP')
+        self.assertFalse(query.end_nodes_only)
+        self.assertIsNone(query.tag_match)
+        self.assertEqual([n.tag for n in query.search(t)], ['VPZ', 'NP'])
+        self.assertEqual([n.tag for n in query.search(other)], ['VPZ'])
+
+        # Flags are checked when the query is compiled
+        with self.assertRaises(SearchFlagError):
+            ParseTree.compile_query(tag='S', parent_flag=15)
+
+    def test_invalid_regex_raises_before_search(self):
+        # Raised even though no node has the tag, so none would have been
+        # tested against the pattern.
+        for flag in (ParseTree.REMATCH, ParseTree.NOT_REMATCH):
+            with self.assertRaises(re.error):
+                ParseTree.compile_query(tag='NOT-A-TAG', word='(',
+                                        word_flag=flag)
+            with self.assertRaises(re.error):
+                self.tree.search(tag='NOT-A-TAG', word='(', word_flag=flag)
+
     def test_search_custom(self):
         t = self.tree
 
@@ -441,6 +659,351 @@ class ComplexArabicTreeTestCase(unittest.TestCase):
     def test_treebank_notation(self):
         self.assertEqual(self.rawdata, self.tree.treebank_notation)
     
+class IndexPolicyTestCase(unittest.TestCase):
+    """
+    Searches must return the same nodes whatever the indexing policy.
+    """
+    queries = (
+        {'tag': '-NONE-'},
+        {'tag': 'NP', 'tag_flag': ParseTree.STARTSWITH},
+        {'tag': 'NP-SBJ', 'tag_flag': ParseTree.STARTSWITH,
+         'parent_tag': 'VP'},
+        {'parent_tag': 'NP-SBJ', 'parent_flag': ParseTree.STARTSWITH},
+        {'word': '.'},
+        {'tag': 'PUNC', 'word': '.'},
+        {'tag': 'PUNC', 'word': '"', 'word_flag': ParseTree.IS_NOT},
+        {'tag': 'NOUN', 'tag_flag': ParseTree.CONTAINS, 'parent_tag': 'NP'},
+        {'tag': '-NONE-', 'word': r'^\*(?:-\d+)?$',
+         'word_flag': ParseTree.REMATCH, 'parent_tag': 'NP-SBJ',
+         'parent_flag': ParseTree.STARTSWITH},
+        {'tag': 'NOT-A-TAG'},
+        {'tag': 'S', 'parent_tag': '', 'parent_flag': ParseTree.STARTSWITH},
+        {'tag': 'NP-SBJ', 'tag_flag': ParseTree.STARTSWITH,
+         'ancestor_tag': 'VP', 'ancestor_flag': ParseTree.NOT_REMATCH},
+        {'tag': 'NP', 'tag_flag': ParseTree.STARTSWITH, 'ancestor_tag': 'S',
+         'descendant_tag': '-NONE-'},
+    )
+
+    def test_index_parity(self):
+        for path in TESTDATA_PATHS:
+            for lines in itertreelines(path):
+                trees = [ParseTree(lines, policy) for policy in (
+                    ParseTree.INDEX_NONE, ParseTree.INDEX_END_NODES,
+                    ParseTree.INDEX_FULL
+                )]
+
+                for query in self.queries:
+                    results = [tree.search(**query) for tree in trees]
+                    for i in (1, 2):
+                        self.assertEqual(
+                            [node_signature(n) for n in results[0]],
+                            [node_signature(n) for n in results[i]]
+                        )
+
+    def test_index_built_lazily(self):
+        lines = ['(TOP (S (NP (NNP John)) (VP (VPZ sleeps))))']
+
+        tree = ParseTree(lines, ParseTree.INDEX_FULL)
+        self.assertIsNone(tree._index)
+        tree.search(tag='NP', tag_flag=tree.CONTAINS)
+        self.assertIsNone(tree._index)
+        self.assertEqual(tree.search(tag='NNP')[0].word, 'John')
+        self.assertIsNotNone(tree._index)
+
+        tree = ParseTree(lines, ParseTree.INDEX_END_NODES)
+        tree.search(tag='NNP')
+        self.assertIsNone(tree._index)
+
+    def test_cache_end_nodes_deprecated(self):
+        lines = ['(TOP (S (NP (NNP John)) (VP (VPZ sleeps))))']
+
+        for cache_end_nodes, policy in ((False, ParseTree.INDEX_NONE),
+                                        (True, ParseTree.INDEX_END_NODES)):
+            with self.assertWarns(DeprecationWarning):
+                tree = ParseTree(lines, cache_end_nodes=cache_end_nodes)
+            self.assertEqual(tree._index_policy, policy)
+
+            with self.assertWarns(DeprecationWarning):
+                lazy = LazyParseTree(lines, cache_end_nodes=cache_end_nodes)
+            self.assertEqual(lazy.tree._index_policy, policy)
+
+            with self.assertWarns(DeprecationWarning):
+                trees = list(itertrees(TESTDATA_PATHS[0],
+                                       cache_end_nodes=cache_end_nodes))
+            self.assertEqual(trees[0]._index_policy, policy)
+
+class RelativeSearchTestCase(unittest.TestCase):
+    """
+    Ancestor and descendant constraints must select the same nodes as
+    checking the relatives of each node.
+    """
+    def setUp(self):
+        self.trees = [ParseTree(lines) for path in TESTDATA_PATHS
+                      for lines in itertreelines(path)]
+
+    def _assert_relatives(self, query, accepts):
+        """
+        Check that search(**query) finds the nodes found by a search without
+        its relative constraints for which accepts(node) is True.
+        """
+        plain = {k : v for k, v in query.items()
+                 if not k.startswith(('ancestor', 'descendant'))}
+
+        for tree in self.trees:
+            self.assertEqual(tree.search(**query),
+                [node for node in tree.search(**plain) if accepts(node)]
+            )
+
+    def test_ancestor(self):
+        self._assert_relatives(
+            {'tag': 'NP-SBJ', 'tag_flag': ParseTree.STARTSWITH,
+             'ancestor_tag': 'VP', 'ancestor_flag': ParseTree.STARTSWITH},
+            lambda node: any(a.tag.startswith('VP')
+                             for a in proper_ancestors(node))
+        )
+        self._assert_relatives(
+            {'word': '*', 'ancestor_tag': 'NP-SBJ'},
+            lambda node: any(a.tag == 'NP-SBJ'
+                             for a in proper_ancestors(node))
+        )
+
+    def test_descendant(self):
+        self._assert_relatives(
+            {'tag': 'S', 'descendant_tag': '-NONE-'},
+            lambda node: any(d.tag == '-NONE-'
+                             for d in proper_descendants(node))
+        )
+        self._assert_relatives(
+            {'tag': 'NP', 'tag_flag': ParseTree.STARTSWITH,
+             'descendant_tag': 'NOUN', 'descendant_flag': ParseTree.CONTAINS},
+            lambda node: any('NOUN' in d.tag
+                             for d in proper_descendants(node))
+        )
+
+    def test_negated(self):
+        # Not within any VP
+        self._assert_relatives(
+            {'tag': 'NP-SBJ', 'tag_flag': ParseTree.STARTSWITH,
+             'ancestor_tag': 'VP', 'ancestor_flag': ParseTree.NOT_REMATCH},
+            lambda node: not any(a.tag.startswith('VP')
+                                 for a in proper_ancestors(node))
+        )
+        self._assert_relatives(
+            {'tag': 'NP', 'ancestor_tag': 'VP',
+             'ancestor_flag': ParseTree.IS_NOT},
+            lambda node: not any(a.tag == 'VP'
+                                 for a in proper_ancestors(node))
+        )
+        # Containing no noun
+        self._assert_relatives(
+            {'tag': 'NP', 'descendant_tag': 'NOUN',
+             'descendant_flag': ParseTree.NOT_REMATCH},
+            lambda node: not any(d.tag.startswith('NOUN')
+                                 for d in proper_descendants(node))
+        )
+
+    def test_custom_and_combined(self):
+        starts = lambda phrase, tag: tag.startswith(phrase)
+        self._assert_relatives(
+            {'tag': '-NONE-', 'ancestor_tag': 'S', 'ancestor_flag':
+             ParseTree.CUSTOM, 'ancestor_func': starts},
+            lambda node: any(a.tag.startswith('S')
+                             for a in proper_ancestors(node))
+        )
+        self._assert_relatives(
+            {'tag': 'S', 'tag_flag': ParseTree.STARTSWITH,
+             'ancestor_tag': 'S', 'ancestor_flag': ParseTree.STARTSWITH,
+             'descendant_tag': 'VP', 'descendant_flag': ParseTree.STARTSWITH},
+            lambda node: (
+                any(a.tag.startswith('S') for a in proper_ancestors(node))
+                and any(d.tag.startswith('VP') for d in
+                        proper_descendants(node))
+            )
+        )
+
+    def test_unconstrained(self):
+        tree = self.trees[0]
+        self.assertEqual(tree.search(tag='NP', ancestor_tag=''),
+                         tree.search(tag='NP'))
+
+    def test_lowest_common_ancestor(self):
+        tree = ParseTree('(TOP (S (NP (NNP John)) (VP (VPZ loves) '
+                         '(NP (NNP Mary))) (PUNC .)))')
+        john, loves, mary, stop = tree.iterendnodes()
+        sentence = tree.top.children[0]
+        vp = loves.parent
+
+        self.assertIs(tree.lowest_common_ancestor(loves, mary), vp)
+        self.assertIs(tree.lowest_common_ancestor(mary, john), sentence)
+        self.assertIs(tree.lowest_common_ancestor(vp, mary), vp)
+        self.assertIs(tree.lowest_common_ancestor(mary), mary)
+        self.assertIs(tree.lowest_common_ancestor(loves, mary, stop),
+                      sentence)
+        self.assertIs(tree.lowest_common_ancestor(tree.top, john), tree.top)
+
+class BuilderParityTestCase(unittest.TestCase):
+    """
+    The single-pass builder must produce the same trees as the original
+    line-by-line builder.
+    """
+    def _assert_parity(self, lines):
+        single = ParseTree(lines, single_pass=True)
+        original = ParseTree(lines, single_pass=False)
+
+        self.assertEqual(node_signature(single.top),
+                         node_signature(original.top))
+        self.assertEqual(single.treebank_notation,
+                         original.treebank_notation)
+
+    def test_testdata_parity(self):
+        trees_compared = 0
+
+        for path in TESTDATA_PATHS:
+            for lines in itertreelines(path):
+                self._assert_parity(lines)
+                trees_compared += 1
+
+        self.assertTrue(trees_compared)
+
+    def test_whole_file_parity(self):
+        """Includes the BOM character at the head of the file."""
+        path = '../treebank_data/testdata/sample_tree_large.parse'
+        with open(path, encoding='utf8') as f:
+            rawdata = f.read()
+
+        self.assertEqual(rawdata[0], '\ufeff')
+        self._assert_parity(rawdata.split('\n'))
+
+    def test_sibling_attributes(self):
+        """Every builder records the position of each node."""
+        for path in TESTDATA_PATHS:
+            for lines in itertreelines(path):
+                tree = ParseTree(lines)
+                for built in (tree, ParseTree(lines, single_pass=False),
+                              ParseTree.from_preorder(
+                                  tree.treebank_notation,
+                                  *tree.to_preorder())):
+                    assert_sibling_attributes(self, built)
+
+    def test_node_addresses(self):
+        """Every builder numbers the nodes in preorder."""
+        for path in TESTDATA_PATHS:
+            for lines in itertreelines(path):
+                tree = ParseTree(lines)
+                for built in (tree, ParseTree(lines, single_pass=False),
+                              ParseTree.from_preorder(
+                                  tree.treebank_notation,
+                                  *tree.to_preorder())):
+                    assert_node_addresses(self, built)
+
+    def test_node_intervals(self):
+        """Every builder records the end of each subtree."""
+        # Every pair of nodes is checked, so the large tree is left out.
+        for path in (p for p in TESTDATA_PATHS if not 'large' in p):
+            for lines in itertreelines(path):
+                tree = ParseTree(lines)
+                for built in (tree, ParseTree(lines, single_pass=False),
+                              ParseTree.from_preorder(
+                                  tree.treebank_notation,
+                                  *tree.to_preorder())):
+                    assert_node_intervals(self, built)
+
+    def test_construction_errors(self):
+        for single_pass in (True, False):
+            with self.assertRaises(TreeConstructionError):
+                ParseTree(['(TOP (S (NP (NNP John) ]))'],
+                          single_pass=single_pass)
+
+        with self.assertRaises(TreeConstructionError):
+            ParseTree(['(TOP (S (NNP John)))))'])
+
+class SentenceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.trees = [ParseTree(lines) for path in TESTDATA_PATHS
+                      for lines in itertreelines(path)]
+        self.trees.append(ParseTree(
+            '(TOP (S (NP-SBJ (-NONE- *)) (VP (VBD went) (-NONE- *T*)) '
+            '(PUNC .)))'))
+
+    def concatenated_sentence(self, tree):
+        """The sentence as formerly built, word by word."""
+        sentence = ''
+        for i, node in enumerate(tree.iterendnodes()):
+            if node.tag == 'PUNC' or i == 0:
+                sentence += node.word
+            elif not node.tag == '-NONE-':
+                sentence += ' ' + node.word
+
+        return sentence
+
+    def test_matches_concatenation(self):
+        for tree in self.trees:
+            self.assertEqual(tree.sentence, self.concatenated_sentence(tree))
+            self.assertEqual(
+                list(tree.iterwords()),
+                [node.word for node in tree.iterendnodes()
+                 if node.tag != '-NONE-']
+            )
+
+        self.assertEqual(self.trees[-1].sentence, '* went.')
+
+    def test_policy(self):
+        tree = ParseTree(
+            '(TOP (S (NP-SBJ (-NONE- *)) (VP (FUT_PART sa) (VBD ktb) '
+            '(NP (NN kitAb) (POSS_PRON_3MS hu))) (PUNC .)))')
+
+        self.assertEqual(tree.get_sentence(ARABIC_SENTENCE_POLICY),
+                         'saktb kitAbhu.')
+        self.assertEqual(
+            tree.get_sentence(SentencePolicy(attach_left=(), skip=('-*', ),
+                                             keep_first=False)),
+            'sa ktb kitAb hu .'
+        )
+        self.assertEqual(ParseTree('(TOP (PUNC .))').sentence, '.')
+
+    def test_cache(self):
+        tree = self.trees[0]
+        policy = SentencePolicy(skip=('-NONE-', 'PUNC'))
+
+        sentence = tree.get_sentence(policy, cache=True)
+        equal_policy = SentencePolicy(skip=('-NONE-', 'PUNC'))
+        self.assertIs(tree.get_sentence(equal_policy), sentence)
+        self.assertNotEqual(tree.sentence, sentence)
+        self.assertEqual(tree.get_sentence(policy), sentence)
+
+class LazyParseTreeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.lines = """(TOP (S (NP (NNP John))
+   (VP (VPZ loves)
+       (NP (NNP Mary)))
+   (PUNC .))""".split('\n')
+
+    def test_built_on_first_use(self):
+        lazy = LazyParseTree(self.lines)
+        tree = ParseTree(self.lines)
+
+        self.assertEqual(lazy.treebank_notation, tree.treebank_notation)
+        self.assertFalse(lazy.is_built)
+
+        self.assertEqual(node_signature(lazy.top), node_signature(tree.top))
+        self.assertTrue(lazy.is_built)
+        self.assertIs(lazy.top, lazy.tree.top)
+        self.assertEqual(lazy.sentence, tree.sentence)
+
+    def test_search(self):
+        lazy = LazyParseTree(self.lines, ParseTree.INDEX_FULL)
+        query = ParseTree.compile_query(tag='NNP')
+
+        self.assertEqual([n.word for n in query.search(lazy)],
+                         ['John', 'Mary'])
+        self.assertEqual([n.word for n in lazy.search(word='loves')],
+                         ['loves'])
+
+    def test_missing_attribute(self):
+        lazy = LazyParseTree(self.lines)
+        with self.assertRaises(AttributeError):
+            lazy.no_such_attribute
+
 ##############################################################################
 if __name__ == '__main__':
     unittest.main()
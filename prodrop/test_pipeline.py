@@ -0,0 +1,108 @@
+"""
+test_pipeline.py
+Author: Adam Beagle
+"""
+from io import StringIO
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from exceptions import TreeConstructionError
+from flattree import FlatParseTree
+from pipeline import run_pipeline
+from subjectverbanalysis import CombinedAnalyzer, ProdropAnalyzer
+from test_results import record_fields
+from test_scheduler import report_outputs
+from test_subjectverbanalysis import (combined_outputs, make_corpus_dir,
+    run_quietly
+)
+
+class PipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.corpus_dir = make_corpus_dir(self.tempdir.name)
+        self.serial = CombinedAnalyzer(self.corpus_dir)
+        run_quietly(self.serial.do_analysis)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_matches_serial(self):
+        for queue_depth, batch_size in ((1, 1), (2, 7), (8, 64)):
+            analyzer = CombinedAnalyzer(self.corpus_dir)
+            stats = run_pipeline(analyzer, queue_depth=queue_depth,
+                                 batch_size=batch_size)
+
+            self.assertEqual(combined_outputs(self.serial),
+                             combined_outputs(analyzer))
+            self.assertEqual(list(self.serial.verb_counts),
+                             list(analyzer.verb_counts))
+            self.assertEqual(stats.tree_count,
+                             self.serial.prodrop_analyzer.tree_count)
+            self.assertEqual(
+                record_fields(analyzer.result.prodrop.failure_trees),
+                record_fields(self.serial.result.prodrop.failure_trees)
+            )
+
+            for queue_stats in stats.queues:
+                self.assertLessEqual(queue_stats.max_size, queue_depth)
+
+    def test_parse_workers(self):
+        analyzer = CombinedAnalyzer(self.corpus_dir, tree_class=FlatParseTree)
+        run_quietly(analyzer.do_analysis, workers=2, pipelined=True)
+
+        self.assertEqual(combined_outputs(self.serial),
+                         combined_outputs(analyzer))
+        self.assertEqual(analyzer.pipeline_stats.parse_workers, 2)
+        self.assertEqual(
+            record_fields(analyzer.result.prodrop.failure_trees),
+            record_fields(self.serial.result.prodrop.failure_trees)
+        )
+
+    def test_subject_verb_analyzer(self):
+        serial = ProdropAnalyzer(self.corpus_dir)
+        pipelined = ProdropAnalyzer(self.corpus_dir)
+        run_quietly(serial.do_analysis)
+        run_quietly(pipelined.do_analysis, pipelined=True)
+
+        self.assertEqual(report_outputs(serial), report_outputs(pipelined))
+
+    def test_pipeline_options(self):
+        analyzer = CombinedAnalyzer(self.corpus_dir)
+        run_quietly(analyzer.do_analysis, pipelined=True,
+                    pipeline_options={'queue_depth' : 1, 'batch_size' : 1})
+        stats = analyzer.pipeline_stats
+
+        self.assertEqual(combined_outputs(self.serial),
+                         combined_outputs(analyzer))
+        self.assertEqual(stats.queues[0].batches, stats.tree_count)
+        for queue_stats in stats.queues:
+            self.assertLessEqual(queue_stats.max_size, 1)
+
+    def test_backpressure(self):
+        # With one-tree batches and a queue of one, the reader outpaces
+        # the parser and must wait for it.
+        analyzer = CombinedAnalyzer(self.corpus_dir)
+        stats = run_pipeline(analyzer, queue_depth=1, batch_size=1)
+        text_stats = stats.queues[0]
+
+        self.assertEqual(text_stats.batches, stats.tree_count)
+        self.assertGreater(text_stats.full_waits, 0)
+
+        out = StringIO()
+        stats.write_report(out)
+        self.assertIn('text queue', out.getvalue())
+
+    def test_error_stops_pipeline(self):
+        path = join(self.corpus_dir, 'zz_bad.parse')
+        with open(path, 'w', encoding='utf8') as f:
+            f.write('(TOP (NP (NN a))))\n\n')
+
+        for parse_workers in (0, 1):
+            with self.assertRaises(TreeConstructionError):
+                run_pipeline(CombinedAnalyzer(self.corpus_dir), queue_depth=1,
+                             parse_workers=parse_workers, batch_size=1)
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+test_rawscan.py
+Author: Adam Beagle
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from exceptions import TreeConstructionError
+from rawscan import scan_corpus, scan_file, scan_notation
+from results import CombinedResult
+from scheduler import run_analysis
+from subjectverbanalysis import CombinedAnalyzer
+from test_parsetree import TESTDATA_PATHS
+from test_results import record_fields
+from test_subjectverbanalysis import make_corpus_dir
+
+# Subjects at several depths, with and without verbs before them, lookups
+# stopped by VP and TOP, nested TOP tags, and several subjects per NP-SBJ.
+EDGE_TREES = """(TOP (S (CONJ wa)
+        (NP-SBJ (-NONE- *))
+        (PV qAla)
+        (NP-OBJ (NOUN kitAb))))
+
+(TOP (S (VP (IV yaqra>u)
+            (NP-SBJ (-NONE- *-1))
+            (PP (PREP fy)
+                (NP (NP-SBJ (NOUN bayt)
+                            (-NONE- *))))))
+     (PUNC .))
+
+(TOP (S (NP-SBJ (NOUN Ahmad)
+                (ADJ kabIr))
+        (VP (PV kataba)
+            (SBAR (S (NP-SBJ-2 (-NONE- *T*))))))
+     (PUNC .))
+
+(TOP (TOP (S (NOUN x)
+             (PSEUDO_VERB <in~a)
+             (VERB kAna)
+             (S (NP (NP-SBJ (-NONE- *-3)))))))
+
+"""
+
+class RawScanTestCase(unittest.TestCase):
+    """Results must equal those of a CombinedAnalyzer, tree for tree."""
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def assert_matches_analyzer(self, filepath):
+        analyzer = CombinedAnalyzer(filepath)
+        run_analysis(analyzer, workers=1)
+        expected = analyzer.result
+        result = scan_file(filepath)
+
+        self.assertEqual(result, expected)
+        for attr in ('prodrop', 'nonprodrop'):
+            a = getattr(result, attr)
+            b = getattr(expected, attr)
+            self.assertEqual(record_fields(a.failure_trees),
+                             record_fields(b.failure_trees))
+            self.assertEqual(list(a.verb_counts), list(b.verb_counts))
+            self.assertEqual(list(a.ignored_tag_counts),
+                             list(b.ignored_tag_counts))
+        self.assertEqual(list(result.verb_counts), list(expected.verb_counts))
+
+    def test_testdata(self):
+        for path in TESTDATA_PATHS:
+            self.assert_matches_analyzer(path)
+
+    def test_edge_cases(self):
+        path = join(self.tempdir.name, 'edge.parse')
+        with open(path, 'w', encoding='utf8') as f:
+            f.write(EDGE_TREES)
+
+        self.assert_matches_analyzer(path)
+
+        result = scan_file(path)
+        self.assertEqual(result.prodrop.subject_count, 4)
+        self.assertEqual(result.nonprodrop.subject_count, 4)
+        self.assertTrue(result.prodrop.failure_trees)
+        self.assertTrue(result.nonprodrop.failure_trees)
+
+    def test_corpus(self):
+        corpus_dir = make_corpus_dir(self.tempdir.name)
+        expected = CombinedResult()
+        for path in TESTDATA_PATHS:
+            expected.merge(scan_file(path))
+
+        result = scan_corpus(corpus_dir)
+        self.assertEqual(result.prodrop.subject_count,
+                         expected.prodrop.subject_count)
+        self.assertEqual(result.verb_counts, expected.verb_counts)
+
+    def test_construction_errors(self):
+        for notation in ('(TOP (S (NP (NNP John) ]))',
+                         '(TOP (S (NNP John)))))'):
+            with self.assertRaises(TreeConstructionError):
+                scan_notation(notation, CombinedResult(), (None, 0, None))
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+test_results.py
+Author: Adam Beagle
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from exceptions import FailureRecordError, ResultFileError
+from flattree import FlatParseTree
+from parsetree import ParseTree
+from results import (CombinedResult, FailureRecord, SubjectVerbResult,
+    VerbData
+)
+from subjectverbanalysis import CombinedAnalyzer
+from test_subjectverbanalysis import make_corpus_dir, run_quietly
+from util import get_files_by_ext
+
+def record_fields(records):
+    """
+    Return sorted list of the fields of each FailureRecord of 'records,'
+    which compare equal by tree alone.
+    """
+    return sorted((r.filepath, r.ordinal, r.offset, r.node_path)
+                  for r in records)
+
+def make_result(verbs, tags, failures):
+    result = SubjectVerbResult()
+    result.tree_count = 2
+    result.tree_w_subject_count = 1
+    result.subject_count = len(verbs) + len(failures)
+    result.subject_w_verb_count = len(verbs)
+    for verb in verbs:
+        result.verb_counts[verb] = result.verb_counts.get(verb, 0) + 1
+    for tag in tags:
+        result.ignored_tag_counts[tag] = 1
+    result.failure_trees.update(failures)
+
+    return result
+
+class SubjectVerbResultTestCase(unittest.TestCase):
+    def test_merge(self):
+        a = make_result(['x', 'y', 'x'], ['NP'],
+                        [FailureRecord('a', 0, 0, (0, 1))])
+        b = make_result(['z', 'y'], ['NP', 'PP'],
+                        [FailureRecord('b', 3, 120, (1, ))])
+
+        total = a + b
+        self.assertEqual(total.tree_count, 4)
+        self.assertEqual(total.subject_count, 7)
+        self.assertEqual(total.subject_w_verb_count, 5)
+        self.assertEqual(list(total.verb_counts.items()),
+                         [('x', 2), ('y', 2), ('z', 1)])
+        self.assertEqual(total.ignored_tag_counts, {'NP' : 2, 'PP' : 1})
+        self.assertEqual(record_fields(total.failure_trees),
+                         [('a', 0, 0, (0, 1)), ('b', 3, 120, (1, ))])
+
+        # + leaves its operands unchanged; += merges in place
+        self.assertEqual(a.tree_count, 2)
+        a += b
+        self.assertEqual(a, total)
+
+    def test_save_load(self):
+        result = make_result(['x'], ['NP'], [FailureRecord('a', 0, 0, (0, ))])
+
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'result')
+            result.save(path)
+            self.assertEqual(SubjectVerbResult.load(path), result)
+
+            with self.assertRaises(ResultFileError):
+                CombinedResult.load(path)
+
+            with open(path, 'wb') as f:
+                f.write(b'not a result')
+            with self.assertRaises(ResultFileError):
+                SubjectVerbResult.load(path)
+
+class FailureRecordTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.analyzer = CombinedAnalyzer(make_corpus_dir(self.tempdir.name))
+        run_quietly(self.analyzer.do_analysis)
+        self.records = self.analyzer.result.prodrop.failure_trees
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_load_tree(self):
+        trees = {tree.source[:2] : tree for tree in self.analyzer.itertrees()}
+
+        self.assertTrue(self.records)
+        for record in self.records:
+            original = trees[(record.filepath, record.ordinal)]
+            self.assertEqual(original.source[2], record.offset)
+
+            for tree_class in (ParseTree, FlatParseTree):
+                tree = record.load_tree(tree_class)
+                self.assertEqual(tree.treebank_notation,
+                                 original.treebank_notation)
+                self.assertEqual(tree.source, original.source)
+
+                self.assertTrue(
+                    record.get_subject(tree).tag.startswith('NP-SBJ'))
+
+    def test_one_record_per_tree(self):
+        record = next(iter(self.records))
+        other = FailureRecord(record.filepath, record.ordinal, record.offset,
+                              (0, ))
+
+        self.assertEqual(record, other)
+        self.assertEqual(len({record, other}), 1)
+        self.assertNotEqual(record, FailureRecord(record.filepath,
+                                                  record.ordinal + 1,
+                                                  record.offset, (0, )))
+
+    def test_tree_without_source(self):
+        analyzer = CombinedAnalyzer(self.tempdir.name)
+        for tree in self.analyzer.itertrees():
+            tree.source = None
+            analyzer.analyze_tree(tree)
+
+        records = analyzer.result.prodrop.failure_trees
+        self.assertEqual(len(records), len(self.records))
+        for record in records:
+            self.assertIsNone(record.filepath)
+            with self.assertRaises(FailureRecordError):
+                record.load_tree()
+
+    def test_merge_trees_without_source(self):
+        """
+        Records of sourceless trees from separate results are kept apart
+        when the results are merged.
+        """
+        analyzers = []
+        for i in range(2):
+            analyzer = CombinedAnalyzer(self.tempdir.name)
+            for tree in self.analyzer.itertrees():
+                tree.source = None
+                analyzer.analyze_tree(tree)
+            analyzers.append(analyzer)
+
+        merged = analyzers[0].result + analyzers[1].result
+        self.assertEqual(len(merged.prodrop.failure_trees),
+                         2*len(self.records))
+        self.assertEqual(
+            len(merged.nonprodrop.failure_trees),
+            2*len(self.analyzer.result.nonprodrop.failure_trees)
+        )
+
+class CombinedResultTestCase(unittest.TestCase):
+    def test_merge_per_file_results(self):
+        """
+        Merging per-file results in file order gives the result of a single
+        analysis of the whole directory.
+        """
+        with TemporaryDirectory() as directory:
+            make_corpus_dir(directory)
+
+            whole = CombinedAnalyzer(directory)
+            run_quietly(whole.do_analysis)
+
+            merged = CombinedResult()
+            for path in get_files_by_ext(directory, '.parse',
+                                         prepend_dir=True):
+                part = CombinedAnalyzer(path)
+                run_quietly(part.do_analysis)
+                merged += part.result
+
+        self.assertEqual(whole.result, merged)
+        self.assertEqual(record_fields(whole.result.prodrop.failure_trees),
+                         record_fields(merged.prodrop.failure_trees))
+        self.assertEqual(list(whole.verb_counts), list(merged.verb_counts))
+
+    def test_assign_result(self):
+        result = CombinedResult()
+        result.verb_counts['x'] = VerbData(1, 2)
+        result.prodrop.subject_count = 5
+
+        analyzer = CombinedAnalyzer('../treebank_data/testdata/sample.parse')
+        analyzer.result = result
+        self.assertEqual(analyzer.prodrop_analyzer.subject_count, 5)
+        self.assertEqual(analyzer.verb_counts['x'], VerbData(1, 2))
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+test_scheduler.py
+Author: Adam Beagle
+"""
+from io import StringIO
+from os.path import getsize, join
+from tempfile import TemporaryDirectory
+import unittest
+
+from scheduler import plan_units, run_analysis
+from test_results import record_fields
+from subjectverbanalysis import (CombinedAnalyzer, NonProdropAnalyzer,
+    ProdropAnalyzer
+)
+from test_subjectverbanalysis import (combined_outputs, make_corpus_dir,
+    run_quietly
+)
+from treeindex import TreeIndex
+from util import get_parse_files, itertreetexts
+
+def report_outputs(analyzer):
+    """Return tuple of the basic and full reports of a SubjectVerbAnalyzer."""
+    basic = StringIO()
+    full = StringIO()
+    analyzer.write_report_basic(basic)
+    analyzer.write_report_full(full)
+
+    return basic.getvalue(), full.getvalue()
+
+class PlanUnitsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.filepaths = get_parse_files(make_corpus_dir(self.tempdir.name))
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_units_cover_every_tree_once(self):
+        for workers in (1, 2, 5):
+            units = plan_units(self.filepaths, workers)
+            texts = []
+
+            for unit in sorted(units, key=lambda unit: unit.corpus_order):
+                texts += itertreetexts(unit.filepath,
+                                       byte_range=unit.byte_range)
+
+            self.assertEqual(
+                texts,
+                [text for path in self.filepaths
+                 for text in itertreetexts(path)]
+            )
+
+    def test_large_files_split(self):
+        total = sum(getsize(path) for path in self.filepaths)
+        units = plan_units(self.filepaths, workers=4)
+        target = total // 16
+
+        self.assertGreater(len(units), len(self.filepaths))
+        for unit in units:
+            if unit.byte_range is not None:
+                start, stop = unit.byte_range
+                self.assertEqual(unit.size, stop - start)
+
+        # A split unit closes as soon as it reaches the target, so is
+        # smaller than the target plus one tree.
+        with TreeIndex.build(self.filepaths) as index:
+            longest = max(max(index.get_extents(path)[1])
+                          for path in self.filepaths)
+        self.assertTrue(all(unit.size < target + longest for unit in units))
+
+    def test_largest_first(self):
+        sizes = [unit.size for unit in plan_units(self.filepaths, 3)]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+
+class RunAnalysisTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.corpus_dir = make_corpus_dir(self.tempdir.name)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_subject_verb_matches_serial(self):
+        for analyzer_class in (ProdropAnalyzer, NonProdropAnalyzer):
+            serial = analyzer_class(self.corpus_dir)
+            scheduled = analyzer_class(self.corpus_dir)
+            run_quietly(serial.do_analysis)
+            report = run_analysis(scheduled, workers=1, units_per_worker=8)
+
+            self.assertGreater(report.unit_count, 4)
+            self.assertEqual(report_outputs(serial),
+                             report_outputs(scheduled))
+            self.assertEqual(list(serial.verb_counts),
+                             list(scheduled.verb_counts))
+
+    def test_combined_matches_serial(self):
+        serial = CombinedAnalyzer(self.corpus_dir)
+        scheduled = CombinedAnalyzer(self.corpus_dir)
+        run_quietly(serial.do_analysis)
+        run_analysis(scheduled, workers=1, units_per_worker=8)
+
+        self.assertEqual(combined_outputs(serial),
+                         combined_outputs(scheduled))
+        self.assertEqual(list(serial.verb_counts),
+                         list(scheduled.verb_counts))
+
+        for attr in ('prodrop', 'nonprodrop'):
+            self.assertEqual(
+                record_fields(getattr(scheduled.result, attr).failure_trees),
+                record_fields(getattr(serial.result, attr).failure_trees)
+            )
+
+    def test_single_file_workers(self):
+        path = join(self.corpus_dir, 'sample_tree_large.parse')
+        serial = ProdropAnalyzer(path)
+        scheduled = ProdropAnalyzer(path)
+        run_quietly(serial.do_analysis)
+        run_quietly(scheduled.do_analysis, workers=2)
+
+        self.assertEqual(report_outputs(serial), report_outputs(scheduled))
+        self.assertTrue(scheduled.schedule_report.workers)
+
+    def test_analysis_options_sent_to_workers(self):
+        serial = CombinedAnalyzer(self.corpus_dir)
+        scheduled = CombinedAnalyzer(self.corpus_dir)
+        for analyzer in (serial, scheduled):
+            analyzer.prodrop_analyzer.allowed_verb_tags = ['IV']
+            analyzer.nonprodrop_analyzer.allowed_verb_tags = ['VERB']
+        run_quietly(serial.do_analysis)
+        run_quietly(scheduled.do_analysis, workers=2)
+
+        self.assertEqual(combined_outputs(serial),
+                         combined_outputs(scheduled))
+
+        for analyzer_class in (ProdropAnalyzer, NonProdropAnalyzer):
+            default = analyzer_class(self.corpus_dir)
+            serial = analyzer_class(self.corpus_dir)
+            scheduled = analyzer_class(self.corpus_dir)
+            serial.allowed_verb_tags = scheduled.allowed_verb_tags = ['VERB']
+            run_quietly(default.do_analysis)
+            run_quietly(serial.do_analysis)
+            run_quietly(scheduled.do_analysis, workers=2)
+
+            self.assertEqual(report_outputs(serial),
+                             report_outputs(scheduled))
+            self.assertNotEqual(serial.subject_w_verb_count,
+                                default.subject_w_verb_count)
+
+    def test_report(self):
+        analyzer = CombinedAnalyzer(self.corpus_dir)
+        report = run_analysis(analyzer, workers=2)
+        out = StringIO()
+        report.write_report(out)
+
+        self.assertEqual(sum(units for units, busy in
+                             report.workers.values()), report.unit_count)
+        for fraction in report.utilization().values():
+            self.assertGreaterEqual(fraction, 0)
+        self.assertIn('utilization', out.getvalue())
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
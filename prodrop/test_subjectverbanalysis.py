@@ -1,7 +1,49 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import basename, join
 import re
+from shutil import copyfile
+from tempfile import TemporaryDirectory
 import unittest
 
-from subjectverbanalysis import PRODROP_WORD_PATTERN
+from flattree import FlatParseTree
+from parsetree import LazyParseTree, ParseTree
+from subjectverbanalysis import (CombinedAnalyzer, extract_subjects,
+    NonProdropAnalyzer, PRODROP_WORD_PATTERN, ProdropAnalyzer
+)
+
+TESTDATA_DIR = '../treebank_data/testdata'
+TESTDATA_FILES = ('sample.parse', 'sample_prodrop_tree.txt',
+                  'sample_tree_large.parse', 'simple_trees.txt')
+
+def make_corpus_dir(directory):
+    """
+    Copy the test data into 'directory' as .parse files, so that each file
+    is picked up by a directory analysis. Return 'directory.'
+    """
+    for filename in TESTDATA_FILES:
+        copyfile(join(TESTDATA_DIR, filename),
+                 join(directory, basename(filename).split('.')[0] + '.parse'))
+
+    return directory
+
+def combined_outputs(analyzer):
+    """
+    Return tuple of the basic report, both full reports and the csv written
+    by a CombinedAnalyzer.
+    """
+    outputs = [StringIO() for i in range(4)]
+
+    analyzer.write_report_basic(outputs[0])
+    analyzer.write_report_full(outputs[1], outputs[2])
+    analyzer.write_csv(outputs[3])
+
+    return tuple(out.getvalue() for out in outputs)
+
+def run_quietly(func, *args, **kwargs):
+    """Call func, discarding anything it prints."""
+    with redirect_stdout(StringIO()):
+        return func(*args, **kwargs)
 
 class TestPropdropWordPattern(unittest.TestCase):
     def setUp(self):
@@ -47,6 +89,120 @@ class TestPropdropWordPattern(unittest.TestCase):
         m = re.match(p, '*1')
         self.assertIsNone(m)
 
+class CombinedAnalyzerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.corpus_dir = make_corpus_dir(self.tempdir.name)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_parallel_matches_serial(self):
+        serial = CombinedAnalyzer(self.corpus_dir)
+        parallel = CombinedAnalyzer(self.corpus_dir)
+        run_quietly(serial.do_analysis)
+        run_quietly(parallel.do_analysis, workers=2)
+
+        self.assertTrue(serial.prodrop_analyzer.subject_count)
+        self.assertEqual(combined_outputs(serial), combined_outputs(parallel))
+        self.assertEqual(list(serial.verb_counts),
+                         list(parallel.verb_counts))
+
+    def test_repeated_analysis(self):
+        analyzer = CombinedAnalyzer(self.corpus_dir)
+        run_quietly(analyzer.do_analysis)
+        first = combined_outputs(analyzer)
+        run_quietly(analyzer.do_analysis)
+
+        self.assertEqual(first, combined_outputs(analyzer))
+
+    def test_lazy_matches_eager(self):
+        eager = CombinedAnalyzer(self.corpus_dir)
+        lazy = CombinedAnalyzer(self.corpus_dir, lazy=True)
+        run_quietly(eager.do_analysis)
+        run_quietly(lazy.do_analysis)
+
+        self.assertEqual(combined_outputs(eager), combined_outputs(lazy))
+
+class PrefilterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.prodrop = ProdropAnalyzer(TESTDATA_DIR)
+        self.nonprodrop = NonProdropAnalyzer(TESTDATA_DIR)
+
+    def test_rejected_tree_not_built(self):
+        tree = LazyParseTree(['(TOP (S (NP (NNP John))', ' (PUNC .))'])
+
+        for analyzer in (self.prodrop, self.nonprodrop):
+            self.assertEqual(analyzer.analyze_tree(tree), [])
+            self.assertEqual(analyzer.tree_count, 1)
+
+        self.assertFalse(tree.is_built)
+
+    def test_no_subject_rejected(self):
+        """The prefilters never reject a tree that has subjects."""
+        for analyzer in (self.prodrop, self.nonprodrop):
+            for tree in analyzer.itertrees():
+                if not analyzer.prefilter(tree.treebank_notation):
+                    self.assertFalse(list(analyzer.itersubjects(tree)))
+
+class VerbLookupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = NonProdropAnalyzer(TESTDATA_DIR)
+        # Two subjects of one clause; the first of two verbs is associated.
+        self.tree = ParseTree(
+            '(TOP (S (CONJ w) (PV qAl) (IV ya) (NP-SBJ (NOUN a))'
+            ' (NP-SBJ (NOUN b)) (S (NP-SBJ (NOUN c)))))'
+        )
+
+    def test_first_verb(self):
+        self.assertEqual(self.analyzer.analyze_tree(self.tree),
+                         ['qAl', 'qAl', 'qAl'])
+
+    def test_allowed_verb_tags_assigned(self):
+        self.analyzer.analyze_tree(self.tree)
+        self.analyzer.allowed_verb_tags = ['IV']
+        self.assertEqual(self.analyzer.analyze_tree(self.tree),
+                         ['ya', 'ya', 'ya'])
+
+        self.analyzer.allowed_verb_tags = ['VERB']
+        self.assertEqual(self.analyzer.analyze_tree(self.tree), [])
+        self.assertEqual(self.analyzer.ignored_tag_counts['CONJ'], 3)
+
+class ExtractSubjectsTestCase(unittest.TestCase):
+    def test_matches_itersubjects(self):
+        prodrop = ProdropAnalyzer(TESTDATA_DIR)
+        nonprodrop = NonProdropAnalyzer(TESTDATA_DIR)
+
+        for tree_class, index_policy in ((ParseTree, ParseTree.INDEX_NONE),
+                                         (ParseTree, ParseTree.INDEX_FULL),
+                                         (FlatParseTree, 1)):
+            trees = CombinedAnalyzer(TESTDATA_DIR, tree_class=tree_class,
+                                     index_policy=index_policy).itertrees()
+            for tree in trees:
+                self.assertEqual(
+                    extract_subjects(tree),
+                    (list(prodrop.itersubjects(tree)),
+                     list(nonprodrop.itersubjects(tree)))
+                )
+
+    def test_combined_matches_separate(self):
+        separate = CombinedAnalyzer(TESTDATA_DIR)
+        prodrop = ProdropAnalyzer(TESTDATA_DIR)
+        nonprodrop = NonProdropAnalyzer(TESTDATA_DIR)
+        run_quietly(separate.do_analysis)
+        run_quietly(prodrop.do_analysis)
+        run_quietly(nonprodrop.do_analysis)
+
+        for analyzer, alone in ((separate.prodrop_analyzer, prodrop),
+                                (separate.nonprodrop_analyzer, nonprodrop)):
+            self.assertTrue(alone.subject_count)
+            for attr in ('tree_count', 'tree_w_subject_count',
+                         'subject_count', 'subject_w_verb_count',
+                         'verb_counts', 'ignored_tag_counts'):
+                self.assertEqual(getattr(analyzer, attr), getattr(alone, attr))
+            self.assertEqual(len(analyzer.failure_trees),
+                             len(alone.failure_trees))
+
 ###############################################################################
 if __name__ == '__main__':
     unittest.main()
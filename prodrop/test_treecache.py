@@ -0,0 +1,134 @@
+"""
+test_treecache.py
+Author: Adam Beagle
+"""
+import os
+from os.path import join
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+import unittest
+
+from exceptions import TreeCacheError
+from flattree import FlatParseTree
+from parsetree import ParseTree
+from subjectverbanalysis import CombinedAnalyzer
+from test_parsetree import node_signature, TESTDATA_PATHS
+from test_subjectverbanalysis import (combined_outputs, make_corpus_dir,
+    run_quietly
+)
+import treecache
+from util import itertrees
+
+class TreeCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.cache_dir = join(self.tempdir.name, 'cache')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_round_trip(self):
+        for path in TESTDATA_PATHS:
+            parsed = list(itertrees(path, cache_dir=self.cache_dir))
+            self.assertTrue(os.path.exists(
+                treecache.cache_path(path, self.cache_dir)))
+
+            for tree_class in (ParseTree, FlatParseTree):
+                loaded = treecache.load_trees(path, self.cache_dir,
+                                              tree_class=tree_class)
+                self.assertEqual(len(parsed), len(loaded))
+
+                for tree, cached in zip(parsed, loaded):
+                    self.assertIsInstance(cached, tree_class)
+                    self.assertEqual(node_signature(tree.top),
+                                     node_signature(cached.top))
+                    self.assertEqual(tree.treebank_notation,
+                                     cached.treebank_notation)
+                    self.assertEqual(tree.sentence, cached.sentence)
+
+    def test_index_policy(self):
+        path = TESTDATA_PATHS[0]
+        treecache.compile_corpus(path, self.cache_dir)
+
+        for policy in (ParseTree.INDEX_NONE, ParseTree.INDEX_FULL):
+            for tree, cached in zip(itertrees(path, index_policy=policy),
+                                    itertrees(path, index_policy=policy,
+                                              cache_dir=self.cache_dir)):
+                self.assertEqual(
+                    [node_signature(n) for n in tree.search(
+                        tag='NP', tag_flag=ParseTree.STARTSWITH)],
+                    [node_signature(n) for n in cached.search(
+                        tag='NP', tag_flag=ParseTree.STARTSWITH)]
+                )
+
+    def test_stale_cache(self):
+        path = join(self.tempdir.name, 'simple.parse')
+        copyfile(TESTDATA_PATHS[-1], path)
+        treecache.compile_corpus(path, self.cache_dir)
+        treecache.read_cache(path, self.cache_dir)
+
+        with open(path, 'a', encoding='utf8') as f:
+            f.write('\n(TOP (S (NP (NNP Extra))))\n\n')
+
+        with self.assertRaises(TreeCacheError):
+            treecache.read_cache(path, self.cache_dir)
+
+        # Stale cache is ignored, then rewritten
+        self.assertEqual(
+            list(itertrees(path, cache_dir=self.cache_dir))[-1].sentence,
+            'Extra'
+        )
+        treecache.read_cache(path, self.cache_dir)
+
+    def test_corrupt_cache(self):
+        path = TESTDATA_PATHS[0]
+        expected = [tree.treebank_notation for tree in itertrees(path)]
+
+        os.makedirs(self.cache_dir)
+        for data in (b'', b'not a cache', b'\x00' * 64):
+            with open(treecache.cache_path(path, self.cache_dir), 'wb') as f:
+                f.write(data)
+
+            with self.assertRaises(TreeCacheError):
+                treecache.read_cache(path, self.cache_dir)
+            self.assertIsNone(treecache.load_trees(path, self.cache_dir))
+            self.assertEqual(
+                [t.treebank_notation for t in itertrees(
+                    path, cache_dir=self.cache_dir)],
+                expected
+            )
+
+    def test_lazy_skipped_trees_not_built(self):
+        path = TESTDATA_PATHS[0]
+        cache = treecache.cache_path(path, self.cache_dir)
+
+        handles = list(itertrees(path, cache_dir=self.cache_dir, lazy=True))
+        self.assertFalse(any(handle.is_built for handle in handles))
+        self.assertFalse(os.path.exists(cache))
+
+        # Once every tree has been used, the cache can be written.
+        expected = []
+        for handle in itertrees(path, cache_dir=self.cache_dir, lazy=True):
+            expected.append(node_signature(handle.top))
+        self.assertTrue(os.path.exists(cache))
+        self.assertEqual(
+            [node_signature(tree.top) for tree in itertrees(
+                path, cache_dir=self.cache_dir, lazy=True)],
+            expected
+        )
+
+    def test_analysis(self):
+        corpus_dir = make_corpus_dir(self.tempdir.name)
+        expected = CombinedAnalyzer(corpus_dir)
+        run_quietly(expected.do_analysis)
+
+        # Once to write the caches, once to read them
+        for i in range(2):
+            analyzer = CombinedAnalyzer(corpus_dir, cache_dir=self.cache_dir)
+            run_quietly(analyzer.do_analysis)
+            self.assertEqual(combined_outputs(expected),
+                             combined_outputs(analyzer))
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+test_treeindex.py
+Author: Adam Beagle
+"""
+from os import remove
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from exceptions import TreeIndexError
+from flattree import FlatParseTree
+from test_parsetree import node_signature, TESTDATA_PATHS
+from test_subjectverbanalysis import make_corpus_dir
+from treeindex import TreeIndex
+from util import itertreelines, itertrees
+
+class TreeIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.index = TreeIndex.build(list(TESTDATA_PATHS))
+
+    def tearDown(self):
+        self.index.close()
+        self.tempdir.cleanup()
+
+    def test_notation(self):
+        tree_id = 0
+        for path in TESTDATA_PATHS:
+            for ordinal, lines in enumerate(itertreelines(path)):
+                self.assertEqual(self.index.get_notation((path, ordinal)),
+                                 ''.join(lines))
+                self.assertEqual(self.index.get_notation(tree_id),
+                                 ''.join(lines))
+                self.assertEqual(self.index.tree_id(path, ordinal), tree_id)
+                self.assertEqual(self.index.locate(tree_id),
+                                 (path, ordinal))
+                tree_id += 1
+
+        self.assertEqual(len(self.index), tree_id)
+
+    def test_get_tree(self):
+        path = TESTDATA_PATHS[0]
+        for ordinal, tree in enumerate(itertrees(path)):
+            for tree_class in (type(tree), FlatParseTree):
+                indexed = self.index.get_tree((path, ordinal),
+                                              tree_class=tree_class)
+                self.assertIsInstance(indexed, tree_class)
+                self.assertEqual(node_signature(tree.top),
+                                 node_signature(indexed.top))
+
+    def test_out_of_range(self):
+        for key in (-1, len(self.index), (TESTDATA_PATHS[0], 10**6),
+                    ('missing.parse', 0)):
+            with self.assertRaises(IndexError):
+                self.index.get_notation(key)
+
+    def test_directory(self):
+        corpus_dir = make_corpus_dir(self.tempdir.name)
+        with TreeIndex.build(corpus_dir) as index:
+            self.assertEqual(len(index), len(self.index))
+
+    def test_boundaries(self):
+        path = join(self.tempdir.name, 'edge.parse')
+        with open(path, 'w', encoding='utf8', newline='') as f:
+            f.write('(TOP (NP (NN a)))\r\n\r\n'
+                    '(TOP (NP (NN b))\n'
+                    '     (NP (NN c)))\n'
+                    '\n'
+                    '(TOP (NP (NN d)))')
+
+        with TreeIndex.build(path) as index:
+            self.assertEqual(
+                [index.get_notation(i) for i in range(len(index))],
+                ['(TOP (NP (NN a)))\n',
+                 '(TOP (NP (NN b))\n     (NP (NN c)))\n',
+                 '(TOP (NP (NN d)))']
+            )
+
+    def test_save_load(self):
+        index_path = join(self.tempdir.name, 'corpus.treeindex')
+        self.index.save(index_path)
+
+        with TreeIndex.load(index_path) as index:
+            self.assertEqual(index.filepaths, self.index.filepaths)
+            self.assertEqual(
+                [index.get_notation(i) for i in range(len(index))],
+                [self.index.get_notation(i) for i in range(len(index))]
+            )
+
+        with open(index_path, 'wb') as f:
+            f.write(b'not an index')
+        with self.assertRaises(TreeIndexError):
+            TreeIndex.load(index_path)
+
+    def test_stale(self):
+        path = join(self.tempdir.name, 'stale.parse')
+        index_path = join(self.tempdir.name, 'stale.treeindex')
+        with open(path, 'w', encoding='utf8') as f:
+            f.write('(TOP (NP (NN a)))\n\n')
+        TreeIndex.build(path).save(index_path)
+
+        with open(path, 'a', encoding='utf8') as f:
+            f.write('(TOP (NP (NN b)))\n\n')
+
+        with self.assertRaises(TreeIndexError):
+            TreeIndex.load(index_path)
+
+    def test_missing_file(self):
+        path = join(self.tempdir.name, 'missing.parse')
+        index_path = join(self.tempdir.name, 'missing.treeindex')
+        with open(path, 'w', encoding='utf8') as f:
+            f.write('(TOP (NP (NN a)))\n\n')
+        TreeIndex.build(path).save(index_path)
+
+        remove(path)
+
+        with self.assertRaises(TreeIndexError):
+            TreeIndex.load(index_path)
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+test_treepattern.py
+Author: Adam Beagle
+"""
+import pickle
+import re
+import unittest
+
+from exceptions import TreePatternError
+from flattree import FlatParseTree
+from parsetree import ParseTree
+from subjectverbanalysis import PRODROP_QUERY, PRODROP_WORD_PATTERN
+from test_parsetree import (node_signature, proper_ancestors,
+    proper_descendants, TESTDATA_PATHS
+)
+from treepattern import TreePattern
+from util import itertreelines
+
+# PRODROP_QUERY, used by iterprodrops, as a pattern
+PRODROP_PATTERN = TreePattern(
+    '-NONE- > /^NP-SBJ/ < /{0}/'.format(PRODROP_WORD_PATTERN)
+)
+
+def precedes(node, other):
+    """Return True if 'other' starts after the whole subtree of 'node.'"""
+    return other.node_id >= node.node_id + len(proper_descendants(node)) + 1
+
+def word_leaves(node):
+    """Return list of the words of the end nodes 'node' is or dominates."""
+    return [n.word for n in [node] + proper_descendants(node) if n.is_end]
+
+class TreePatternTestCase(unittest.TestCase):
+    """
+    Each pattern must match the same nodes as a check of the relatives of
+    every node.
+    """
+    def setUp(self):
+        self.trees = []
+        for path in TESTDATA_PATHS:
+            for lines in itertreelines(path):
+                self.trees.append(ParseTree(lines))
+                self.trees.append(FlatParseTree(lines))
+
+    def _assert_pattern(self, pattern, accepts):
+        compiled = TreePattern(pattern)
+        found = 0
+
+        for tree in self.trees:
+            expected = [node for node in tree.iternodes() if accepts(node)]
+            self.assertEqual(compiled.search(tree), expected)
+            found += len(expected)
+
+        self.assertTrue(found, pattern)
+
+    def test_descriptions(self):
+        np = re.compile('^NP').search
+
+        self._assert_pattern('-NONE-', lambda n: n.tag == '-NONE-')
+        self._assert_pattern('/^NP/', lambda n: np(n.tag))
+        self._assert_pattern('/SBJ/', lambda n: 'SBJ' in n.tag)
+        self._assert_pattern('__', lambda n: True)
+        self._assert_pattern('PUNC|/^NP/',
+                             lambda n: n.tag == 'PUNC' or np(n.tag))
+
+    def test_parent_and_child(self):
+        self._assert_pattern(
+            '/^NP/ < -NONE-',
+            lambda n: n.tag.startswith('NP')
+                and any(c.tag == '-NONE-' for c in n.children)
+        )
+        self._assert_pattern(
+            '__ > /^VP/',
+            lambda n: n.parent is not None and n.parent.tag.startswith('VP')
+        )
+        self._assert_pattern(
+            '__ > (/^NP/ < -NONE-)',
+            lambda n: n.parent is not None
+                and n.parent.tag.startswith('NP')
+                and any(c.tag == '-NONE-' for c in n.parent.children)
+        )
+
+    def test_dominance(self):
+        self._assert_pattern(
+            'S << -NONE-',
+            lambda n: n.tag == 'S'
+                and any(d.tag == '-NONE-' for d in proper_descendants(n))
+        )
+        self._assert_pattern(
+            '-NONE- >> /^VP/',
+            lambda n: n.tag == '-NONE-'
+                and any(a.tag.startswith('VP') for a in proper_ancestors(n))
+        )
+
+    def test_sisters(self):
+        self._assert_pattern(
+            '/^NP-SBJ/ $,, /^(PV|IV|VERB)/',
+            lambda n: n.tag.startswith('NP-SBJ') and any(
+                re.match('^(PV|IV|VERB)', s.tag) for s in n.preceding_siblings)
+        )
+        self._assert_pattern(
+            '/^NP/ $.. PUNC',
+            lambda n: n.tag.startswith('NP')
+                and any(s.tag == 'PUNC' for s in n.following_siblings)
+        )
+
+    def test_precedence(self):
+        for tree in self.trees[:40]:
+            nodes = list(tree.iternodes())
+            puncs = [n for n in nodes if n.tag == 'PUNC']
+            nps = [n for n in nodes if n.tag.startswith('NP-SBJ')]
+
+            self.assertEqual(
+                TreePattern('/^NP-SBJ/ .. PUNC').search(tree),
+                [n for n in nps if any(precedes(n, p) for p in puncs)]
+            )
+            self.assertEqual(
+                TreePattern('PUNC ,, /^NP-SBJ/').search(tree),
+                [p for p in puncs if any(precedes(n, p) for n in nps)]
+            )
+
+    def test_words(self):
+        self._assert_pattern(
+            r'__ < /^\*/',
+            lambda n: n.is_end and n.word.startswith('*')
+        )
+        self._assert_pattern(
+            r'/^NP-SBJ/ << /^\*(?:-\d+)?$/',
+            lambda n: n.tag.startswith('NP-SBJ') and any(
+                re.match(r'^\*(?:-\d+)?$', w) for w in word_leaves(n))
+        )
+
+    def test_negation_and_grouping(self):
+        self._assert_pattern(
+            '/^NP-SBJ/ !< -NONE-',
+            lambda n: n.tag.startswith('NP-SBJ')
+                and not any(c.tag == '-NONE-' for c in n.children)
+        )
+        self._assert_pattern(
+            '/^S/ < (/^NP-SBJ/ < (-NONE- < *))',
+            lambda n: n.tag.startswith('S') and not n.is_end and any(
+                c.tag.startswith('NP-SBJ') and any(
+                    g.tag == '-NONE-' and g.word == '*' for g in c.children)
+                for c in n.children if not c.is_end)
+        )
+        self._assert_pattern(
+            '-NONE- > /^NP-SBJ/ !>> /^VP/',
+            lambda n: n.tag == '-NONE-'
+                and n.parent.tag.startswith('NP-SBJ')
+                and not any(a.tag.startswith('VP')
+                            for a in proper_ancestors(n))
+        )
+
+    def test_prodrop_pattern(self):
+        """PRODROP_PATTERN finds the nodes found by PRODROP_QUERY."""
+        found = 0
+        for tree in self.trees:
+            prodrops = PRODROP_PATTERN.search(tree)
+            self.assertEqual(prodrops, PRODROP_QUERY.search(tree))
+            found += len(prodrops)
+
+        self.assertTrue(found)
+
+    def test_reusable(self):
+        pattern = TreePattern('/^NP/ < NOUN')
+        first = [[node_signature(n) for n in pattern.search(tree)]
+                 for tree in self.trees]
+        second = [[node_signature(n) for n in pattern.search(tree)]
+                  for tree in self.trees]
+
+        self.assertEqual(first, second)
+        self.assertEqual(pattern.pattern, '/^NP/ < NOUN')
+
+    def test_pickle(self):
+        """Patterns of every description kind survive a pickle round trip."""
+        for pattern in ('__ < -NONE-', 'PUNC|NOUN', '/^NP/ > /^S/',
+                        '/^NP/|/^VP/', 'PUNC|/^NP/ << /^\\*/'):
+            compiled = TreePattern(pattern)
+            copy = pickle.loads(pickle.dumps(compiled))
+
+            self.assertEqual(copy.pattern, pattern)
+            for tree in self.trees[:40]:
+                self.assertEqual(
+                    [node_signature(n) for n in copy.search(tree)],
+                    [node_signature(n) for n in compiled.search(tree)]
+                )
+
+    def test_errors(self):
+        for pattern in ('', 'NP <', 'NP < (VP', 'NP VP', 'NP ! VP',
+                        '/[/', 'NP < )', 'NP & VP', '< NP', 'NP |'):
+            with self.assertRaises(TreePatternError):
+                TreePattern(pattern)
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+test_util.py
+Author: Adam Beagle
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from parsetree import ParseTree
+from test_parsetree import node_signature, TESTDATA_PATHS
+from treeindex import TreeIndex
+from util import itertreelines, itertrees, itertreetexts
+
+EDGE_FILES = {
+    'no_trailing_blank' : '(TOP (NP (NN a)))\n\n(TOP (NP (NN b)))\n',
+    'no_trailing_newline' : '(TOP (NP (NN a)))\n\n(TOP (NP (NN b)))',
+    'extra_blank_lines' : '\n\n(TOP (NP (NN a)))\n\n\n\n(TOP (NP\n (NN b)))\n\n\n',
+    'crlf' : '(TOP (NP (NN a))\r\n (NN c))\r\n\r\n(TOP (NP (NN b)))\r\n',
+    'crlf_blank_lines' : '\r\n(TOP (NP (NN a)))\r\n\r\n\r\n(TOP (NP\r\n (NN b)))',
+    'restart' : '(TOP (NP (NN a))\n(TOP (NP (NN b)))\n\n',
+    'whitespace_line' : '(TOP (NP (NN a))\n   \n (NN c))\n\n',
+    'bom' : '\ufeff(TOP (NP (NN \u0627)))\n\n',
+    'empty' : '',
+}
+
+class IterTreeTextsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def assert_matches_lines(self, path):
+        expected = [''.join(lines) for lines in itertreelines(path)]
+
+        with TreeIndex.build(path) as index:
+            offsets = list(index.get_extents(path)[0])
+
+        for chunk_size in (1, 2, 7, 64, 1 << 20):
+            self.assertEqual(list(itertreetexts(path, chunk_size)), expected)
+            self.assertEqual(
+                list(itertreetexts(path, chunk_size, offsets=True)),
+                list(zip(offsets, expected))
+            )
+
+        return expected
+
+    def test_testdata(self):
+        for path in TESTDATA_PATHS:
+            self.assertTrue(self.assert_matches_lines(path))
+
+    def test_edge_files(self):
+        for name, content in EDGE_FILES.items():
+            path = join(self.tempdir.name, name + '.parse')
+            with open(path, 'w', encoding='utf8', newline='') as f:
+                f.write(content)
+
+            self.assert_matches_lines(path)
+
+    def test_last_tree_kept(self):
+        path = join(self.tempdir.name, 'last.parse')
+        with open(path, 'w', encoding='utf8') as f:
+            f.write(EDGE_FILES['no_trailing_newline'])
+
+        self.assertEqual([tree.sentence for tree in itertrees(path)],
+                         ['a', 'b'])
+
+    def test_string_notation(self):
+        for path in TESTDATA_PATHS:
+            for lines in itertreelines(path):
+                text = ''.join(lines)
+                for single_pass in (True, False):
+                    self.assertEqual(
+                        node_signature(ParseTree(text,
+                            single_pass=single_pass).top),
+                        node_signature(ParseTree(lines).top)
+                    )
+
+##############################################################################
+if __name__ == '__main__':
+    unittest.main()
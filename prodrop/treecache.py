@@ -0,0 +1,191 @@
+"""
+treecache.py
+Author: Adam Beagle
+
+PURPOSE:
+    Contains functions to compile .parse files into binary caches of their
+    already-parsed trees, and to load trees from those caches. Loading a tree
+    from a cache builds it directly from its stored nodes (see
+    ParseTree.from_preorder) rather than re-parsing its treebank notation.
+    The byte offset of each tree in its file is also stored, so loaded trees
+    have the same source as parsed ones.
+
+    Each .parse file has its own cache file in a cache directory. A cache is
+    keyed by the absolute path, modification time and size of its .parse
+    file, and is ignored if any of these no longer match.
+
+USAGE:
+    Caches are written automatically the first time a file is read through
+    util.itertrees (or any analyzer) with a cache_dir, or all at once with:
+
+    python treecache.py <.parse file or directory> <cache directory>
+
+    Directories are searched recursively.
+"""
+from array import array
+from hashlib import sha1
+import marshal
+import os
+from os.path import abspath, isdir, join
+import sys
+
+from exceptions import TreeCacheError
+from parsetree import ParseTree
+
+CACHE_EXT = '.treecache'
+
+# Increment whenever the layout of a cache file changes.
+FORMAT_VERSION = 2
+
+def cache_path(filepath, cache_dir):
+    """
+    Return path of the cache file of the .parse file given by 'filepath'
+    in directory 'cache_dir.'
+    """
+    key = sha1(abspath(filepath).encode('utf8')).hexdigest()
+    return join(cache_dir, key + CACHE_EXT)
+
+def compile_corpus(path, cache_dir, recursive=False):
+    """
+    Write a cache for every .parse file given by 'path,' which may be a
+    directory (searched as by util.itertrees_dir with the given
+    'recursive') or a single file. Return the number of trees cached.
+    """
+    # Imported here as util depends on this module.
+    from util import get_parse_files, itertreetexts
+
+    if isdir(path):
+        filepaths = get_parse_files(path, recursive)
+    else:
+        filepaths = [path]
+
+    tree_count = 0
+    for filepath in filepaths:
+        trees = []
+        texts = itertreetexts(filepath, offsets=True)
+        for ordinal, (offset, text) in enumerate(texts):
+            tree = ParseTree(text, ParseTree.INDEX_NONE)
+            tree.source = (filepath, ordinal, offset)
+            trees.append(tree)
+        write_cache(filepath, cache_dir, trees)
+        tree_count += len(trees)
+
+    return tree_count
+
+def load_trees(filepath, cache_dir, index_policy=ParseTree.INDEX_END_NODES,
+               tree_class=ParseTree):
+    """
+    Return list of the trees of the .parse file given by 'filepath' loaded
+    from its cache in 'cache_dir,' built as by tree_class(lines,
+    index_policy), with their source set as by util.itertrees. Return None
+    if there is no valid cache for the file.
+    """
+    try:
+        tags, encoded_trees = read_cache(filepath, cache_dir)
+    except TreeCacheError:
+        return None
+
+    trees = []
+    for ordinal, encoded in enumerate(encoded_trees):
+        tree = _decode_tree(tree_class, encoded, tags, index_policy)
+        tree.source = (filepath, ordinal, encoded[-1])
+        trees.append(tree)
+
+    return trees
+
+def read_cache(filepath, cache_dir):
+    """
+    Return tuple (tags, encoded_trees) read from the cache of the .parse
+    file given by 'filepath.'
+
+    TreeCacheError is raised if the cache does not exist, cannot be read,
+    or is stale.
+    """
+    path = cache_path(filepath, cache_dir)
+
+    try:
+        with open(path, 'rb') as f:
+            header, tags, encoded_trees = marshal.load(f)
+    except FileNotFoundError:
+        raise TreeCacheError("No cache exists for '{0}'.".format(filepath))
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        raise TreeCacheError(
+            "Could not read cache '{0}': {1}".format(path, e)
+        )
+
+    if not header == _make_header(filepath):
+        raise TreeCacheError(
+            "Cache '{0}' is stale or was written for another file or "
+            "version.".format(path)
+        )
+
+    return tags, encoded_trees
+
+def write_cache(filepath, cache_dir, trees):
+    """
+    Write cache of the iterable of ParseTree objects 'trees,' which must be
+    all trees of the .parse file given by 'filepath' in order, with their
+    source set as by util.itertrees.
+
+    The cache is written to a temporary file which then replaces any
+    existing cache, so a cache is never seen partially written.
+    """
+    tag_lookup = {}
+    encoded_trees = tuple(_encode_tree(tree, tag_lookup) for tree in trees)
+    tags = tuple(tag_lookup)
+    data = (_make_header(filepath), tags, encoded_trees)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(filepath, cache_dir)
+    temp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+
+    with open(temp_path, 'wb') as f:
+        marshal.dump(data, f)
+    os.replace(temp_path, path)
+
+def _decode_tree(tree_class, encoded, tags, index_policy):
+    notation, tag_ids, child_counts, words, offset = encoded
+
+    return tree_class.from_preorder(
+        notation,
+        [tags[i] for i in array('H', tag_ids)],
+        array('i', child_counts),
+        words,
+        index_policy
+    )
+
+def _encode_tree(tree, tag_lookup):
+    """
+    Return 'tree' as tuple of marshal-able values. Tags are stored as ids
+    into 'tag_lookup,' a dict of tag -> id shared by the whole file.
+    """
+    tags, child_counts, words = tree.to_preorder()
+
+    tag_ids = array('H')
+    for tag in tags:
+        try:
+            tag_ids.append(tag_lookup[tag])
+        except KeyError:
+            tag_ids.append(tag_lookup.setdefault(tag, len(tag_lookup)))
+
+    return (tree.treebank_notation, tag_ids.tobytes(),
+            array('i', child_counts).tobytes(), tuple(words),
+            tree.source[2])
+
+def _make_header(filepath):
+    """
+    Return tuple identifying the current state of the .parse file given by
+    'filepath' and the format of caches written for it.
+    """
+    stat = os.stat(filepath)
+
+    return (FORMAT_VERSION, marshal.version, sys.version_info[:2],
+            abspath(filepath), stat.st_mtime_ns, stat.st_size)
+
+###############################################################################
+if __name__ == '__main__':
+    if not len(sys.argv) == 3:
+        sys.exit('Usage: python treecache.py <input path> <cache directory>')
+
+    n = compile_corpus(sys.argv[1], sys.argv[2], recursive=True)
+    print('Cached {0} trees.'.format(n))
@@ -0,0 +1,308 @@
+"""
+treeindex.py
+Author: Adam Beagle
+
+PURPOSE:
+    Contains TreeIndex, an index of the byte offset and length of every tree
+    in a set of .parse files. Files are memory-mapped, so any tree can be
+    read by its position without reading the trees before it.
+
+USAGE:
+    Trees are identified either by a (filepath, ordinal) pair, where ordinal
+    is the position of the tree in its file as yielded by util.itertrees
+    (as held by a results.FailureRecord of failure_trees), or
+    by a global id, counting across all files in order:
+
+    with TreeIndex.build(TREEBANK_DATA_PATH) as index:
+        index.save('corpus.treeindex')
+        tree = index.get_tree(('../treebank_data/00/ann_0001.parse', 12))
+        sample = [index.get_tree(i)
+                  for i in random.sample(range(len(index)), 10)]
+"""
+from array import array
+from bisect import bisect_right
+import mmap
+import os
+from os.path import isdir, normpath
+import pickle
+
+from exceptions import TreeIndexError
+from parsetree import ParseTree
+
+# Increment whenever the layout of a saved index changes.
+FORMAT_VERSION = 1
+
+class TreeIndex:
+    """
+    ATTRIBUTES:
+      * filepaths (read-only) - Tuple of indexed files, in order.
+
+    METHODS:
+      * build (classmethod)
+      * close
+      * get_extents
+      * get_notation
+      * get_tree
+      * load (classmethod)
+      * locate
+      * save
+      * tree_id
+
+    len() of an index is its total number of trees. An index may be used
+    in a 'with' statement to close its memory maps on exit.
+    """
+    def __init__(self, filepaths, offsets, lengths, stats):
+        """
+        Indexes are created by build() or load(). 'offsets' and 'lengths'
+        hold an array('q') per file, and 'stats' an (mtime_ns, size) pair
+        per file.
+        """
+        self._filepaths = tuple(normpath(path) for path in filepaths)
+        self._offsets = offsets
+        self._lengths = lengths
+        self._stats = stats
+        self._file_lookup = {path : i for i, path in
+                             enumerate(self._filepaths)}
+        self._maps = {}
+
+        # _first_ids[i] is the global id of the first tree of file i
+        self._first_ids = []
+        total = 0
+        for file_offsets in offsets:
+            self._first_ids.append(total)
+            total += len(file_offsets)
+        self._tree_count = total
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._tree_count
+
+    @classmethod
+    def build(cls, path, recursive=False):
+        """
+        Return index of the .parse file(s) given by 'path,' which may be a
+        single file, a directory (whose .parse files are indexed as by
+        util.itertrees_dir with the given 'recursive') or a list of files.
+
+        Tree boundaries are exactly those used by util.itertreelines.
+        """
+        # Imported here as util depends on modules that may use this one.
+        from util import get_parse_files
+
+        if isinstance(path, (list, tuple)):
+            filepaths = path
+        elif isdir(path):
+            filepaths = get_parse_files(path, recursive)
+        else:
+            filepaths = [path]
+
+        offsets = []
+        lengths = []
+        stats = []
+        for filepath in filepaths:
+            file_offsets, file_lengths = _scan_file(filepath)
+            offsets.append(file_offsets)
+            lengths.append(file_lengths)
+            stats.append(_file_stat(filepath))
+
+        return cls(filepaths, offsets, lengths, stats)
+
+    def close(self):
+        """Close all open memory maps."""
+        for m in self._maps.values():
+            m.close()
+        self._maps.clear()
+
+    @property
+    def filepaths(self):
+        return self._filepaths
+
+    def get_extents(self, filepath):
+        """
+        Return tuple (offsets, lengths) of arrays giving the byte offset and
+        length of each tree of the indexed file 'filepath.'
+        """
+        try:
+            file_index = self._file_lookup[normpath(filepath)]
+        except KeyError:
+            raise IndexError("'{0}' is not in the index.".format(filepath))
+
+        return self._offsets[file_index], self._lengths[file_index]
+
+    def get_notation(self, key):
+        """
+        Return the treebank notation of the tree given by 'key,' either a
+        global id or a (filepath, ordinal) pair, exactly as it would be
+        given by the tree's treebank_notation.
+
+        IndexError is raised if there is no such tree.
+        """
+        file_index, ordinal = self._resolve(key)
+        start = self._offsets[file_index][ordinal]
+        end = start + self._lengths[file_index][ordinal]
+
+        text = self._get_map(file_index)[start:end].decode('utf8')
+
+        # Text mode, used by itertreelines, translates newlines
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+
+        return text
+
+    def get_tree(self, key, tree_class=ParseTree,
+                 index_policy=ParseTree.INDEX_END_NODES):
+        """
+        Return the tree given by 'key' (see get_notation) built as by
+        tree_class(lines, index_policy).
+        """
+        return tree_class([self.get_notation(key)], index_policy)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Return index saved to the file given by 'path' by save().
+
+        TreeIndexError is raised if the file does not hold an index, or if
+        any indexed file has changed or been removed since the index was
+        built.
+        """
+        try:
+            with open(path, 'rb') as f:
+                version, filepaths, offsets, lengths, stats = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+            raise TreeIndexError(
+                "Could not load index from '{0}': {1}".format(path, e)
+            )
+
+        if not version == FORMAT_VERSION:
+            raise TreeIndexError(
+                "Index '{0}' has format version {1}, expected {2}.".format(
+                    path, version, FORMAT_VERSION)
+            )
+
+        for filepath, stat in zip(filepaths, stats):
+            try:
+                unchanged = _file_stat(filepath) == stat
+            except OSError:
+                unchanged = False
+
+            if not unchanged:
+                raise TreeIndexError(
+                    "'{0}' has changed or is missing since index '{1}' was "
+                    "built.".format(filepath, path)
+                )
+
+        return cls(
+            filepaths,
+            [array('q', data) for data in offsets],
+            [array('q', data) for data in lengths],
+            stats
+        )
+
+    def locate(self, tree_id):
+        """Return (filepath, ordinal) pair of the tree with id 'tree_id.'"""
+        file_index, ordinal = self._resolve(tree_id)
+        return self._filepaths[file_index], ordinal
+
+    def save(self, path):
+        """Write index to the file given by 'path.'"""
+        data = (
+            FORMAT_VERSION,
+            self._filepaths,
+            [a.tobytes() for a in self._offsets],
+            [a.tobytes() for a in self._lengths],
+            self._stats
+        )
+
+        with open(path, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+
+    def tree_id(self, filepath, ordinal):
+        """Return global id of tree number 'ordinal' of file 'filepath.'"""
+        file_index, ordinal = self._resolve((filepath, ordinal))
+        return self._first_ids[file_index] + ordinal
+
+    def _get_map(self, file_index):
+        """Return memory map of file 'file_index,' opening it if needed."""
+        try:
+            return self._maps[file_index]
+        except KeyError:
+            pass
+
+        with open(self._filepaths[file_index], 'rb') as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._maps[file_index] = m
+        return m
+
+    def _resolve(self, key):
+        """
+        Return (file index, ordinal) of the tree given by 'key,' either a
+        global id or a (filepath, ordinal) pair.
+        """
+        if isinstance(key, tuple):
+            filepath, ordinal = key
+            try:
+                file_index = self._file_lookup[normpath(filepath)]
+            except KeyError:
+                raise IndexError(
+                    "'{0}' is not in the index.".format(filepath)
+                )
+
+            if not 0 <= ordinal < len(self._offsets[file_index]):
+                raise IndexError(
+                    "'{0}' has no tree {1}.".format(filepath, ordinal)
+                )
+        else:
+            if not 0 <= key < self._tree_count:
+                raise IndexError('Tree id out of range: {0}'.format(key))
+
+            # Last file whose first id is <= key. Files with no trees share
+            # the first id of the next file, so are never chosen.
+            file_index = bisect_right(self._first_ids, key) - 1
+            ordinal = key - self._first_ids[file_index]
+
+        return file_index, ordinal
+
+###############################################################################
+def _file_stat(filepath):
+    stat = os.stat(filepath)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _scan_file(filepath):
+    """
+    Return (offsets, lengths) of the trees in the .parse file given by
+    'filepath,' following the same rules as util.itertreelines: a line
+    starting with '(TOP ' starts a new tree, discarding any lines gathered
+    so far, a blank line ends the current tree, and other lines are added
+    to it. A tree left open at the end of the file is included.
+    """
+    offsets = array('q')
+    lengths = array('q')
+    start = None
+    pos = 0
+
+    with open(filepath, 'rb') as f:
+        for line in f:
+            if line.startswith(b'(TOP '):
+                start = pos
+            elif line in (b'\n', b'\r\n'):
+                if start is not None:
+                    offsets.append(start)
+                    lengths.append(pos - start)
+                    start = None
+            elif start is None:
+                start = pos
+
+            pos += len(line)
+
+    if start is not None:
+        offsets.append(start)
+        lengths.append(pos - start)
+
+    return offsets, lengths
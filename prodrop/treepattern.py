@@ -0,0 +1,419 @@
+r"""
+treepattern.py
+Author: Adam Beagle
+
+PURPOSE:
+    Contains TreePattern, a structural query on parse trees written in a
+    subset of the Tregex pattern language. A pattern is compiled once and
+    may then be run on any number of ParseTree or FlatParseTree objects,
+    e.g. on every tree of a corpus.
+
+DESCRIPTION:
+    A pattern describes a node by its tag, followed by any number of
+    relations to other nodes, each described in the same way.
+
+    NODE DESCRIPTIONS
+      NP-SBJ     - Node whose tag is exactly NP-SBJ.
+      /^NP-SBJ/  - Node whose tag is matched by the regular expression, as
+                   by re.search, i.e. anywhere in the tag unless anchored.
+      __         - Any node.
+      NP|/^S/    - Node matched by any of the alternatives.
+
+      Labels may contain any character but whitespace and ( ) < > ! | $ /
+      . , -- use a regular expression for any other tag.
+
+    RELATIONS
+      A < B      - A is the parent of B.
+      A << B     - A dominates (is a proper ancestor of) B.
+      A > B      - A is a child of B.
+      A >> B     - A is dominated by B.
+      A $.. B    - A is a sister of B and precedes it.
+      A $,, B    - A is a sister of B and follows it.
+      A .. B     - A precedes B, i.e. B starts after all of A.
+      A ,, B     - A follows B.
+
+    Relations following a node all apply to it: 'A < B > C' is an A with a
+    child B and parent C. Parentheses give a node relations of its own, as
+    in 'A < (B < C)', and '!' negates a relation: 'A !< B' is an A with no
+    child B.
+
+    As in Tregex, words are the leaves of a tree, each the only child of
+    its end node, so 'A < B' holds if A is an end node whose word B
+    describes, and 'A << B' if B describes the word of A or of any end node
+    A dominates. Words are reached through these two relations only, and a
+    description with relations of its own describes nodes only.
+
+    A search makes one pass over the nodes of a tree for each description,
+    listing the (node_id, subtree_end) interval of each node whose tag it
+    accepts, plus one over the end nodes where it may describe words. Each
+    relation then takes one pass over the candidates, and is resolved for
+    all of them at once by comparing intervals, parent ids and positions in
+    the parent, as ParseTree.search does for ancestor_tag and
+    descendant_tag. Each description tests each distinct tag and word of a
+    corpus only once. For 'A < B' and 'A > B' where B has no relations of
+    its own, B needs no pass of its own: the tags and words of the parents
+    of the candidates, or of the candidates themselves, are looked up by
+    node_id.
+
+    A pattern costs more per tree than a Query for the same nodes, so
+    ParseTree.compile_query remains the better choice for any search it
+    can express, e.g. that of iterprodrops.
+
+USAGE:
+    pattern = TreePattern(r'-NONE- > /^NP-SBJ/ < /^\*(?:-\d+)?$/')
+    for tree in itertrees('path/to/file.parse'):
+        prodrops = pattern.search(tree)
+"""
+from bisect import bisect_left
+import re
+
+from exceptions import TreePatternError
+
+pattern_token_pattern = re.compile(r"""
+      (?P<space>\s+)
+    | (?P<open>\()
+    | (?P<close>\))
+    | (?P<negation>!)
+    | (?P<alternative>\|)
+    | (?P<relation><<|<|>>|>|\$\.\.|\$,,|\.\.|,,)
+    | (?P<regex>/(?:[^/\\]|\\.)*/)
+    | (?P<label>[^\s()<>!|$/.,]+)
+    | (?P<error>.)
+""", re.VERBOSE | re.DOTALL)
+
+class TreePattern:
+    """
+    A compiled tree pattern. See the docstring of this module for the
+    pattern language.
+
+    ATTRIBUTES:
+      * pattern (read-only) - The pattern as written.
+
+    METHODS:
+      * search
+
+    TreePatternError is raised by the constructor if the pattern is
+    invalid.
+    """
+    def __init__(self, pattern):
+        self._pattern = pattern
+        self._root = _PatternParser(pattern).parse()
+
+    def __repr__(self):
+        return 'TreePattern({0!r})'.format(self._pattern)
+
+    def search(self, tree):
+        """
+        Return list of the nodes of 'tree' matched by the pattern, in
+        depth-first order.
+        """
+        return [tree.node_at(start)
+                for start, end in _select(self._root, tree)]
+
+    @property
+    def pattern(self):
+        return self._pattern
+
+class _PatternNode:
+    """
+    Node description of a pattern. accepts_tag and accepts_word test a tag
+    or word; relations is a list of (relation, negated, target
+    _PatternNode).
+
+    The results of accepts_tag and accepts_word are kept for each tag and
+    word, so each description tests each distinct tag or word of a corpus
+    only once.
+    """
+    __slots__ = ('accepts_tag', 'accepts_word', 'relations')
+
+    def __init__(self, match):
+        self.accepts_tag = _MatchMemo(match).__getitem__
+        self.accepts_word = _MatchMemo(match).__getitem__
+        self.relations = []
+
+class _PatternParser:
+    """Recursive descent parser of the pattern language."""
+    def __init__(self, pattern):
+        self._pattern = pattern
+        self._tokens = []
+        self._i = 0
+
+        for match in pattern_token_pattern.finditer(pattern):
+            kind = match.lastgroup
+            if kind == 'error':
+                self._error('Unexpected character', match.start())
+            elif not kind == 'space':
+                self._tokens.append((kind, match.group(), match.start()))
+
+    def parse(self):
+        """Return the root _PatternNode of the pattern."""
+        node = self._node()
+        if self._i < len(self._tokens):
+            self._error('Unexpected {0!r}'.format(self._tokens[self._i][1]))
+
+        return node
+
+    def _description(self):
+        """Parse alternatives separated by '|' and return a _PatternNode."""
+        literals = set()
+        searches = []
+
+        while True:
+            kind, text, pos = self._next('node description')
+            if kind == 'label':
+                literals.add(text)
+            elif kind == 'regex':
+                try:
+                    searches.append(re.compile(text[1:-1]).search)
+                except re.error as e:
+                    self._error('Invalid regular expression ({0})'.format(e),
+                                pos)
+            else:
+                self._error('Expected node description, got {0!r}'.format(
+                    text), pos)
+
+            if not self._peek() == 'alternative':
+                break
+            self._i += 1
+
+        if '__' in literals:
+            match = _accept_any
+        elif not searches:
+            match = frozenset(literals).__contains__
+        elif not literals and len(searches) == 1:
+            match = searches[0]
+        else:
+            match = _MatchAlternatives(literals, searches)
+
+        return _PatternNode(match)
+
+    def _error(self, reason, pos=None):
+        if pos is None:
+            pos = len(self._pattern)
+
+        raise TreePatternError(
+            '{0} at position {1} of pattern: {2}'.format(reason, pos,
+                                                         self._pattern)
+        )
+
+    def _next(self, expected):
+        """Return the next token, consuming it."""
+        if self._i == len(self._tokens):
+            self._error('Expected {0}, got end of pattern'.format(expected))
+
+        token = self._tokens[self._i]
+        self._i += 1
+        return token
+
+    def _node(self):
+        """Parse a node with the relations that follow it."""
+        node = self._target()
+
+        while self._peek() in ('negation', 'relation'):
+            negated = self._peek() == 'negation'
+            if negated:
+                self._i += 1
+
+            kind, relation, pos = self._next('relation')
+            if not kind == 'relation':
+                self._error('Expected relation after !', pos)
+
+            node.relations.append((relation, negated, self._target()))
+
+        return node
+
+    def _peek(self):
+        """Return the kind of the next token, or None at the end."""
+        if self._i == len(self._tokens):
+            return None
+
+        return self._tokens[self._i][0]
+
+    def _target(self):
+        """Parse a node description, or a parenthesized node."""
+        if not self._peek() == 'open':
+            return self._description()
+
+        self._i += 1
+        node = self._node()
+        kind, text, pos = self._next("')'")
+        if not kind == 'close':
+            self._error("Expected ')', got {0!r}".format(text), pos)
+
+        return node
+
+class _MatchMemo(dict):
+    """Dict of string -> whether 'match' accepts it, filled as looked up."""
+    __slots__ = ('_match', )
+
+    def __init__(self, match):
+        self._match = match
+
+    def __missing__(self, s):
+        accepted = self[s] = bool(self._match(s))
+        return accepted
+
+class _MatchAlternatives:
+    """
+    Callable accepting a string that is one of 'literals' or is matched by
+    any of 'searches.' A class rather than a closure so patterns pickle.
+    """
+    __slots__ = ('_literals', '_searches')
+
+    def __init__(self, literals, searches):
+        self._literals = frozenset(literals)
+        self._searches = tuple(searches)
+
+    def __call__(self, s):
+        return (s in self._literals
+                or any(search(s) for search in self._searches))
+
+def _accept_any(s):
+    return True
+
+def _accept_none(s):
+    return False
+
+def _any_between(ids, low, high):
+    """Return True if the sorted list 'ids' holds any id in [low, high)."""
+    k = bisect_left(ids, low)
+    return k < len(ids) and ids[k] < high
+
+def _select(node, tree):
+    """
+    Return list of (node_id, subtree_end) of each node of 'tree' matched by
+    the _PatternNode 'node,' in depth-first order.
+    """
+    candidates = tree._tag_intervals(node.accepts_tag)
+
+    for relation, negated, target in node.relations:
+        if not candidates:
+            break
+
+        found = _RELATIONS[relation](tree, candidates, target)
+        candidates = [candidate for candidate, ok in zip(candidates, found)
+                      if not ok == negated]
+
+    return candidates
+
+def _target_words(tree, target):
+    """
+    Return list of the node_id of each end node whose word 'target'
+    describes, in depth-first order.
+    """
+    if target.relations:
+        return []
+
+    return tree._word_node_ids(target.accepts_word)
+
+###############################################################################
+# Relations. Each returns list of whether each of 'candidates' has the
+# relation to any node matched by 'target.'
+def _dominates(tree, candidates, target):
+    starts = [start for start, end in _select(target, tree)]
+    words = _target_words(tree, target)
+
+    return [_any_between(starts, start + 1, end)
+            or _any_between(words, start, end)
+            for start, end in candidates]
+
+def _follows(tree, candidates, target):
+    intervals = _select(target, tree)
+    if not intervals:
+        return [False]*len(candidates)
+
+    first_end = min(end for start, end in intervals)
+    return [first_end <= start for start, end in candidates]
+
+def _is_child_of(tree, candidates, target):
+    ids = [start for start, end in candidates]
+    parent_ids = tree._parent_ids(ids)
+
+    if not target.relations:
+        # Only the tags of the parents need testing
+        accepts = target.accepts_tag
+        tags = tree._node_tags([max(parent, 0) for parent in parent_ids])
+        return [parent >= 0 and accepts(tag)
+                for parent, tag in zip(parent_ids, tags)]
+
+    parents = {start for start, end in _select(target, tree)}
+    return [parent in parents for parent in parent_ids]
+
+def _is_dominated_by(tree, candidates, target):
+    # Intervals either nest or are disjoint, so a candidate is within one
+    # iff it is before the furthest end of those that start before it.
+    intervals = _select(target, tree)
+    found = []
+    covered = 0
+    k = 0
+
+    for start, end in candidates:
+        while k < len(intervals) and intervals[k][0] < start:
+            covered = max(covered, intervals[k][1])
+            k += 1
+        found.append(start < covered)
+
+    return found
+
+def _is_parent_of(tree, candidates, target):
+    # The only child of an end node is its word, and thru nodes are parents
+    # of nodes only, so the nodes of 'target' are found only if a candidate
+    # is a thru node.
+    words = tree._node_words([start for start, end in candidates])
+    accepts_word = _accept_none if target.relations else target.accepts_word
+
+    parents = ()
+    if None in words:
+        ids = [start for start, end in _select(target, tree)]
+        parents = set(tree._parent_ids(ids))
+
+    return [start in parents if word is None else accepts_word(word)
+            for (start, end), word in zip(candidates, words)]
+
+def _is_sister_after(tree, candidates, target):
+    return _compare_sisters(tree, candidates, target, min,
+                            lambda position, first: position > first)
+
+def _is_sister_before(tree, candidates, target):
+    return _compare_sisters(tree, candidates, target, max,
+                            lambda position, last: position < last)
+
+def _compare_sisters(tree, candidates, target, choose, compare):
+    """
+    Return list of whether compare(position, chosen) is True for each of
+    'candidates,' where position is its index_in_parent and chosen the
+    position among its siblings chosen by 'choose' (min or max) of those
+    matched by 'target.'
+    """
+    targets = [start for start, end in _select(target, tree)]
+    chosen = {}
+    for parent, position in zip(tree._parent_ids(targets),
+                                tree._sibling_positions(targets)):
+        if parent in chosen:
+            chosen[parent] = choose(chosen[parent], position)
+        elif parent >= 0:
+            chosen[parent] = position
+
+    ids = [start for start, end in candidates]
+    return [parent in chosen and compare(position, chosen[parent])
+            for parent, position in zip(tree._parent_ids(ids),
+                                        tree._sibling_positions(ids))]
+
+def _precedes(tree, candidates, target):
+    intervals = _select(target, tree)
+    if not intervals:
+        return [False]*len(candidates)
+
+    last_start = intervals[-1][0]
+    return [end <= last_start for start, end in candidates]
+
+_RELATIONS = {
+    '<' : _is_parent_of,
+    '<<' : _dominates,
+    '>' : _is_child_of,
+    '>>' : _is_dominated_by,
+    '$..' : _is_sister_before,
+    '$,,' : _is_sister_after,
+    '..' : _precedes,
+    ',,' : _follows,
+}
@@ -6,12 +6,18 @@ DESCRIPTION:
     Utility module. Contains functions and classes that are useful and reusable
     throughout the project.
 """
+from bisect import bisect_left
 from datetime import datetime
 from os import listdir
 from os.path import join, normpath, splitext
 import time
 
-from parsetree import ParseTree
+import corpus
+from parsetree import LazyParseTree, ParseTree
+import treecache
+
+# Bytes read at a time by itertreetexts
+CHUNK_SIZE = 1 << 20
 
 def get_files_by_ext(directory, ext, prepend_dir=False):
     """
@@ -46,6 +52,8 @@ def itertreelines(filepath):
     represent a single parse tree. Yielded values are lists of strings,
     each a line as found in the file given by filepath. Line-end characters
     are retained.
+
+    See itertreetexts for a faster way to read the notation of each tree.
     """
     tree_start = '(TOP '
     tree_end = '\n'
@@ -70,25 +78,211 @@ def itertreelines(filepath):
                     yield current_tree_lines
                     current_tree_lines = []
 
-def itertrees(filepath, cache_end_nodes=1):
+    # Last tree of a file with no blank line after it
+    if current_tree_lines:
+        yield current_tree_lines
+
+def itertreetexts(filepath, chunk_size=CHUNK_SIZE, byte_range=None,
+                  offsets=False):
+    """
+    Yield the treebank notation of each tree of the .parse file given by
+    'filepath' as a single string. Yields exactly ''.join(lines) for each
+    list of lines yielded by itertreelines, but is considerably faster.
+
+    The file is read in binary chunks of 'chunk_size' bytes and split into
+    trees at blank lines with bytes.find, and each tree is decoded once.
+
+    If byte_range (start, stop) is given, only that part of the file is
+    read. start must be the offset of the start of a tree (or 0) and stop
+    the offset of the end of a tree (or the file size), as recorded by a
+    treeindex.TreeIndex.
+
+    If offsets is True, (offset, notation) pairs are yielded instead, where
+    offset is the byte offset in the file of the start of the tree.
+    """
+    pending = b''
+
+    with open(filepath, 'rb') as f:
+        if byte_range is None:
+            remaining = -1
+            base = 0
+        else:
+            f.seek(byte_range[0])
+            remaining = byte_range[1] - byte_range[0]
+            base = byte_range[0]
+
+        while True:
+            if remaining < 0:
+                chunk = f.read(chunk_size)
+            else:
+                chunk = f.read(min(chunk_size, remaining))
+                remaining -= len(chunk)
+            raw = data = pending + chunk
+
+            # Text mode, used by itertreelines, translates '\r\n' and '\r' to
+            # '\n'. A '\r' ending the chunk is held back in case the next
+            # chunk starts with '\n'. Positions in data are mapped back to
+            # positions in raw with the positions of the '\r\n' removed.
+            crlfs = None
+            if b'\r' in data:
+                if chunk and data[-1:] == b'\r':
+                    data = data[:-1]
+                crlfs = _crlf_positions(data)
+                data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+            start = 0
+            while True:
+                end = data.find(b'\n\n', start)
+                if end < 0:
+                    break
+
+                first = _tree_start(data, start, end + 1)
+                if first <= end:
+                    text = data[first:end + 1].decode('utf8')
+                    if offsets:
+                        yield base + _raw_position(first, crlfs), text
+                    else:
+                        yield text
+                start = end + 2
+
+            if not chunk:
+                break
+
+            consumed = _raw_position(start, crlfs)
+            pending = raw[consumed:]
+            base += consumed
+
+    # Last tree of a file with no blank line after it
+    first = _tree_start(data, start, len(data))
+    if first < len(data):
+        text = data[first:].decode('utf8')
+        if offsets:
+            yield base + _raw_position(first, crlfs), text
+        else:
+            yield text
+
+def itertrees(filepath, index_policy=ParseTree.INDEX_END_NODES,
+              tree_class=ParseTree, cache_dir=None, lazy=False,
+              byte_range=None, first_ordinal=0, cache_end_nodes=None):
     """
     Yield each tree of the .parse file given by 'path' as a
-    parsetree.ParseTree object.
+    parsetree.ParseTree object, whose source is set to (filepath, ordinal,
+    offset): the position of the tree in the file, counting from 0, and the
+    byte offset of its start.
+
+    tree_class may be any class with the constructor signature of ParseTree,
+    such as flattree.FlatParseTree. index_policy is passed to its
+    constructor. cache_end_nodes is deprecated, as for ParseTree.
+
+    If cache_dir is given, trees are loaded from the file's cache in that
+    directory (see treecache) when the cache is valid. Otherwise the file is
+    parsed, and a new cache is written once all of its trees have been
+    yielded.
+
+    If lazy is True, parsed trees are yielded as parsetree.LazyParseTree
+    handles, which build their tree only when it is first used. Trees loaded
+    from a cache are already built, so are yielded as they are. A cache
+    holds every tree of a file, so with both cache_dir and lazy, a new cache
+    is written only if every handle was built by the caller; trees skipped
+    (e.g. by an analyzer's prefilter) are never built just to be cached.
+
+    If byte_range is given, only the trees in that part of the file are
+    yielded (see itertreetexts), and caches are neither read nor written.
+    The ordinal of the first tree of the range must then be given as
+    first_ordinal.
     """
-    for treelines in itertreelines(filepath):
-        yield ParseTree(treelines, cache_end_nodes)
+    index_policy = ParseTree._deprecated_index_policy(index_policy,
+                                                      cache_end_nodes)
+    if byte_range is not None:
+        cache_dir = None
+
+    if cache_dir is not None:
+        trees = treecache.load_trees(filepath, cache_dir, index_policy,
+                                     tree_class)
+        if trees is not None:
+            yield from trees
+            return
+
+    trees = []
+    texts = itertreetexts(filepath, byte_range=byte_range, offsets=True)
+    for ordinal, (offset, text) in enumerate(texts, first_ordinal):
+        if lazy:
+            tree = LazyParseTree(text, index_policy, tree_class)
+        else:
+            tree = tree_class(text, index_policy)
+        tree.source = (filepath, ordinal, offset)
+        if cache_dir is not None:
+            trees.append(tree)
+        yield tree
 
-def itertrees_dir(path, **kwargs):
+    if cache_dir is not None:
+        if not lazy or all(tree.is_built for tree in trees):
+            treecache.write_cache(filepath, cache_dir, trees)
+
+def get_parse_files(path, recursive=False):
+    """
+    Return list of the .parse files in the directory given by 'path.' If
+    recursive is True, nested directories are also searched, and files are
+    in the order given by corpus.discover.
+    """
+    if recursive:
+        return [f.path for f in corpus.discover(path)]
+
+    return get_files_by_ext(path, '.parse', prepend_dir=True)
+
+def itertrees_dir(path, recursive=False, **kwargs):
     """
     Yield every parse tree of every .parse file found in the directory
     given by path. Trees are yielded as parsetree.ParseTree objects.
+    Other keyword arguments are passed to itertrees.
 
-    .parse files in nested directories of path are not searched.
+    .parse files in nested directories of path are searched only if
+    recursive is True.
     """
-    for filepath in get_files_by_ext(path, '.parse', prepend_dir=True):
+    for filepath in get_parse_files(path, recursive):
         for tree in itertrees(filepath, **kwargs):
             yield tree
 
+def _crlf_positions(data):
+    """
+    Return list of the position of each '\r\n' of bytes 'data' once each
+    '\r\n' before it has been translated to '\n.'
+    """
+    positions = []
+    i = data.find(b'\r\n')
+    while i >= 0:
+        positions.append(i - len(positions))
+        i = data.find(b'\r\n', i + 2)
+
+    return positions
+
+def _raw_position(position, crlfs):
+    """
+    Return position in bytes before translation of '\r\n' of 'position' in
+    the translated bytes, given the translated positions 'crlfs' of each
+    '\r\n' (None if there were none).
+    """
+    if crlfs is None:
+        return position
+
+    return position + bisect_left(crlfs, position)
+
+def _tree_start(data, start, end):
+    """
+    Return position in bytes 'data' of the start of the tree in data[start:
+    end], lines of a .parse file with no blank lines but leading ones, as
+    itertreelines would yield them. Return 'end' if it holds no tree.
+    """
+    # A line starting a tree discards the lines before it
+    top = data.rfind(b'\n(TOP ', start, end)
+    if top >= 0:
+        return top + 1
+
+    while data.startswith(b'\n', start, end):
+        start += 1
+
+    return start
+
 def timestamp_now():
     now = datetime.now()
     return now.strftime("%Y-%m-%d %H.%M.%S")
@@ -123,18 +317,18 @@ class Timer():
         self._interval = None
 
     def __enter__(self):
-        self._startTime = time.clock()
+        self._startTime = time.perf_counter()
         return self
 
     def __exit__(self, *args):
-        self._endTime = time.clock()
+        self._endTime = time.perf_counter()
         self._interval = self._endTime - self._startTime
 
     @property
     def elapsed_time(self):
         """Return time elapsed (in sec) since the timer was entered."""
         try:
-            return time.clock() - self._startTime
+            return time.perf_counter() - self._startTime
         except TypeError:
             raise TimerError(
                 'Timer must be started before elapsed_time can have a value.'